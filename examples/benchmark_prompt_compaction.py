@@ -0,0 +1,105 @@
+"""崩溃分析提示压缩基准
+
+对录制的 WinDBG 输出语料统计压缩前后的提示大小；指定 --llm 时分别用完整
+输出和压缩后的输出调用 LLM，比较两份报告的关键字段是否一致。
+
+用法:
+    python examples/benchmark_prompt_compaction.py <语料目录> [--budget 6000] [--llm]
+
+语料目录中每个 *.txt 文件是一条命令（默认 !analyze -v）的完整输出。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.config import ConfigManager
+from src.llm.client import LLMClient
+from src.llm.analyzer import SmartAnalyzer
+from src.nlp.compaction import estimate_tokens
+from src.nlp.templates import PromptTemplates
+
+
+def report_key(report):
+    """报告中用于比较质量的关键字段"""
+    top_frame = report.call_stack[0].function if report.call_stack else ""
+    return (
+        report.crash_type.upper(),
+        report.exception_code.lower().replace("0x", ""),
+        top_frame
+    )
+
+
+def analyze(analyzer, raw_output, command, token_budget):
+    """按指定预算分析一次，失败时返回异常信息"""
+    analyzer.prompt_token_budget = token_budget
+    try:
+        return analyzer.analyze_output(raw_output, command, use_cache=False), None
+    except Exception as e:
+        return None, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="崩溃分析提示压缩基准")
+    parser.add_argument("corpus", help="录制的 WinDBG 输出目录（*.txt）")
+    parser.add_argument("--budget", type=int, default=None, help="token 预算，默认读取配置")
+    parser.add_argument("--command", default="!analyze -v", help="输出对应的命令")
+    parser.add_argument("--llm", action="store_true", help="调用 LLM 比较报告质量")
+    args = parser.parse_args()
+
+    config = ConfigManager()
+    budget = args.budget or config.get_llm_prompt_token_budget()
+    files = sorted(Path(args.corpus).glob("*.txt"))
+    if not files:
+        print(f"语料目录中没有 .txt 文件: {args.corpus}")
+        return
+
+    analyzer = None
+    if args.llm:
+        analyzer = SmartAnalyzer(LLMClient.shared(config), cache_enabled=False)
+        analyzer.bucket_index = None
+
+    total_before = total_after = 0
+    matches = compared = 0
+
+    print(f"token 预算: {budget}")
+    print(f"{'文件':<32}{'压缩前':>10}{'压缩后':>10}{'减少':>8}{'耗时(ms)':>10}  报告")
+    for path in files:
+        raw_output = path.read_text(encoding="utf-8", errors="replace")
+
+        start = time.perf_counter()
+        full_prompt = PromptTemplates.format_crash_analysis(args.command, raw_output)
+        compact_prompt = PromptTemplates.format_crash_analysis(args.command, raw_output, budget)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        before = estimate_tokens(full_prompt)
+        after = estimate_tokens(compact_prompt)
+        total_before += before
+        total_after += after
+
+        quality = ""
+        if analyzer:
+            full_report, full_error = analyze(analyzer, raw_output, args.command, 0)
+            compact_report, compact_error = analyze(analyzer, raw_output, args.command, budget)
+            if full_error or compact_error:
+                quality = f"完整: {full_error or '成功'} / 压缩: {compact_error or '成功'}"
+            else:
+                compared += 1
+                same = report_key(full_report) == report_key(compact_report)
+                matches += same
+                quality = "一致" if same else f"{report_key(full_report)} -> {report_key(compact_report)}"
+
+        reduction = 1 - after / before if before else 0
+        print(f"{path.name:<32}{before:>10}{after:>10}{reduction:>8.1%}{elapsed:>10.1f}  {quality}")
+
+    print()
+    print(f"合计: {total_before} -> {total_after} tokens，减少 {1 - total_after / total_before:.1%}")
+    if compared:
+        print(f"报告关键字段（崩溃类型、异常代码、栈顶函数）一致: {matches}/{compared}")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ from src.core.exceptions import ConfigError
 from src.web.app import create_app
 from src.windbg.engine import WinDBGEngine
 from src.windbg.executor import CommandExecutor
+from src.windbg.pool import DebuggerPool
+from src.windbg.result_cache import CommandResultCache
+from src.windbg.artifact_store import DumpArtifactStore
 from src.nlp.processor import NLPProcessor
 from src.llm.client import LLMClient
 from src.llm.analyzer import SmartAnalyzer
@@ -29,25 +32,46 @@ def initialize_components(config: ConfigManager):
     """初始化共享组件"""
     session = SessionManager()
     windbg = WinDBGEngine(config)
-    executor = CommandExecutor(windbg)
+    command_cache = CommandResultCache.from_config(config)
+    artifact_store = DumpArtifactStore.from_config(config)
+    warmup_commands = config.get_warmup_commands() if config.is_warmup_enabled() else None
+    executor = CommandExecutor(windbg, command_cache, artifact_store, warmup_commands)
     nlp = NLPProcessor()
-    llm_client = LLMClient(config)
+    llm_client = LLMClient.shared(config)
     analyzer = SmartAnalyzer(llm_client, cache_enabled=True)
+    debugger_pool = DebuggerPool(
+        config,
+        result_cache=command_cache,
+        artifact_store=artifact_store,
+        warmup_commands=warmup_commands
+    )
+    debugger_pool.start_reaper()
     
     return {
         'session_manager': session,
         'windbg_engine': windbg,
         'executor': executor,
+        'command_cache': command_cache,
+        'artifact_store': artifact_store,
         'nlp_processor': nlp,
         'llm_client': llm_client,
-        'analyzer': analyzer
+        'analyzer': analyzer,
+        'debugger_pool': debugger_pool
     }
 
 
 def run_cli_mode(config: ConfigManager, components: dict):
     """运行 CLI 模式"""
     try:
-        cli = CLIInterface(config)
+        cli = CLIInterface(
+            config,
+            session_manager=components['session_manager'],
+            windbg_engine=components['windbg_engine'],
+            executor=components['executor'],
+            nlp_processor=components['nlp_processor'],
+            llm_client=components['llm_client'],
+            analyzer=components['analyzer']
+        )
         cli.run()
     except Exception as e:
         LoggerManager.error(f"CLI 模式错误: {str(e)}", exc_info=True)
@@ -64,7 +88,9 @@ def run_web_mode(config: ConfigManager, components: dict):
             llm_client=components['llm_client'],
             analyzer=components['analyzer'],
             executor=components['executor'],
-            nlp_processor=components['nlp_processor']
+            nlp_processor=components['nlp_processor'],
+            debugger_pool=components['debugger_pool'],
+            artifact_store=components['artifact_store']
         )
         
         host = config.get_web_host()
@@ -96,7 +122,9 @@ def run_both_mode(config: ConfigManager, components: dict):
             llm_client=components['llm_client'],
             analyzer=components['analyzer'],
             executor=components['executor'],
-            nlp_processor=components['nlp_processor']
+            nlp_processor=components['nlp_processor'],
+            debugger_pool=components['debugger_pool'],
+            artifact_store=components['artifact_store']
         )
         
         host = config.get_web_host()
@@ -121,7 +149,15 @@ def run_both_mode(config: ConfigManager, components: dict):
         web_thread.start()
         
         # 运行 CLI
-        cli = CLIInterface(config)
+        cli = CLIInterface(
+            config,
+            session_manager=components['session_manager'],
+            windbg_engine=components['windbg_engine'],
+            executor=components['executor'],
+            nlp_processor=components['nlp_processor'],
+            llm_client=components['llm_client'],
+            analyzer=components['analyzer']
+        )
         cli.run()
         
     except Exception as e:
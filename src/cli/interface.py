@@ -17,6 +17,8 @@ from src.core.logger import LoggerManager
 from src.core.exceptions import CLIError, InputValidationError
 from src.windbg.engine import WinDBGEngine
 from src.windbg.executor import CommandExecutor
+from src.windbg.result_cache import CommandResultCache
+from src.windbg.artifact_store import DumpArtifactStore
 from src.nlp.processor import NLPProcessor
 from src.llm.client import LLMClient
 from src.llm.analyzer import SmartAnalyzer
@@ -30,23 +32,41 @@ from src.output.modes import DisplayMode
 class CLIInterface:
     """命令行界面主控制器"""
 
-    def __init__(self, config: Optional[ConfigManager] = None):
-        """初始化 CLI 界面"""
+    def __init__(
+        self,
+        config: Optional[ConfigManager] = None,
+        session_manager: Optional[SessionManager] = None,
+        windbg_engine: Optional[WinDBGEngine] = None,
+        executor: Optional[CommandExecutor] = None,
+        nlp_processor: Optional[NLPProcessor] = None,
+        llm_client: Optional[LLMClient] = None,
+        analyzer: Optional[SmartAnalyzer] = None
+    ):
+        """初始化 CLI 界面
+
+        双模式下传入与 Web 共享的组件，CLI 与 Web 使用同一个 cdb 会话，
+        命令经由同一个调度器排队。
+        """
         self.config = config or ConfigManager()
-        self.session = SessionManager()
+        self.session = session_manager or SessionManager()
         self.display = DisplayManager(theme=self.config.get_cli_theme())
         self.validator = InputValidator()
 
         # 初始化 WinDBG
-        self.windbg = WinDBGEngine(self.config)
-        self.executor = CommandExecutor(self.windbg)
+        self.windbg = windbg_engine or WinDBGEngine(self.config)
+        self.executor = executor or CommandExecutor(
+            self.windbg,
+            CommandResultCache.from_config(self.config),
+            DumpArtifactStore.from_config(self.config),
+            self.config.get_warmup_commands() if self.config.is_warmup_enabled() else None
+        )
 
         # 初始化 NLP 处理器
-        self.nlp = NLPProcessor()
+        self.nlp = nlp_processor or NLPProcessor()
 
         # 初始化 LLM 客户端和分析器
-        self.llm_client = LLMClient(self.config)
-        self.analyzer = SmartAnalyzer(self.llm_client, cache_enabled=True)
+        self.llm_client = llm_client or LLMClient.shared(self.config)
+        self.analyzer = analyzer or SmartAnalyzer(self.llm_client, cache_enabled=True)
 
         # 初始化命令历史
         history_file = self.config.get_history_file()
@@ -124,7 +144,7 @@ class CLIInterface:
 
                 # 加载转储文件
                 self.session.set_state(SessionState.LOADING)
-                if self.windbg.load_dump(filepath):
+                if self.executor.load_dump(filepath):
                     self.session.load_dump(filepath)
                     self.session.dump_loaded()
                     
@@ -133,7 +153,10 @@ class CLIInterface:
                         self.session.set_session_active(True, self.windbg._process.pid)
                     
                     self.display.print_success(f"成功加载转储文件: {filepath}")
-                    self.display.print_info("cdb 会话已启动，命令将在同一会话中执行")
+                    if self.windbg._process:
+                        self.display.print_info("cdb 会话已启动，命令将在同一会话中执行")
+                    else:
+                        self.display.print_info("已找到该转储文件的历史分析产物，cdb 将在需要时启动")
                     self.display.print_info("输入 'help' 查看可用命令")
                     return True
                 else:
@@ -362,11 +385,6 @@ class CLIInterface:
     def process_smart_analysis(self, raw_output: str, command: str):
         """处理智能分析"""
         try:
-            # 检查 LLM 是否可用
-            if not self.llm_client.is_available():
-                self.display.print_warning("LLM 不可用，跳过智能分析")
-                return
-
             # 检查输出长度，如果为空则跳过分析
             if not raw_output or len(raw_output.strip()) == 0:
                 LoggerManager.debug("输出内容为空，跳过智能分析")
@@ -375,12 +393,19 @@ class CLIInterface:
             self.display.print_info("正在进行智能分析...")
 
             # 执行分析
-            report = self.analyzer.analyze_output(raw_output, command)
+            report = self.analyzer.analyze_output(raw_output, command, dump_file=self.session.dump_file)
 
             # 显示分析报告
             self.display.print_smart_analysis(report)
 
+            # 保存到转储文件的分析产物
+            self.executor.save_report(report)
+
         except Exception as e:
+            # 缓存、崩溃分桶和规则分析都未命中时才需要 LLM
+            if not self.llm_client.is_available():
+                self.display.print_warning("LLM 不可用，跳过智能分析")
+                return
             self.display.print_warning(f"智能分析失败: {str(e)}")
             LoggerManager.warning(f"智能分析错误: {str(e)}")
 
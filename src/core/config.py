@@ -98,6 +98,96 @@ class ConfigManager:
         """获取 WinDBG 超时时间"""
         return self.get("windbg.timeout", 30)
 
+    def get_windbg_pool_size(self) -> int:
+        """获取 cdb 会话池大小"""
+        return self.get("windbg.pool_size", 4)
+
+    def get_windbg_pool_idle_timeout(self) -> int:
+        """获取会话池中空闲会话的保留时间（秒），0 表示不按空闲时间淘汰"""
+        return self.get("windbg.pool_idle_timeout", 600)
+
+    def is_response_cache_enabled(self) -> bool:
+        """是否启用 LLM 响应缓存"""
+        return self.get("cache.enabled", True)
+
+    def get_response_cache_max_entries(self) -> int:
+        """获取响应缓存在内存中保留的条目数"""
+        return self.get("cache.max_size", 100)
+
+    def get_response_cache_ttl(self) -> int:
+        """获取响应缓存的有效期（秒）"""
+        return self.get("cache.ttl", 3600)
+
+    def get_response_cache_max_memory(self) -> int:
+        """获取响应缓存在内存中占用的上限（字节）"""
+        return self.get("cache.max_memory_mb", 16) * 1024 * 1024
+
+    def get_response_cache_max_disk_entries(self) -> int:
+        """获取响应缓存在磁盘中最多保存的条目数"""
+        return self.get("cache.max_disk_entries", 10000)
+
+    def is_response_cache_key_normalized(self) -> bool:
+        """是否按规范化后的崩溃签名缓存分析结果"""
+        return self.get("cache.normalize_keys", True)
+
+    def get_response_cache_dir(self) -> Optional[str]:
+        """获取响应缓存的磁盘目录（为空时只使用内存）"""
+        value = self.get("cache.disk_dir", "~/.ai_windbg_cache")
+        return value or None
+
+    def is_command_cache_enabled(self) -> bool:
+        """是否启用命令结果缓存"""
+        return self.get("windbg.result_cache.enabled", True)
+
+    def get_command_cache_max_entries(self) -> int:
+        """获取命令结果缓存的内存条目上限"""
+        return self.get("windbg.result_cache.max_entries", 256)
+
+    def get_command_cache_dir(self) -> Optional[str]:
+        """获取命令结果磁盘缓存目录（为空时只使用内存缓存）"""
+        value = self.get("windbg.result_cache.disk_dir", "~/.ai_windbg_command_cache")
+        return value if value else None
+
+    def get_command_cache_ttl(self) -> int:
+        """获取命令结果磁盘缓存的有效期（秒）"""
+        return self.get("windbg.result_cache.ttl", 7 * 24 * 3600)
+
+    def get_command_cache_max_disk_entries(self) -> int:
+        """获取命令结果磁盘缓存的条目上限"""
+        return self.get("windbg.result_cache.max_disk_entries", 5000)
+
+    def is_artifact_store_enabled(self) -> bool:
+        """是否启用转储分析产物存储"""
+        return self.get("windbg.artifact_store.enabled", True)
+
+    def get_artifact_store_path(self) -> str:
+        """获取分析产物数据库路径"""
+        return self.get("windbg.artifact_store.path", "~/.ai_windbg/artifacts.db")
+
+    def is_crash_bucket_enabled(self) -> bool:
+        """是否启用崩溃分桶索引"""
+        return self.get("windbg.crash_buckets.enabled", True)
+
+    def get_crash_bucket_path(self) -> str:
+        """获取崩溃分桶索引数据库路径"""
+        return self.get("windbg.crash_buckets.path", "~/.ai_windbg/buckets.db")
+
+    def get_crash_bucket_frame_count(self) -> int:
+        """获取参与崩溃签名计算的栈顶帧数"""
+        return self.get("windbg.crash_buckets.frame_count", 5)
+
+    def is_crash_bucket_reuse_enabled(self) -> bool:
+        """同一桶的新转储是否复用桶内已有的分析报告"""
+        return self.get("windbg.crash_buckets.reuse_reports", True)
+
+    def is_warmup_enabled(self) -> bool:
+        """是否在加载转储后预热常用命令"""
+        return self.get("windbg.warmup.enabled", True)
+
+    def get_warmup_commands(self) -> list:
+        """获取预热命令列表"""
+        return self.get("windbg.warmup.commands", [".exr -1", "kv", "lm", "!analyze -v"])
+
     def get_llm_provider(self) -> str:
         """获取 LLM 提供商"""
         return self.get("llm.provider", "openai")
@@ -136,6 +226,90 @@ class ConfigManager:
         """获取 LLM 温度参数"""
         return self.get("llm.temperature", 0.3)
 
+    def get_llm_timeout(self) -> float:
+        """获取 LLM 请求超时时间（秒）"""
+        return self.get("llm.timeout", 60)
+
+    def get_llm_max_connections(self) -> int:
+        """获取 LLM 共享连接池的最大连接数"""
+        return self.get("llm.http.max_connections", 20)
+
+    def get_llm_max_keepalive_connections(self) -> int:
+        """获取 LLM 共享连接池保持的最大空闲连接数"""
+        return self.get("llm.http.max_keepalive_connections", 10)
+
+    def get_llm_keepalive_expiry(self) -> float:
+        """获取空闲连接的保持时间（秒）"""
+        return self.get("llm.http.keepalive_expiry", 60)
+
+    def is_llm_http2_enabled(self) -> bool:
+        """LLM 请求是否使用 HTTP/2（需要安装 h2）"""
+        return self.get("llm.http.http2", False)
+
+    def get_llm_retry_max_retries(self) -> int:
+        """获取 LLM 请求失败后的最大重试次数"""
+        return self.get("llm.retry.max_retries", 3)
+
+    def get_llm_retry_base_delay(self) -> float:
+        """获取重试退避的基数（秒）"""
+        return self.get("llm.retry.base_delay", 0.5)
+
+    def get_llm_retry_max_delay(self) -> float:
+        """获取单次重试等待的上限（秒），Retry-After 超过该值时不再重试"""
+        return self.get("llm.retry.max_delay", 20)
+
+    def is_llm_hedging_enabled(self) -> bool:
+        """请求较慢时是否发出对冲请求"""
+        return self.get("llm.hedging.enabled", False)
+
+    def get_llm_hedging_percentile(self) -> float:
+        """获取发出对冲请求的耗时百分位"""
+        return self.get("llm.hedging.percentile", 95)
+
+    def get_llm_hedging_min_samples(self) -> int:
+        """获取计算耗时百分位所需的最少样本数"""
+        return self.get("llm.hedging.min_samples", 20)
+
+    def is_llm_circuit_breaker_enabled(self) -> bool:
+        """LLM 服务连续失败时是否熔断"""
+        return self.get("llm.circuit_breaker.enabled", True)
+
+    def get_llm_circuit_breaker_failure_threshold(self) -> int:
+        """获取熔断前的连续失败次数"""
+        return self.get("llm.circuit_breaker.failure_threshold", 5)
+
+    def get_llm_circuit_breaker_reset_timeout(self) -> float:
+        """获取熔断后放行探测请求前的等待时间（秒）"""
+        return self.get("llm.circuit_breaker.reset_timeout", 30)
+
+    def get_llm_prompt_token_budget(self) -> int:
+        """获取崩溃分析提示中 WinDBG 输出的 token 预算（0 表示不压缩）"""
+        return self.get("llm.prompt_token_budget", 6000)
+
+    def is_fast_analysis_enabled(self) -> bool:
+        """常见崩溃类型是否先用规则分析（命中时不调用 LLM）"""
+        return self.get("llm.fast_analysis.enabled", True)
+
+    def get_fast_analysis_min_confidence(self) -> float:
+        """获取规则分析结果直接作为报告的最低置信度"""
+        return self.get("llm.fast_analysis.min_confidence", 0.85)
+
+    def is_chunked_analysis_enabled(self) -> bool:
+        """超长输出是否使用分段分析"""
+        return self.get("llm.chunked_analysis.enabled", True)
+
+    def get_chunked_analysis_threshold(self) -> int:
+        """获取使用分段分析的输出 token 数阈值"""
+        return self.get("llm.chunked_analysis.threshold_tokens", 32000)
+
+    def get_chunked_analysis_chunk_tokens(self) -> int:
+        """获取分段分析每段的 token 上限"""
+        return self.get("llm.chunked_analysis.chunk_tokens", 6000)
+
+    def get_chunked_analysis_max_parallel(self) -> int:
+        """获取分段分析同时进行的 LLM 请求数"""
+        return self.get("llm.chunked_analysis.max_parallel", 4)
+
     def get_cli_theme(self) -> str:
         """获取 CLI 主题"""
         return self.get("cli.theme", "dark")
@@ -199,3 +373,55 @@ class ConfigManager:
     def get_web_log_level(self) -> str:
         """获取 Web 日志级别"""
         return self.get("web.log_level", "info")
+
+    def get_analysis_task_max_age(self) -> int:
+        """获取已结束分析任务的保留时间（秒）"""
+        return self.get("web.analysis_tasks.max_age_seconds", 3600)
+
+    def get_analysis_task_memory_budget(self) -> int:
+        """获取全部分析任务占用内存的上限（字节）"""
+        return self.get("web.analysis_tasks.memory_budget_mb", 256) * 1024 * 1024
+
+    def get_analysis_thinking_max_size(self) -> int:
+        """获取单个任务保留的思考内容上限（字符）"""
+        return self.get("web.analysis_tasks.thinking_max_kb", 512) * 1024
+
+    def get_analysis_thinking_checkpoint_size(self) -> int:
+        """获取思考内容分段（检查点）的大小（字符）"""
+        return self.get("web.analysis_tasks.checkpoint_kb", 4) * 1024
+
+    def get_analysis_max_concurrency(self) -> int:
+        """获取同时运行的分析任务数"""
+        return self.get("web.analysis_tasks.max_concurrency", 4)
+
+    def get_analysis_max_queue_size(self) -> int:
+        """获取排队等待的分析任务上限"""
+        return self.get("web.analysis_tasks.max_queue_size", 32)
+
+    def get_analysis_task_janitor_interval(self) -> int:
+        """获取分析任务清理的间隔（秒）"""
+        return self.get("web.analysis_tasks.janitor_interval_seconds", 60)
+
+    def get_websocket_queue_size(self) -> int:
+        """获取每个 WebSocket 连接的发送队列长度"""
+        return self.get("web.websocket.queue_size", 256)
+
+    def get_websocket_overflow_policy(self) -> str:
+        """获取发送队列满时的策略（drop_oldest / drop_newest / disconnect）"""
+        return self.get("web.websocket.overflow_policy", "drop_oldest")
+
+    def is_output_stream_enabled(self) -> bool:
+        """是否通过 /ws/output 实时推送 cdb 输出"""
+        return self.get("web.output_stream.enabled", True)
+
+    def get_output_stream_flush_interval(self) -> float:
+        """获取输出推送的批量间隔（秒）"""
+        return self.get("web.output_stream.flush_interval_ms", 50) / 1000
+
+    def get_output_stream_chunk_size(self) -> int:
+        """获取单条输出推送消息的最大字节数"""
+        return self.get("web.output_stream.chunk_kb", 64) * 1024
+
+    def get_output_stream_buffer_size(self) -> int:
+        """获取每个连接的输出缓冲上限（字节）"""
+        return self.get("web.output_stream.buffer_kb", 1024) * 1024
@@ -61,11 +61,21 @@ class APIError(LLMError):
     pass
 
 
+class CircuitOpenError(APIError):
+    """LLM 服务熔断中"""
+    pass
+
+
 class AnalysisError(LLMError):
     """分析错误"""
     pass
 
 
+class AnalysisQueueFullError(AnalysisError):
+    """分析队列已满"""
+    pass
+
+
 class OutputError(AIWinDBGError):
     """输出处理错误"""
     pass
@@ -0,0 +1,110 @@
+"""带过期时间的 SQLite 缓存表"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+class SQLiteTTLStore:
+    """缓存的磁盘层
+
+    单个 SQLite 数据库中的一张表，过期时间保存在带索引的 expires_at 列中，
+    清理过期条目只需一次按索引的范围删除。每次写入是一个事务，不会留下
+    不完整的条目。每写入 TRIM_INTERVAL 次删除过期条目，条目数超过
+    max_entries 时再删除最早过期的条目。
+
+    不加锁，由调用方在自己的锁内访问；数据库错误直接抛出，由调用方记录。
+    """
+
+    TRIM_INTERVAL = 64
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            key TEXT PRIMARY KEY,
+            {column} TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_{table}_expires_at ON {table} (expires_at);
+    """
+
+    def __init__(self, db_path: Path, table: str, column: str, max_entries: int):
+        """打开（必要时创建）数据库
+
+        Args:
+            db_path: 数据库文件路径，所在目录不存在时创建
+            table: 表名
+            column: 保存值的列名
+            max_entries: 最多保存的条目数
+        """
+        self.table = table
+        self.column = column
+        self.max_entries = max_entries
+        self._writes_since_trim = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA.format(table=table, column=column))
+            self._conn.commit()
+        except Exception:
+            self._conn.close()
+            raise
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """获取未过期的条目，返回 (值, 过期时间)"""
+        return self._conn.execute(
+            f"SELECT {self.column}, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+
+    def set(self, key: str, value: str, expires_at: float):
+        """写入条目，按需清理"""
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, {self.column}, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+        self._writes_since_trim += 1
+        if self._writes_since_trim >= self.TRIM_INTERVAL:
+            self.trim()
+
+    def delete_expired(self) -> int:
+        """删除过期条目，返回删除的条目数"""
+        with self._conn:
+            expired = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+        self.expirations += expired
+        return expired
+
+    def trim(self):
+        """删除过期条目，超过条目上限时再删除最早过期的条目"""
+        self._writes_since_trim = 0
+        self.delete_expired()
+
+        excess = self.count() - self.max_entries
+        if excess > 0:
+            with self._conn:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY expires_at LIMIT ?)",
+                    (excess,)
+                )
+            self.evictions += excess
+
+    def count(self) -> int:
+        """条目数（包括尚未清理的过期条目）"""
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def clear(self):
+        """删除所有条目"""
+        with self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
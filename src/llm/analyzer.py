@@ -2,45 +2,191 @@
 
 import json
 import asyncio
-from typing import Optional, Dict, Any, Callable, AsyncGenerator
+import hashlib
+from functools import partial
+from typing import Optional, Dict, Any, Callable, AsyncGenerator, List
 
 from src.llm.client import LLMClient
 from src.llm.cache import ResponseCache
+from src.llm.chunked import ChunkedAnalyzer
+from src.windbg.parser import OutputParser
+from src.windbg.crash_buckets import CrashBucketIndex
+from src.windbg.fast_analyzer import FastAnalyzer
 from src.nlp.templates import PromptTemplates
 from src.output.models import AnalysisReport, StackFrame, ExceptionInfo
 from src.core.logger import LoggerManager
 from src.core.exceptions import AnalysisError
 
 
+class _InFlightAnalysis:
+    """进行中的分析，相同输出的请求共享同一次 LLM 调用"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.participants = 0
+        self.chunks: List[str] = []
+        self._listeners: List[asyncio.Queue] = []
+
+    def publish(self, chunk: str):
+        """把一段流式输出推送给所有参与者"""
+        self.chunks.append(chunk)
+        for listener in self._listeners:
+            listener.put_nowait(chunk)
+
+    def close(self):
+        """通知所有参与者流式输出结束"""
+        for listener in self._listeners:
+            listener.put_nowait(None)
+        self._listeners = []
+
+    async def stream(self) -> AsyncGenerator[str, None]:
+        """先补发已经产生的输出，再接收新的输出，直到调用结束"""
+        listener: asyncio.Queue = asyncio.Queue()
+        for chunk in self.chunks:
+            listener.put_nowait(chunk)
+        if self.task.done():
+            listener.put_nowait(None)
+        else:
+            self._listeners.append(listener)
+
+        try:
+            while True:
+                chunk = await listener.get()
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+
 class SmartAnalyzer:
     """智能分析器"""
 
     def __init__(self, client: Optional[LLMClient] = None, cache_enabled: bool = True):
         """初始化分析器"""
-        self.client = client or LLMClient()
-        self.cache = ResponseCache() if cache_enabled else None
+        self.client = client or LLMClient.shared()
+        self.cache = ResponseCache.from_config(self.client.config) if cache_enabled else None
+        self.normalize_cache_keys = self.client.config.is_response_cache_key_normalized()
         self.templates = PromptTemplates()
+        self.parser = OutputParser()
+        self.bucket_index = CrashBucketIndex.from_config(self.client.config)
+        self.prompt_token_budget = self.client.config.get_llm_prompt_token_budget()
+        self.chunked = ChunkedAnalyzer.from_config(self.client)
+        self.fast_analyzer = FastAnalyzer.from_config(self.client.config)
+        # 进行中的分析（按输出内容合并相同请求）
+        self._in_flight: Dict[str, _InFlightAnalysis] = {}
+        self.coalesced_requests = 0
+        # 调用 LLM 的分析次数，以及因缓存、崩溃分桶、规则分析而省去的次数
+        self.llm_analyses = 0
+        self.llm_avoided = {"cache": 0, "bucket": 0, "rules": 0}
+
+    def _analysis_cache_key(self, raw_output: str, command: str) -> str:
+        """分析结果的缓存键
+
+        键包含规范化后的命令。启用规范化时使用崩溃签名：同一崩溃重新采集的
+        输出（地址、时间、符号加载提示不同）得到相同的键。
+        """
+        normalized_command = self.parser.normalize_command(command)
+        if self.normalize_cache_keys:
+            return f"crash:{normalized_command}:{self.parser.crash_signature(raw_output, command)}"
+        return f"raw:{normalized_command}:{hashlib.sha256(raw_output.encode()).hexdigest()}"
 
-    def analyze_output(
+    @staticmethod
+    def _cached_report_dict(cached: Dict[str, Any], raw_output: str, command: str) -> Dict[str, Any]:
+        """缓存的报告可能来自同一崩溃的另一次采集，替换为本次的输出和命令"""
+        return {**cached, "raw_output": raw_output, "command": command}
+
+    def _find_reusable_report(
         self,
         raw_output: str,
         command: str,
-        use_cache: bool = True
-    ) -> AnalysisReport:
-        """分析 WinDBG 输出"""
+        use_cache: bool,
+        dump_file: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """查找不必调用 LLM 的分析结果：依次查响应缓存、崩溃分桶、规则分析
+
+        无论是否复用，都会把本次输出（及转储）记入所属的桶。不使用缓存时
+        总是调用 LLM。
+        """
+        bucket = self.bucket_index.assign(raw_output, dump_file) if self.bucket_index else None
+
+        if not use_cache:
+            return None
+
+        if self.cache:
+            cached = self.cache.get(self._analysis_cache_key(raw_output, command))
+            if cached:
+                LoggerManager.debug("使用缓存的分析结果")
+                self.llm_avoided["cache"] += 1
+                return self._cached_report_dict(cached, raw_output, command)
+
+        if bucket and bucket.get("report"):
+            self.bucket_index.mark_reused(bucket["signature"])
+            LoggerManager.info(f"复用崩溃分桶的分析报告: {bucket['signature']}")
+            self.llm_avoided["bucket"] += 1
+            return self._cached_report_dict(bucket["report"], raw_output, command)
+
+        if self.fast_analyzer:
+            report = self.fast_analyzer.analyze(raw_output, command)
+            if report:
+                self.llm_avoided["rules"] += 1
+                return report.to_dict()
+
+        return None
+
+    def _require_llm(self):
+        """缓存、崩溃分桶和规则分析都未命中，需要调用 LLM 时检查其是否可用"""
         if not self.client.is_available():
             raise AnalysisError("LLM 客户端不可用")
 
-        try:
-            # 检查缓存
-            if use_cache and self.cache:
-                cached = self.cache.get(raw_output)
-                if cached:
-                    LoggerManager.debug("使用缓存的分析结果")
-                    return AnalysisReport.from_dict(cached)
+    def get_stats(self) -> Dict[str, Any]:
+        """获取分析统计：LLM 调用次数及省去的次数"""
+        avoided = sum(self.llm_avoided.values()) + self.coalesced_requests
+        total = self.llm_analyses + avoided
+        return {
+            "llm_analyses": self.llm_analyses,
+            "llm_avoided": avoided,
+            "avoided_by": {**self.llm_avoided, "coalesced": self.coalesced_requests},
+            "avoided_rate": round(avoided / total, 3) if total else 0.0,
+            "rules": self.fast_analyzer.get_stats() if self.fast_analyzer else None
+        }
+
+    def _save_report(self, raw_output: str, command: str, report: AnalysisReport, use_cache: bool):
+        """缓存 LLM 的分析结果，并保存为所属崩溃分桶的报告"""
+        if use_cache and self.cache:
+            self.cache.set(self._analysis_cache_key(raw_output, command), report.to_dict())
+
+        if not self.bucket_index:
+            return
+        bucket = self.bucket_index.compute_bucket(raw_output)
+        if bucket:
+            self.bucket_index.set_report(bucket["signature"], report)
 
-            # 生成分析提示
-            prompt = self.templates.format_crash_analysis(command, raw_output)
+    def analyze_output(
+        self,
+        raw_output: str,
+        command: str,
+        use_cache: bool = True,
+        dump_file: Optional[str] = None
+    ) -> AnalysisReport:
+        """分析 WinDBG 输出
+
+        缓存、崩溃分桶和规则分析不需要 LLM，都未命中时才要求 LLM 可用。
+        """
+        try:
+            # 检查缓存和崩溃分桶
+            reusable = self._find_reusable_report(raw_output, command, use_cache, dump_file)
+            if reusable:
+                return AnalysisReport.from_dict(reusable)
+            self._require_llm()
+
+            # 生成分析提示（超长输出先分段摘要）
+            self.llm_analyses += 1
+            analysis_input = raw_output
+            if self.chunked and self.chunked.should_chunk(raw_output):
+                analysis_input = self.chunked.summarize(command, raw_output)
+            prompt = self.templates.format_crash_analysis(command, analysis_input, self.prompt_token_budget)
 
             # 调用 LLM
             response = self.client.generate_json_completion(prompt)
@@ -51,8 +197,7 @@ class SmartAnalyzer:
             report.command = command
 
             # 缓存结果
-            if use_cache and self.cache:
-                self.cache.set(raw_output, report.to_dict())
+            self._save_report(raw_output, command, report, use_cache)
 
             LoggerManager.info("智能分析完成")
 
@@ -223,63 +368,158 @@ class SmartAnalyzer:
             self.cache.clear()
             LoggerManager.info("分析器缓存已清空")
 
+    def _extract_json(self, text: str) -> Dict[str, Any]:
+        """从 LLM 文本响应中提取 JSON"""
+        try:
+            json_start = text.find('{')
+            json_end = text.rfind('}') + 1
+
+            if json_start == -1 or json_end == 0:
+                raise ValueError("响应中未找到 JSON 数据")
+
+            return json.loads(text[json_start:json_end])
+        except json.JSONDecodeError as e:
+            LoggerManager.error(f"JSON 解析失败: {str(e)}")
+            raise AnalysisError(f"JSON 解析失败: {str(e)}")
+
+    def _join_flight(
+        self,
+        raw_output: str,
+        command: str,
+        use_cache: bool,
+        streaming: bool
+    ) -> _InFlightAnalysis:
+        """加入相同输出的进行中分析，没有则发起新的 LLM 调用
+
+        与缓存使用同一个键，同一崩溃的不同采集也会合并。不使用缓存的请求
+        不与其他请求合并。
+        """
+        key = self._analysis_cache_key(raw_output, command) if use_cache else None
+
+        flight = self._in_flight.get(key) if key else None
+        if flight is not None and not flight.task.done():
+            flight.participants += 1
+            self.coalesced_requests += 1
+            LoggerManager.info(f"相同输出的分析正在进行，等待其结果（{flight.participants} 个请求）")
+            return flight
+
+        flight = _InFlightAnalysis()
+        flight.participants = 1
+        flight.task = asyncio.create_task(self._call_llm(flight, raw_output, command, use_cache, streaming))
+        flight.task.add_done_callback(partial(self._finish_flight, key, flight))
+        if key:
+            self._in_flight[key] = flight
+        return flight
+
+    def _finish_flight(self, key: Optional[str], flight: _InFlightAnalysis, task: asyncio.Task):
+        """共享调用结束：结束流式输出并移出进行中列表"""
+        flight.close()
+        if key and self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # 异常由各参与者处理，这里只标记为已读取
+            task.exception()
+
+    def _leave_flight(self, flight: _InFlightAnalysis):
+        """参与者离开共享调用，没有参与者时取消调用"""
+        flight.participants -= 1
+        if flight.participants <= 0 and not flight.task.done():
+            flight.task.cancel()
+
+    async def _wait_flight(self, flight: _InFlightAnalysis, raw_output: str, command: str) -> AnalysisReport:
+        """等待共享调用的结果
+
+        参与者被取消时不会取消共享调用，最后一个参与者离开时才取消。
+        """
+        try:
+            report_dict = await asyncio.shield(flight.task)
+        finally:
+            self._leave_flight(flight)
+
+        return AnalysisReport.from_dict(self._cached_report_dict(report_dict, raw_output, command))
+
+    async def _call_llm(
+        self,
+        flight: _InFlightAnalysis,
+        raw_output: str,
+        command: str,
+        use_cache: bool,
+        streaming: bool
+    ) -> Dict[str, Any]:
+        """调用 LLM 并解析为报告（同一输出只执行一次）"""
+        # 生成分析提示（超长输出先分段摘要，流式分析时把分段进度作为思考内容推送）
+        self.llm_analyses += 1
+        analysis_input = raw_output
+        if self.chunked and self.chunked.should_chunk(raw_output):
+            analysis_input = await self.chunked.summarize_async(
+                command, raw_output, flight.publish if streaming else None
+            )
+        prompt = self.templates.format_crash_analysis(command, analysis_input, self.prompt_token_budget)
+
+        if streaming:
+            full_response = ""
+            async for chunk in self.client.generate_streaming_completion(prompt):
+                full_response += chunk
+                flight.publish(chunk)
+            LoggerManager.debug(f"完整响应: {full_response}")
+        else:
+            full_response = await self.client.generate_completion_async(prompt)
+
+        # 解析响应 - 先将字符串转换为JSON字典
+        report = self._parse_analysis_response(self._extract_json(full_response))
+        report.raw_output = raw_output
+        report.command = command
+
+        # 缓存结果（SQLite 写入在线程中执行，不阻塞事件循环）
+        await asyncio.to_thread(self._save_report, raw_output, command, report, use_cache)
+
+        return report.to_dict()
+
     async def analyze_output_async(
         self,
         raw_output: str,
         command: str,
         progress_callback: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
-        use_cache: bool = True
+        use_cache: bool = True,
+        dump_file: Optional[str] = None
     ) -> AnalysisReport:
         """异步分析 WinDBG 输出
-        
+
+        相同输出的分析正在进行时，直接等待其结果，不再调用 LLM。
+
         Args:
             raw_output: WinDBG 原始输出
             command: 执行的命令
             progress_callback: 进度回调函数，接收 (stage, message, data)
             use_cache: 是否使用缓存
+            dump_file: 输出所属的转储文件（用于崩溃分桶计数）
             
         Returns:
             分析报告
         """
-        if not self.client.is_available():
-            raise AnalysisError("LLM 客户端不可用")
-
         try:
             if progress_callback:
                 await progress_callback("checking_cache", "检查缓存...", {})
 
-            # 检查缓存
-            if use_cache and self.cache:
-                cached = self.cache.get(raw_output)
-                if cached:
-                    LoggerManager.debug("使用缓存的分析结果")
-                    if progress_callback:
-                        await progress_callback("cache_hit", "使用缓存结果", {})
-                    return AnalysisReport.from_dict(cached)
+            # 检查缓存和崩溃分桶（查询 SQLite、计算转储标识，在线程中执行）
+            reusable = await asyncio.to_thread(
+                self._find_reusable_report, raw_output, command, use_cache, dump_file
+            )
+            if reusable:
+                if progress_callback:
+                    await progress_callback("cache_hit", "使用缓存结果", {})
+                return AnalysisReport.from_dict(reusable)
+            self._require_llm()
 
             if progress_callback:
                 await progress_callback("preparing", "准备分析提示...", {})
 
-            # 生成分析提示
-            prompt = self.templates.format_crash_analysis(command, raw_output)
+            flight = self._join_flight(raw_output, command, use_cache, streaming=False)
 
             if progress_callback:
                 await progress_callback("analyzing", "正在分析崩溃信息...", {})
 
-            # 调用异步 LLM
-            response = await self.client.generate_completion_async(prompt)
-
-            if progress_callback:
-                await progress_callback("parsing", "解析分析结果...", {})
-
-            # 解析响应
-            report = self._parse_analysis_response(response)
-            report.raw_output = raw_output
-            report.command = command
-
-            # 缓存结果
-            if use_cache and self.cache:
-                self.cache.set(raw_output, report.to_dict())
+            report = await self._wait_flight(flight, raw_output, command)
 
             if progress_callback:
                 await progress_callback("completed", "分析完成", report.to_dict())
@@ -299,82 +539,67 @@ class SmartAnalyzer:
         raw_output: str,
         command: str,
         progress_callback: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
-        use_cache: bool = True
+        use_cache: bool = True,
+        dump_file: Optional[str] = None
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """流式分析 WinDBG 输出
-        
+
+        相同输出的分析正在进行时加入该分析：先补发已经生成的内容，再接收
+        后续内容，LLM 只调用一次。
+
         Args:
             raw_output: WinDBG 原始输出
             command: 执行的命令
             progress_callback: 进度回调函数，接收 (stage, message, data)
             use_cache: 是否使用缓存
+            dump_file: 输出所属的转储文件（用于崩溃分桶计数）
             
         Yields:
             分析进度信息
         """
-        if not self.client.is_available():
-            raise AnalysisError("LLM 客户端不可用")
-
         try:
             if progress_callback:
                 await progress_callback("checking_cache", "检查缓存...", {})
 
-            # 检查缓存
-            if use_cache and self.cache:
-                cached = self.cache.get(raw_output)
-                if cached:
-                    LoggerManager.debug("使用缓存的分析结果")
-                    yield {
-                        "type": "cache_hit",
-                        "message": "使用缓存结果",
-                        "data": cached
-                    }
-                    return
+            # 检查缓存和崩溃分桶（查询 SQLite、计算转储标识，在线程中执行）
+            reusable = await asyncio.to_thread(
+                self._find_reusable_report, raw_output, command, use_cache, dump_file
+            )
+            if reusable:
+                yield {
+                    "type": "cache_hit",
+                    "message": "使用缓存结果",
+                    "data": reusable
+                }
+                return
+            self._require_llm()
 
             if progress_callback:
                 await progress_callback("preparing", "准备分析提示...", {})
 
-            # 生成分析提示
-            prompt = self.templates.format_crash_analysis(command, raw_output)
+            flight = self._join_flight(raw_output, command, use_cache, streaming=True)
 
             if progress_callback:
                 await progress_callback("analyzing", "正在分析崩溃信息...", {})
 
-            # 调用流式 LLM
-            full_response = ""
-            async for chunk in self.client.generate_streaming_completion(prompt, progress_callback):
-                full_response += chunk
-                yield {
-                    "type": "thinking",
-                    "message": "思考中...",
-                    "data": {"chunk": chunk}
-                }
+            try:
+                async for chunk in flight.stream():
+                    if progress_callback:
+                        await progress_callback("thinking", chunk, {"chunk": chunk})
+                    yield {
+                        "type": "thinking",
+                        "message": "思考中...",
+                        "data": {"chunk": chunk}
+                    }
+            except BaseException:
+                # 参与者提前退出（例如任务被取消）
+                self._leave_flight(flight)
+                raise
 
             if progress_callback:
                 await progress_callback("parsing", "解析分析结果...", {})
 
-            LoggerManager.debug(f"完整响应: {full_response}")
-            # 解析响应 - 先将字符串转换为JSON字典
-            try:
-                json_start = full_response.find('{')
-                json_end = full_response.rfind('}') + 1
-                
-                if json_start == -1 or json_end == 0:
-                    raise ValueError("响应中未找到 JSON 数据")
-                
-                json_str = full_response[json_start:json_end]
-                response_dict = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                LoggerManager.error(f"JSON 解析失败: {str(e)}")
-                raise AnalysisError(f"JSON 解析失败: {str(e)}")
-            
-            report = self._parse_analysis_response(response_dict)
-            report.raw_output = raw_output
-            report.command = command
-
-            # 缓存结果
-            if use_cache and self.cache:
-                self.cache.set(raw_output, report.to_dict())
+            report = await self._wait_flight(flight, raw_output, command)
 
             if progress_callback:
                 await progress_callback("completed", "分析完成", report.to_dict())
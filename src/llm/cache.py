@@ -2,128 +2,234 @@
 
 import hashlib
 import json
+import threading
 import time
-from typing import Optional, Any, Dict
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Tuple
 from pathlib import Path
 
+from src.core.config import ConfigManager
 from src.core.logger import LoggerManager
-from src.core.exceptions import LLMError
+from src.core.sqlite_cache import SQLiteTTLStore
 
 
 class ResponseCache:
-    """响应缓存"""
-
-    def __init__(self, cache_dir: str = "~/.ai_windbg_cache", ttl: int = 3600):
-        """初始化缓存"""
-        self.cache_dir = Path(cache_dir).expanduser()
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    """响应缓存
+
+    内存层按 LRU 保存，同时受条目数（max_entries）和占用字节数
+    （max_memory_bytes）限制。磁盘层是单个 SQLite 数据库（见
+    SQLiteTTLStore），条目数超过 max_disk_entries 时删除最早过期的条目。
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = "~/.ai_windbg_cache",
+        ttl: int = 3600,
+        max_entries: int = 100,
+        max_memory_bytes: int = 16 * 1024 * 1024,
+        max_disk_entries: int = 10000
+    ):
+        """初始化缓存
+
+        Args:
+            cache_dir: 磁盘层目录，为 None 时只使用内存
+            ttl: 条目有效期（秒）
+            max_entries: 内存层最多保存的条目数
+            max_memory_bytes: 内存层最多占用的字节数（按序列化后的大小估算）
+            max_disk_entries: 磁盘层最多保存的条目数
+        """
         self.ttl = ttl
-        self.cache: Dict[str, Dict] = {}
-
-        LoggerManager.debug(f"响应缓存初始化: {self.cache_dir}")
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (过期时间, 数据, 序列化后的大小)
+        self.cache: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self._disk: Optional[SQLiteTTLStore] = None
+        if self.cache_dir:
+            try:
+                self._disk = SQLiteTTLStore(self.cache_dir / "responses.db", "responses", "data", max_disk_entries)
+            except Exception as e:
+                LoggerManager.warning(f"初始化响应缓存数据库失败，只使用内存缓存: {str(e)}")
+
+        LoggerManager.debug(
+            f"响应缓存初始化: max_entries={max_entries}, ttl={ttl}, cache_dir={self.cache_dir}"
+        )
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> Optional["ResponseCache"]:
+        """根据配置创建缓存，未启用时返回 None"""
+        if not config.is_response_cache_enabled():
+            return None
+        return cls(
+            cache_dir=config.get_response_cache_dir(),
+            ttl=config.get_response_cache_ttl(),
+            max_entries=config.get_response_cache_max_entries(),
+            max_memory_bytes=config.get_response_cache_max_memory(),
+            max_disk_entries=config.get_response_cache_max_disk_entries()
+        )
 
     def _get_cache_key(self, prompt: str) -> str:
         """生成缓存键"""
         return hashlib.md5(prompt.encode()).hexdigest()
 
-    def _get_cache_file(self, key: str) -> Path:
-        """获取缓存文件路径"""
-        return self.cache_dir / f"{key}.json"
+    def _remember(self, key: str, data: Any, expires_at: float, size: int):
+        """保存到内存层并按 LRU 淘汰（持有锁时调用）"""
+        self._forget(key)
+        if size > self.max_memory_bytes:
+            # 单个条目超过内存上限时只保存在磁盘层，不清空整个内存层
+            return
+
+        self.cache[key] = (expires_at, data, size)
+        self._memory_bytes += size
+
+        while self.cache and (len(self.cache) > self.max_entries or self._memory_bytes > self.max_memory_bytes):
+            _, (_, _, evicted_size) = self.cache.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.evictions += 1
+
+    def _forget(self, key: str):
+        """从内存层移除（持有锁时调用）"""
+        entry = self.cache.pop(key, None)
+        if entry:
+            self._memory_bytes -= entry[2]
 
     def get(self, prompt: str) -> Optional[Any]:
         """获取缓存"""
         key = self._get_cache_key(prompt)
-
-        # 先检查内存缓存
-        if key in self.cache:
-            cached = self.cache[key]
-            if time.time() - cached['timestamp'] < self.ttl:
-                LoggerManager.debug("从内存缓存获取响应")
-                return cached['data']
-            else:
-                del self.cache[key]
-
-        # 检查磁盘缓存
-        cache_file = self._get_cache_file(key)
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached = json.load(f)
-
-                if time.time() - cached['timestamp'] < self.ttl:
-                    # 加载到内存缓存
-                    self.cache[key] = cached
+        now = time.time()
+
+        with self._lock:
+            # 先检查内存缓存
+            entry = self.cache.get(key)
+            if entry:
+                if entry[0] > now:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    LoggerManager.debug("从内存缓存获取响应")
+                    return entry[1]
+                self._forget(key)
+                self.expirations += 1
+
+            # 检查磁盘缓存
+            if self._disk is not None:
+                try:
+                    row = self._disk.get(key)
+                except Exception as e:
+                    LoggerManager.warning(f"读取缓存失败: {str(e)}")
+                    row = None
+
+                if row:
+                    data = json.loads(row[0])
+                    self._remember(key, data, row[1], len(row[0]))
+                    self.hits += 1
+                    self.disk_hits += 1
                     LoggerManager.debug("从磁盘缓存获取响应")
-                    return cached['data']
-                else:
-                    # 过期，删除缓存
-                    cache_file.unlink()
-
-            except Exception as e:
-                LoggerManager.warning(f"读取缓存失败: {str(e)}")
+                    return data
 
+            self.misses += 1
         return None
 
     def set(self, prompt: str, data: Any):
         """设置缓存"""
         key = self._get_cache_key(prompt)
-        timestamp = time.time()
+        expires_at = time.time() + self.ttl
+        serialized = json.dumps(data, ensure_ascii=False)
 
-        # 保存到内存缓存
-        self.cache[key] = {
-            'data': data,
-            'timestamp': timestamp
-        }
+        with self._lock:
+            self._remember(key, data, expires_at, len(serialized))
 
-        # 保存到磁盘缓存
-        try:
-            cache_file = self._get_cache_file(key)
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'data': data,
-                    'timestamp': timestamp
-                }, f, ensure_ascii=False, indent=2)
+            if self._disk is None:
+                return
 
-            LoggerManager.debug("响应已缓存")
-
-        except Exception as e:
-            LoggerManager.warning(f"保存缓存失败: {str(e)}")
+            try:
+                self._disk.set(key, serialized, expires_at)
+                LoggerManager.debug("响应已缓存")
+            except Exception as e:
+                LoggerManager.warning(f"保存缓存失败: {str(e)}")
 
     def clear(self):
         """清空缓存"""
-        self.cache = {}
-
-        # 清空磁盘缓存
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                cache_file.unlink()
-            except Exception as e:
-                LoggerManager.warning(f"删除缓存文件失败: {str(e)}")
+        with self._lock:
+            self.cache.clear()
+            self._memory_bytes = 0
+
+            if self._disk is not None:
+                try:
+                    self._disk.clear()
+                except Exception as e:
+                    LoggerManager.warning(f"清空缓存数据库失败: {str(e)}")
+
+        # 旧版本每个条目一个 JSON 文件，一并删除
+        if self.cache_dir:
+            for cache_file in self.cache_dir.glob("*.json"):
+                try:
+                    cache_file.unlink()
+                except Exception as e:
+                    LoggerManager.warning(f"删除缓存文件失败: {str(e)}")
 
         LoggerManager.info("缓存已清空")
 
     def cleanup_expired(self):
         """清理过期缓存"""
-        current_time = time.time()
-
-        # 清理内存缓存
-        expired_keys = [
-            key for key, cached in self.cache.items()
-            if current_time - cached['timestamp'] >= self.ttl
-        ]
-        for key in expired_keys:
-            del self.cache[key]
-
-        # 清理磁盘缓存
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached = json.load(f)
-
-                if current_time - cached['timestamp'] >= self.ttl:
-                    cache_file.unlink()
-
-            except Exception as e:
-                LoggerManager.warning(f"清理缓存文件失败: {str(e)}")
-
-        LoggerManager.debug(f"清理了 {len(expired_keys)} 个过期缓存")
+        now = time.time()
+
+        with self._lock:
+            # 清理内存缓存
+            expired_keys = [key for key, entry in self.cache.items() if entry[0] <= now]
+            for key in expired_keys:
+                self._forget(key)
+            expired = len(expired_keys)
+            self.expirations += expired
+
+            # 清理磁盘缓存（按 expires_at 索引范围删除）
+            if self._disk is not None:
+                try:
+                    expired += self._disk.delete_expired()
+                except Exception as e:
+                    LoggerManager.warning(f"清理缓存数据库失败: {str(e)}")
+
+        LoggerManager.debug(f"清理了 {expired} 个过期缓存")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            disk_entries = None
+            if self._disk is not None:
+                try:
+                    disk_entries = self._disk.count()
+                except Exception:
+                    pass
+
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.cache),
+                "max_entries": self.max_entries,
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_entries": disk_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions + (self._disk.evictions if self._disk else 0),
+                "expirations": self.expirations + (self._disk.expirations if self._disk else 0)
+            }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
@@ -0,0 +1,172 @@
+"""超长输出的分段分析"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Callable, Union
+
+from src.llm.client import LLMClient
+from src.nlp.compaction import PromptCompactor, OutputChunker, estimate_tokens
+from src.nlp.templates import PromptTemplates
+from src.core.logger import LoggerManager
+
+
+class ChunkedAnalyzer:
+    """超长输出的 map-reduce 分析
+
+    map：输出按结构边界分段，各段并发（最多 max_parallel 个）请求 LLM 摘录
+    与崩溃相关的内容。reduce：合并各段摘要作为崩溃分析提示的输入；摘要合计
+    仍超出分段上限时，对摘要再分段摘要，最多 MAX_REDUCE_LEVELS 层。
+    """
+
+    MAX_REDUCE_LEVELS = 3
+
+    # 分段摘要的最大输出 token 数
+    SUMMARY_MAX_TOKENS = 512
+
+    # 模型判断分段没有相关内容时的回答
+    EMPTY_SUMMARIES = {"无", "无。", "none", "n/a"}
+
+    def __init__(
+        self,
+        client: LLMClient,
+        threshold_tokens: int = 32000,
+        chunk_tokens: int = 6000,
+        max_parallel: int = 4
+    ):
+        """初始化分段分析
+
+        Args:
+            client: LLM 客户端
+            threshold_tokens: 输出超过该 token 数时使用分段分析
+            chunk_tokens: 每段的 token 上限
+            max_parallel: 同时进行的分段请求数
+        """
+        self.client = client
+        self.threshold_tokens = threshold_tokens
+        self.chunk_tokens = chunk_tokens
+        self.max_parallel = max_parallel
+        self.chunker = OutputChunker(chunk_tokens)
+        self.compactor = PromptCompactor(chunk_tokens)
+
+    @classmethod
+    def from_config(cls, client: LLMClient) -> Optional["ChunkedAnalyzer"]:
+        """根据配置创建，未启用时返回 None"""
+        config = client.config
+        if not config.is_chunked_analysis_enabled():
+            return None
+        return cls(
+            client,
+            threshold_tokens=config.get_chunked_analysis_threshold(),
+            chunk_tokens=config.get_chunked_analysis_chunk_tokens(),
+            max_parallel=config.get_chunked_analysis_max_parallel()
+        )
+
+    def should_chunk(self, raw_output: str) -> bool:
+        """输出是否需要分段分析"""
+        return estimate_tokens(raw_output) > self.threshold_tokens
+
+    def _prompts(self, command: str, context: str, text: str) -> List[str]:
+        """把文本分段并生成各段的摘要提示"""
+        chunks = self.chunker.split(text)
+        return [
+            PromptTemplates.format_chunk_summary(command, index, len(chunks), context, chunk)
+            for index, chunk in enumerate(chunks, 1)
+        ]
+
+    def _combine(self, summaries: List[Union[str, BaseException]]) -> str:
+        """合并各段摘要，去掉没有相关内容的分段
+
+        个别分段请求失败时在摘要中注明，全部失败时抛出第一个异常。
+        """
+        failures = [summary for summary in summaries if isinstance(summary, BaseException)]
+        if failures and len(failures) == len(summaries):
+            raise failures[0]
+        if failures:
+            LoggerManager.warning(f"{len(failures)}/{len(summaries)} 个分段摘要失败: {str(failures[0])}")
+
+        parts = []
+        for index, summary in enumerate(summaries, 1):
+            if isinstance(summary, BaseException):
+                parts.append(f"[第 {index} 段摘要]\n（该段分析失败，内容缺失）")
+                continue
+            summary = (summary or "").strip()
+            if summary and summary.lower() not in self.EMPTY_SUMMARIES:
+                parts.append(f"[第 {index} 段摘要]\n{summary}")
+        return '\n\n'.join(parts)
+
+    def _reduce_input(self, context: str, combined: str, total: int) -> str:
+        """生成崩溃分析提示的输入"""
+        return (
+            f"（原始输出过长，已按线程、模块分为 {total} 段分别摘要，以下是异常信息和各段摘要）\n\n"
+            f"[异常记录]\n{context or '无'}\n\n{combined or '各段均未发现与崩溃相关的内容'}"
+        )
+
+    async def summarize_async(
+        self,
+        command: str,
+        raw_output: str,
+        on_progress: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """分段摘要超长输出，返回用于崩溃分析提示的文本
+
+        Args:
+            command: 执行的命令
+            raw_output: WinDBG 原始输出
+            on_progress: 每完成一段时调用，参数为进度说明
+        """
+        context = '\n'.join(self.compactor.key_lines(raw_output))
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        text = raw_output
+        total = 0
+
+        for level in range(1, self.MAX_REDUCE_LEVELS + 1):
+            prompts = self._prompts(command, context, text)
+            total = total or len(prompts)
+            done = 0
+            LoggerManager.info(f"分段分析第 {level} 层: {len(prompts)} 段，并发 {self.max_parallel}")
+
+            async def summarize(prompt: str) -> str:
+                nonlocal done
+                async with semaphore:
+                    summary = await self.client.generate_completion_async(
+                        prompt, max_tokens=self.SUMMARY_MAX_TOKENS
+                    )
+                done += 1
+                if on_progress:
+                    on_progress(f"分段分析 {done}/{len(prompts)}\n")
+                return summary
+
+            summaries = await asyncio.gather(
+                *(summarize(prompt) for prompt in prompts), return_exceptions=True
+            )
+            text = self._combine(summaries)
+            if estimate_tokens(text) <= self.chunk_tokens:
+                break
+
+        return self._reduce_input(context, text, total)
+
+    def _summarize_one(self, prompt: str) -> Union[str, BaseException]:
+        """同步请求一段摘要，失败时返回异常而不是抛出"""
+        try:
+            return self.client.generate_completion(prompt, max_tokens=self.SUMMARY_MAX_TOKENS)
+        except Exception as e:
+            return e
+
+    def summarize(self, command: str, raw_output: str) -> str:
+        """分段摘要超长输出（同步方式，各段在线程池中并发请求）"""
+        context = '\n'.join(self.compactor.key_lines(raw_output))
+        text = raw_output
+        total = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            for level in range(1, self.MAX_REDUCE_LEVELS + 1):
+                prompts = self._prompts(command, context, text)
+                total = total or len(prompts)
+                LoggerManager.info(f"分段分析第 {level} 层: {len(prompts)} 段，并发 {self.max_parallel}")
+
+                summaries = list(pool.map(self._summarize_one, prompts))
+                text = self._combine(summaries)
+                if estimate_tokens(text) <= self.chunk_tokens:
+                    break
+
+        return self._reduce_input(context, text, total)
@@ -2,20 +2,60 @@
 
 import json
 import asyncio
+import threading
+import weakref
 from typing import Optional, Dict, Any, AsyncGenerator, Callable
 from openai import OpenAI, AsyncOpenAI
 
 from src.core.config import ConfigManager
 from src.core.logger import LoggerManager
-from src.core.exceptions import LLMError, APIError
+from src.core.exceptions import LLMError, APIError, CircuitOpenError
+from src.llm.http_pool import HttpClientPool
+from src.llm.resilience import ResilientCaller
 
 
 class LLMClient:
-    """LLM 客户端"""
+    """LLM 客户端
+
+    所有实例通过 HttpClientPool 共享 HTTP 连接池。同一配置应使用
+    LLMClient.shared() 获取同一个实例。请求经 ResilientCaller 重试、
+    对冲和熔断（OpenAI SDK 自身的重试已关闭，避免重复重试）。
+    """
+
+    # 键为配置对象的 id：共享实例持有配置，条目存在期间配置不会被回收，
+    # id 不会被其他配置复用；实例不再被引用时条目自动删除
+    _shared: "weakref.WeakValueDictionary[int, LLMClient]" = weakref.WeakValueDictionary()
+    _default: Optional["LLMClient"] = None
+    _shared_lock = threading.Lock()
 
     def __init__(self, config: Optional[ConfigManager] = None):
         """初始化 LLM 客户端"""
         self.config = config or ConfigManager()
+        self.resilience = ResilientCaller.from_config(self.config)
+        self._setup_client()
+
+    @classmethod
+    def shared(cls, config: Optional[ConfigManager] = None) -> "LLMClient":
+        """获取配置对应的进程内共享实例（CLI 与 Web 使用同一个客户端）
+
+        未指定配置时使用默认配置的共享实例。
+        """
+        with cls._shared_lock:
+            if config is None:
+                if cls._default is None:
+                    cls._default = cls()
+                return cls._default
+
+            client = cls._shared.get(id(config))
+            if client is None:
+                client = cls(config)
+                cls._shared[id(config)] = client
+            return client
+
+    def reload(self):
+        """配置变更后重建 HTTP 连接池、重试/对冲/熔断策略和 OpenAI 客户端"""
+        HttpClientPool.reconfigure(self.config)
+        self.resilience = ResilientCaller.from_config(self.config)
         self._setup_client()
 
     def _setup_client(self):
@@ -36,7 +76,7 @@ class LLMClient:
             site_name = self.config.get_llm_site_name()
 
             # 构建客户端参数
-            client_params = {"api_key": api_key}
+            client_params = {"api_key": api_key, "max_retries": 0}
             
             # 如果是 OpenRouter，设置 base_url 和自定义头
             if provider == "openrouter":
@@ -63,8 +103,8 @@ class LLMClient:
                     # 默认使用 DeepSeek 官方 API 地址
                     client_params["base_url"] = "https://api.deepseek.com"
 
-            self.client = OpenAI(**client_params)
-            self.async_client = AsyncOpenAI(**client_params)
+            self.client = OpenAI(**client_params, http_client=HttpClientPool.get_sync(self.config))
+            self.async_client = AsyncOpenAI(**client_params, http_client=HttpClientPool.get_async(self.config))
             LoggerManager.info(f"LLM 客户端初始化成功 (provider: {provider})")
         except Exception as e:
             LoggerManager.error(f"LLM 客户端初始化失败: {str(e)}")
@@ -92,13 +132,15 @@ class LLMClient:
 
             LoggerManager.debug(f"调用 LLM: {model}, max_tokens={max_tokens}")
 
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
+            response = self.resilience.call(
+                lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
             )
 
             result = response.choices[0].message.content
@@ -107,6 +149,8 @@ class LLMClient:
 
             return result
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             LoggerManager.error(f"LLM 调用失败: {str(e)}")
             raise APIError(f"LLM 调用失败: {str(e)}")
@@ -169,14 +213,18 @@ class LLMClient:
             if progress_callback:
                 await progress_callback("preparing", "准备调用 LLM...", {})
 
-            stream = await self.async_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature,
-                stream=True
+            # 只重试建立流的请求，开始输出后不再重试
+            stream = await self.resilience.call_async(
+                lambda: self.async_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                ),
+                hedge=False
             )
 
             if progress_callback:
@@ -195,6 +243,8 @@ class LLMClient:
 
             LoggerManager.debug(f"LLM 流式响应完成，总长度: {len(full_content)}")
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             LoggerManager.error(f"LLM 流式调用失败: {str(e)}")
             raise APIError(f"LLM 流式调用失败: {str(e)}")
@@ -225,13 +275,15 @@ class LLMClient:
 
             LoggerManager.debug(f"异步调用 LLM: {model}, max_tokens={max_tokens}")
 
-            response = await self.async_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
+            response = await self.resilience.call_async(
+                lambda: self.async_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
             )
 
             result = response.choices[0].message.content
@@ -240,6 +292,12 @@ class LLMClient:
 
             return result
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             LoggerManager.error(f"LLM 异步调用失败: {str(e)}")
             raise APIError(f"LLM 异步调用失败: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取请求重试、对冲和熔断统计"""
+        return self.resilience.get_stats()
@@ -0,0 +1,113 @@
+"""LLM 请求共享的 HTTP 连接池"""
+
+import importlib.util
+import threading
+from typing import Optional, Dict, Any
+
+import httpx
+
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+
+
+class HttpClientPool:
+    """进程内共享的 httpx 客户端
+
+    所有 OpenAI / AsyncOpenAI 实例（CLI、Web、连接测试）使用同一个同步和
+    同一个异步 httpx 客户端，连接在它们之间复用，不必为每个实例重新建立
+    TCP 和 TLS 连接。连接数、keep-alive 和 HTTP/2 由 llm.http 配置，首次
+    创建时读取，配置变更后由 reconfigure 重建。
+    """
+
+    _lock = threading.Lock()
+    _sync_client: Optional[httpx.Client] = None
+    _async_client: Optional[httpx.AsyncClient] = None
+    _settings: Dict[str, Any] = {}
+
+    @classmethod
+    def _client_kwargs(cls, config: ConfigManager) -> Dict[str, Any]:
+        """根据配置生成 httpx 客户端参数（持有锁时调用）"""
+        http2 = config.is_llm_http2_enabled()
+        if http2 and importlib.util.find_spec("h2") is None:
+            LoggerManager.warning("未安装 h2，LLM 请求使用 HTTP/1.1")
+            http2 = False
+
+        cls._settings = {
+            "max_connections": config.get_llm_max_connections(),
+            "max_keepalive_connections": config.get_llm_max_keepalive_connections(),
+            "keepalive_expiry": config.get_llm_keepalive_expiry(),
+            "http2": http2,
+            "timeout": config.get_llm_timeout()
+        }
+        return {
+            "limits": httpx.Limits(
+                max_connections=cls._settings["max_connections"],
+                max_keepalive_connections=cls._settings["max_keepalive_connections"],
+                keepalive_expiry=cls._settings["keepalive_expiry"]
+            ),
+            "timeout": httpx.Timeout(cls._settings["timeout"], connect=10.0),
+            "http2": http2,
+            "follow_redirects": True
+        }
+
+    @classmethod
+    def get_sync(cls, config: Optional[ConfigManager] = None) -> httpx.Client:
+        """获取共享的同步客户端"""
+        with cls._lock:
+            if cls._sync_client is None or cls._sync_client.is_closed:
+                cls._sync_client = httpx.Client(**cls._client_kwargs(config or ConfigManager()))
+                LoggerManager.debug(f"创建共享 HTTP 连接池: {cls._settings}")
+            return cls._sync_client
+
+    @classmethod
+    def get_async(cls, config: Optional[ConfigManager] = None) -> httpx.AsyncClient:
+        """获取共享的异步客户端"""
+        with cls._lock:
+            if cls._async_client is None or cls._async_client.is_closed:
+                cls._async_client = httpx.AsyncClient(**cls._client_kwargs(config or ConfigManager()))
+                LoggerManager.debug(f"创建共享异步 HTTP 连接池: {cls._settings}")
+            return cls._async_client
+
+    @classmethod
+    def reconfigure(cls, config: ConfigManager) -> bool:
+        """按当前配置重建连接池，配置未变化时保持不变
+
+        旧客户端不主动关闭：其上进行中的请求继续完成，旧的 OpenAI 实例
+        释放后随之回收。
+
+        Returns:
+            是否重建
+        """
+        with cls._lock:
+            if cls._sync_client is None and cls._async_client is None:
+                # 尚未创建，首次获取时读取配置
+                return False
+            previous = dict(cls._settings)
+            cls._client_kwargs(config)
+            if cls._settings == previous:
+                return False
+            cls._sync_client = None
+            cls._async_client = None
+        LoggerManager.info(f"LLM HTTP 连接池配置已变更，重新创建: {cls._settings}")
+        return True
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """获取连接池配置和状态"""
+        with cls._lock:
+            return {
+                **cls._settings,
+                "sync_open": cls._sync_client is not None and not cls._sync_client.is_closed,
+                "async_open": cls._async_client is not None and not cls._async_client.is_closed
+            }
+
+    @classmethod
+    async def aclose(cls):
+        """关闭共享客户端（进程退出时调用），之后再获取会重新创建"""
+        with cls._lock:
+            sync_client, cls._sync_client = cls._sync_client, None
+            async_client, cls._async_client = cls._async_client, None
+        if sync_client is not None:
+            sync_client.close()
+        if async_client is not None:
+            await async_client.aclose()
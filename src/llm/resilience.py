@@ -0,0 +1,457 @@
+"""LLM 请求的重试、对冲请求和熔断"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Callable, Awaitable, TypeVar
+
+import openai
+
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+from src.core.exceptions import CircuitOpenError
+
+
+T = TypeVar("T")
+
+# 可以重试的 HTTP 状态码（另外所有 5xx 均可重试）
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """错误是否是可重试的临时错误（连接失败、超时、限流、服务端错误）"""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """从响应头 retry-after-ms / Retry-After 读取服务端要求的等待秒数"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # HTTP 日期格式
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """带随机抖动的指数退避
+
+    第 n 次重试前等待 [0, min(max_delay, base_delay * 2^n)] 内的随机时间，
+    避免多个请求在同一时刻重试。服务端给出 Retry-After 时按其等待；要求
+    的等待时间超过 max_delay 时不再重试。
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 20.0):
+        """初始化重试策略
+
+        Args:
+            max_retries: 最大重试次数（不含首次请求）
+            base_delay: 首次重试的退避基数（秒）
+            max_delay: 单次等待的上限（秒）
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """第 attempt 次（从 0 开始）失败后的等待秒数，不应重试时返回 None"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+
+        requested = retry_after(error)
+        if requested is not None:
+            if requested > self.max_delay:
+                return None
+            # 在服务端要求的时间之后再加少量抖动
+            return requested + random.uniform(0, self.base_delay)
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """熔断器
+
+    连续 failure_threshold 次请求失败（仅计可重试的错误）后断开，reset_timeout
+    秒内的请求直接失败，不再访问服务端；之后放行一个探测请求，成功则恢复，
+    失败或被取消则重新断开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """初始化熔断器
+
+        Args:
+            failure_threshold: 断开前的连续失败次数
+            reset_timeout: 断开后等待多少秒放行探测请求
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """请求前检查，断开时抛出 CircuitOpenError
+
+        Returns:
+            本次请求是否为半开状态下放行的探测请求
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                self._probing = False
+
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                LoggerManager.info("LLM 熔断器放行探测请求")
+                return True
+
+            self.rejected += 1
+            raise CircuitOpenError(
+                f"LLM 服务连续失败，熔断中（{max(remaining, 0):.0f} 秒后重试）"
+            )
+
+    def record_success(self):
+        """记录成功请求"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                LoggerManager.info("LLM 熔断器恢复")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """记录失败请求"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    LoggerManager.warning(
+                        f"LLM 请求连续失败 {self.failures} 次，熔断 {self.reset_timeout} 秒"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self):
+        """探测请求没有结果（被取消等）时重新断开，reset_timeout 秒后再放行探测"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probing:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "rejected": self.rejected
+            }
+
+
+class LatencyTracker:
+    """最近请求耗时的滑动窗口，用于计算对冲请求的等待时间"""
+
+    WINDOW = 200
+
+    def __init__(self, percentile: float = 95, min_samples: int = 20):
+        """初始化耗时统计
+
+        Args:
+            percentile: 请求耗时超过该百分位时发出对冲请求
+            min_samples: 样本数不足时不发对冲请求
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """记录一次成功请求的耗时"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def threshold(self) -> Optional[float]:
+        """当前的百分位耗时，样本不足时返回 None"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+
+class ResilientCaller:
+    """为 LLM 请求加上熔断、重试和对冲
+
+    每次尝试前检查熔断器；可重试的错误按 RetryPolicy 退避后重试。启用对冲
+    时，请求耗时超过最近请求耗时的百分位后再发出一个相同的请求，采用先
+    返回的结果（另一个异步请求会被取消）。对冲只用于非流式请求，会增加
+    少量请求数，默认关闭。
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        latency: Optional[LatencyTracker] = None,
+        hedge_workers: int = 8
+    ):
+        """初始化
+
+        Args:
+            retry: 重试策略，None 表示不重试
+            breaker: 熔断器，None 表示不熔断
+            latency: 耗时统计，None 表示不发对冲请求
+            hedge_workers: 同步对冲请求使用的线程数
+        """
+        self.retry = retry or RetryPolicy(max_retries=0)
+        self.breaker = breaker
+        self.latency = latency
+        self.hedge_workers = hedge_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> "ResilientCaller":
+        """根据配置创建"""
+        retry = RetryPolicy(
+            max_retries=config.get_llm_retry_max_retries(),
+            base_delay=config.get_llm_retry_base_delay(),
+            max_delay=config.get_llm_retry_max_delay()
+        )
+        breaker = None
+        if config.is_llm_circuit_breaker_enabled():
+            breaker = CircuitBreaker(
+                failure_threshold=config.get_llm_circuit_breaker_failure_threshold(),
+                reset_timeout=config.get_llm_circuit_breaker_reset_timeout()
+            )
+        latency = None
+        if config.is_llm_hedging_enabled():
+            latency = LatencyTracker(
+                percentile=config.get_llm_hedging_percentile(),
+                min_samples=config.get_llm_hedging_min_samples()
+            )
+        return cls(retry, breaker, latency, hedge_workers=config.get_llm_max_connections())
+
+    def _before_attempt(self) -> bool:
+        """尝试前检查熔断器，返回本次尝试是否为探测请求"""
+        return self.breaker.before_call() if self.breaker else False
+
+    def _after_failure(self, attempt: int, error: BaseException) -> Optional[float]:
+        """记录失败并返回重试前的等待秒数，不重试时返回 None"""
+        if self.breaker:
+            # 非临时错误（如 400、401）说明服务端可以响应，不计入熔断
+            if is_retryable(error):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        delay = self.retry.delay(attempt, error)
+        if delay is None:
+            self.failures += 1
+        else:
+            self.retries += 1
+            LoggerManager.warning(
+                f"LLM 请求失败，{delay:.2f} 秒后第 {attempt + 1} 次重试: {str(error)}"
+            )
+        return delay
+
+    def _timed(self, fn: Callable[[], T]) -> Callable[[], T]:
+        """包装请求以记录耗时"""
+        def call() -> T:
+            start = time.monotonic()
+            result = fn()
+            if self.latency:
+                self.latency.record(time.monotonic() - start)
+            return result
+        return call
+
+    def _timed_async(self, fn: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+        """包装异步请求以记录耗时"""
+        async def call() -> T:
+            start = time.monotonic()
+            result = await fn()
+            if self.latency:
+                self.latency.record(time.monotonic() - start)
+            return result
+        return call
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        """同步对冲请求的线程池"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.hedge_workers, thread_name_prefix="llm-hedge"
+                )
+            return self._executor
+
+    def _hedged(self, fn: Callable[[], T]) -> T:
+        """发出请求，超过耗时阈值仍未返回时再发出对冲请求"""
+        threshold = self.latency.threshold() if self.latency else None
+        if threshold is None:
+            return fn()
+
+        executor = self._hedge_executor()
+        primary = executor.submit(fn)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        LoggerManager.debug(f"LLM 请求超过 {threshold:.2f} 秒未返回，发出对冲请求")
+        hedge = executor.submit(fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.hedge_wins += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def _hedged_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """异步发出请求，超过耗时阈值时发出对冲请求，先返回者胜出，另一个被取消"""
+        threshold = self.latency.threshold() if self.latency else None
+        if threshold is None:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return primary.result()
+
+            self.hedges += 1
+            LoggerManager.debug(f"LLM 请求超过 {threshold:.2f} 秒未返回，发出对冲请求")
+            hedge = asyncio.ensure_future(fn())
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def call(self, fn: Callable[[], T], hedge: bool = True) -> T:
+        """同步执行请求
+
+        Args:
+            fn: 发出一次请求的函数
+            hedge: 是否允许对冲请求
+        """
+        self.calls += 1
+        fn = self._timed(fn)
+        attempt = 0
+        while True:
+            probe = self._before_attempt()
+            try:
+                result = self._hedged(fn) if hedge else fn()
+            except Exception as e:
+                delay = self._after_failure(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # 被中断的探测请求没有结果，释放探测，否则熔断器一直停在半开状态
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            if self.breaker:
+                self.breaker.record_success()
+            return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """异步执行请求
+
+        Args:
+            fn: 发出一次请求的协程函数
+            hedge: 是否允许对冲请求（流式请求应为 False）
+        """
+        self.calls += 1
+        fn = self._timed_async(fn)
+        attempt = 0
+        while True:
+            probe = self._before_attempt()
+            try:
+                result = await (self._hedged_async(fn) if hedge else fn())
+            except Exception as e:
+                delay = self._after_failure(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # 被取消的探测请求没有结果，释放探测，否则熔断器一直停在半开状态
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            if self.breaker:
+                self.breaker.record_success()
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取重试、对冲和熔断统计"""
+        threshold = self.latency.threshold() if self.latency else None
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "max_retries": self.retry.max_retries,
+            "hedging_enabled": self.latency is not None,
+            "hedge_threshold": round(threshold, 3) if threshold is not None else None,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "circuit_breaker": self.breaker.get_stats() if self.breaker else None
+        }
@@ -0,0 +1,279 @@
+"""崩溃分析提示压缩"""
+
+import re
+from typing import List, Optional, Set, Tuple
+
+from src.windbg.parser import OutputParser
+from src.core.logger import LoggerManager
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数
+
+    不依赖具体模型的分词器：ASCII 字符约 4 个一个 token，非 ASCII 字符
+    （中文注释、路径等）按每字符一个 token 计算。UTF-8 编码后多出的字节数
+    用来估算非 ASCII 字符数，不必逐字符遍历大段输出。
+    """
+    chars = len(text)
+    non_ascii = (len(text.encode('utf-8')) - chars) // 2
+    return (chars - non_ascii) // 4 + non_ascii + 1
+
+
+class PromptCompactor:
+    """把 WinDBG 输出压缩到 token 预算内
+
+    输出未超出预算时原样返回。超出时借助 OutputParser 按重要程度依次保留：
+    异常记录、出错线程的调用栈（去掉重复栈帧）、调用栈引用到的模块，
+    剩余预算再放入规范化后的其余输出。
+    """
+
+    # 异常记录及 !analyze 的关键字段
+    KEY_LINE_PATTERN = re.compile(
+        r'^\s*(ExceptionAddress|ExceptionCode|ExceptionFlags|NumberParameters|Parameter\[\d+\]|'
+        r'Attempt to|\([0-9a-fA-F]+\.[0-9a-fA-F]+\):|'
+        r'[A-Z0-9_]*(EXCEPTION|FAILURE|BUGCHECK|FAULTING|PROCESS_NAME|MODULE_NAME|IMAGE_NAME|'
+        r'SYMBOL_NAME|ERROR_CODE|READ_ADDRESS|WRITE_ADDRESS)[A-Z0-9_]*:)'
+    )
+
+    # k 系列命令栈帧行开头的帧序号（规范化后地址已替换为 <addr>）
+    FRAME_NUMBER_PATTERN = re.compile(r'^[0-9a-fA-F]{2,4} (?=<addr>)')
+
+    # lm 输出中的模块行（起始地址、结束地址、模块名）
+    MODULE_LINE_PATTERN = re.compile(r'^\s*[0-9a-fA-F`]{8,17}\s+[0-9a-fA-F`]{8,17}\s+(\S+)')
+
+    def __init__(self, token_budget: int, parser: Optional[OutputParser] = None):
+        """初始化压缩器
+
+        Args:
+            token_budget: WinDBG 输出部分的 token 预算
+            parser: 输出解析器
+        """
+        self.token_budget = token_budget
+        self.parser = parser or OutputParser()
+
+    def compact(self, raw_output: str) -> str:
+        """压缩输出，未超出预算时原样返回"""
+        original_tokens = estimate_tokens(raw_output)
+        if original_tokens <= self.token_budget:
+            return raw_output
+
+        stack_output = self.parser.faulting_thread_output(raw_output)
+        frames = self._dedupe_frames(stack_output)
+        referenced_modules = {frame[0].lower() for frame, _ in frames}
+
+        sections = [
+            ("异常记录", self.key_lines(raw_output)),
+            ("出错线程调用栈", [self._format_frame(frame, count) for frame, count in frames]),
+            ("相关模块", self._module_lines(raw_output, referenced_modules)),
+        ]
+
+        remaining = self.token_budget
+        parts = []
+        emitted: List[str] = []
+
+        for title, lines in sections:
+            if not lines:
+                continue
+            text, used = self._take_lines(title, lines, remaining)
+            if not text:
+                break
+            parts.append(text)
+            emitted.extend(lines)
+            remaining -= used
+
+        # 剩余预算放入规范化后的其余输出：地址替换为占位符后，各线程相同的
+        # 调用栈等重复行只保留一份，已经放入的行也不再重复
+        if remaining > 0:
+            seen = set(self.parser.normalize_output('\n'.join(emitted)).split('\n'))
+            rest = []
+            for line in self.parser.normalize_output(raw_output).split('\n'):
+                key = self.FRAME_NUMBER_PATTERN.sub('', line)
+                if key not in seen:
+                    seen.add(key)
+                    rest.append(line)
+            text, _ = self._take_lines("其他输出", rest, remaining)
+            if text:
+                parts.append(text)
+
+        compacted = '\n\n'.join(parts)
+        LoggerManager.debug(
+            f"压缩 WinDBG 输出: 约 {original_tokens} -> {estimate_tokens(compacted)} tokens，"
+            f"{len(frames)} 个栈帧，{len(referenced_modules)} 个相关模块"
+        )
+        return compacted
+
+    def key_lines(self, output: str) -> List[str]:
+        """提取异常记录和关键字段行（去重）"""
+        lines = []
+        seen = set()
+        for line in output.split('\n'):
+            if self.KEY_LINE_PATTERN.match(line):
+                stripped = line.strip()
+                if stripped not in seen:
+                    seen.add(stripped)
+                    lines.append(stripped)
+        return lines
+
+    def _dedupe_frames(self, output: str) -> List[Tuple[Tuple[str, str, str, str], int]]:
+        """解析栈帧并去重，返回 (栈帧, 出现次数) 列表，保持首次出现的顺序
+
+        递归调用和 !analyze 中重复出现的栈（STACK_TEXT、kv）只保留一份。
+        """
+        counts = {}
+        for frame in self.parser.parse_stack_trace(output):
+            source = f" [{frame.source_file} @ {frame.line_number}]" if frame.source_file else ""
+            key = (frame.module, frame.function, frame.offset, source)
+            counts[key] = counts.get(key, 0) + 1
+        return list(counts.items())
+
+    @staticmethod
+    def _format_frame(frame: Tuple[str, str, str, str], count: int) -> str:
+        """格式化栈帧（不含地址）"""
+        module, function, offset, source = frame
+        text = f"{module}!{function}+{offset}{source}"
+        return f"{text} (重复 {count} 次)" if count > 1 else text
+
+    def _module_lines(self, output: str, referenced: Set[str]) -> List[str]:
+        """保留调用栈引用到的模块的 lm 行（lmv 的缩进详情行一并保留）"""
+        lines = []
+        keep = False
+        for line in output.split('\n'):
+            match = self.MODULE_LINE_PATTERN.match(line)
+            if match:
+                keep = match.group(1).lower() in referenced
+                if keep:
+                    lines.append(line.strip())
+            elif keep and line.startswith((' ', '\t')) and line.strip():
+                lines.append('  ' + line.strip())
+            else:
+                keep = False
+        return lines
+
+    @staticmethod
+    def _take_lines(title: str, lines: List[str], budget: int) -> Tuple[str, int]:
+        """在预算内尽量多地放入行，返回 (文本, 使用的 token 数)"""
+        header = f"[{title}]"
+        used = estimate_tokens(header)
+        if used >= budget:
+            return "", 0
+
+        taken = [header]
+        for index, line in enumerate(lines):
+            cost = estimate_tokens(line)
+            if used + cost > budget:
+                taken.append(f"... (省略 {len(lines) - index} 行)")
+                break
+            taken.append(line)
+            used += cost
+        return '\n'.join(taken), used
+
+
+class OutputChunker:
+    """按结构边界把超长 WinDBG 输出分段
+
+    在线程标题（~* k）、模块行（lm）和命令提示符处分块，调用栈完全相同的
+    线程只保留一个并注明线程数，再把块依次装入不超过 chunk_tokens 的分段；
+    单个块超出上限时按行拆分。
+    """
+
+    # 命令提示符行，例如 0:000> ~* kb
+    PROMPT_LINE_PATTERN = re.compile(r'^\s*\d+:\d+(:[\w-]+)?>\s')
+
+    def __init__(self, chunk_tokens: int, parser: Optional[OutputParser] = None):
+        """初始化分段器"""
+        self.chunk_tokens = chunk_tokens
+        self.parser = parser or OutputParser()
+
+    def split(self, raw_output: str) -> List[str]:
+        """把输出分为多段"""
+        blocks = self._merge_identical_threads(self._blocks(raw_output))
+
+        chunks = []
+        current: List[str] = []
+        current_tokens = 0
+        for block in blocks:
+            for piece in self._split_block(block):
+                cost = estimate_tokens(piece)
+                if current and current_tokens + cost > self.chunk_tokens:
+                    chunks.append('\n'.join(current))
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += cost
+        if current:
+            chunks.append('\n'.join(current))
+        return chunks
+
+    def _is_boundary(self, line: str) -> bool:
+        """是否是新块的开始"""
+        return bool(
+            self.parser.thread_header_pattern.match(line)
+            or PromptCompactor.MODULE_LINE_PATTERN.match(line)
+            or self.PROMPT_LINE_PATTERN.match(line)
+        )
+
+    def _blocks(self, output: str) -> List[str]:
+        """在结构边界处分块"""
+        blocks = []
+        current: List[str] = []
+        for line in output.split('\n'):
+            if current and self._is_boundary(line):
+                blocks.append('\n'.join(current))
+                current = []
+            current.append(line)
+        if current:
+            blocks.append('\n'.join(current))
+        return blocks
+
+    def _merge_identical_threads(self, blocks: List[str]) -> List[str]:
+        """调用栈相同的线程只保留第一个，并注明相同的线程数
+
+        上千个线程的进程中大多数线程停在相同的等待函数上，合并后分段数
+        通常会减少一个数量级。发生异常的线程（标记为 #）不参与合并。
+        """
+        merged: List[str] = []
+        first_index = {}
+        duplicates = {}
+
+        for block in blocks:
+            header, _, body = block.partition('\n')
+            match = self.parser.thread_header_pattern.match(header)
+            if not match or match.group(1) == '#' or not body.strip():
+                merged.append(block)
+                continue
+
+            key = '\n'.join(
+                PromptCompactor.FRAME_NUMBER_PATTERN.sub('', line)
+                for line in self.parser.normalize_output(body).split('\n')
+            )
+            if key in first_index:
+                duplicates[key] += 1
+                continue
+            first_index[key] = len(merged)
+            duplicates[key] = 0
+            merged.append(block)
+
+        for key, index in first_index.items():
+            if duplicates[key]:
+                header, _, body = merged[index].partition('\n')
+                merged[index] = f"{header}\n(另有 {duplicates[key]} 个线程的调用栈与此相同)\n{body}"
+
+        return merged
+
+    def _split_block(self, block: str) -> List[str]:
+        """单个块超出分段上限时按行拆分"""
+        if estimate_tokens(block) <= self.chunk_tokens:
+            return [block]
+
+        pieces = []
+        current: List[str] = []
+        current_tokens = 0
+        for line in block.split('\n'):
+            cost = estimate_tokens(line)
+            if current and current_tokens + cost > self.chunk_tokens:
+                pieces.append('\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += cost
+        if current:
+            pieces.append('\n'.join(current))
+        return pieces
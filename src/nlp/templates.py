@@ -1,6 +1,8 @@
 """LLM 提示模板"""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from src.nlp.compaction import PromptCompactor
 
 
 class PromptTemplates:
@@ -129,6 +131,22 @@ WinDBG 输出:
 }}
 
 请确保 JSON 格式完整且有效，所有字符串值都必须用双引号包裹。
+"""
+
+    CHUNK_SUMMARY_TEMPLATE = """
+你是一个专业的 Windows 崩溃分析专家。WinDBG 输出过长，已按线程、模块等结构分为 {total} 段，以下是第 {index} 段。
+
+执行的命令: {command}
+
+已知的异常信息:
+{context}
+
+第 {index} 段输出:
+{chunk}
+
+请只摘录与崩溃分析相关的内容：异常记录、出错或可疑的线程及其关键栈帧（保留 模块!函数+偏移）、
+可疑模块、锁等待或死锁迹象、堆损坏等异常数据。用简洁的纯文本回答，不超过 300 字。
+如果这一段没有相关内容，只回答: 无
 """
 
     STACK_ANALYSIS_TEMPLATE = """
@@ -188,13 +206,30 @@ WinDBG 输出:
         )
 
     @classmethod
-    def format_crash_analysis(cls, command: str, raw_output: str) -> str:
-        """格式化崩溃分析提示"""
+    def format_crash_analysis(cls, command: str, raw_output: str, token_budget: Optional[int] = None) -> str:
+        """格式化崩溃分析提示
+
+        指定 token_budget 时，超出预算的输出先压缩为异常记录、出错线程调用栈
+        和相关模块。
+        """
+        if token_budget:
+            raw_output = PromptCompactor(token_budget).compact(raw_output)
         return cls.CRASH_ANALYSIS_TEMPLATE.format(
             command=command,
             raw_output=raw_output
         )
 
+    @classmethod
+    def format_chunk_summary(cls, command: str, index: int, total: int, context: str, chunk: str) -> str:
+        """格式化分段摘要提示"""
+        return cls.CHUNK_SUMMARY_TEMPLATE.format(
+            command=command,
+            index=index,
+            total=total,
+            context=context or "无",
+            chunk=chunk
+        )
+
     @classmethod
     def format_stack_analysis(cls, stack_trace: str) -> str:
         """格式化调用栈分析提示"""
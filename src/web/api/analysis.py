@@ -1,11 +1,14 @@
 """智能分析 API"""
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel
 from typing import Optional
 
 from src.core.logger import LoggerManager
-from src.core.exceptions import AnalysisError, LLMError
+from src.core.exceptions import AnalysisError, AnalysisQueueFullError, LLMError
+from src.windbg.result_cache import dump_identity
+from src.web.api.session import resolve_dump_file
 
 
 router = APIRouter()
@@ -15,6 +18,7 @@ class AnalyzeRequest(BaseModel):
     """分析请求"""
     raw_output: str
     command: str
+    dump_file: Optional[str] = None
 
 
 class AnalyzeResponse(BaseModel):
@@ -35,6 +39,7 @@ class AnalyzeAsyncRequest(BaseModel):
     command: str
     use_cache: bool = True
     streaming: bool = False
+    dump_file: Optional[str] = None
 
 
 class AnalyzeAsyncResponse(BaseModel):
@@ -52,6 +57,9 @@ class TaskStatusResponse(BaseModel):
     result: Optional[dict] = None
     error: Optional[str] = None
     thinking_history: list = []
+    thinking_dropped: int = 0
+    seq: int = 0
+    queue_position: Optional[int] = None
 
 
 @router.post("/report", response_model=AnalyzeResponse)
@@ -62,24 +70,31 @@ async def get_analysis_report(
     """获取智能分析报告（同步方式）"""
     analyzer = req.app.state.analyzer
     ws_manager = req.app.state.ws_manager
+    dump_file = resolve_dump_file(req, request.dump_file)
     
     try:
-        # 检查 LLM 是否可用
-        if not analyzer.client.is_available():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="LLM 不可用"
-            )
-        
-        # 执行分析
-        report = analyzer.analyze_output(request.raw_output, request.command)
+        # 执行分析（同步 LLM 调用放到线程中，不阻塞事件循环）。缓存、崩溃分桶
+        # 和规则分析不需要 LLM，都未命中且 LLM 不可用时抛出 AnalysisError
+        report = await asyncio.to_thread(
+            analyzer.analyze_output, request.raw_output, request.command, True, dump_file
+        )
         
         # 通知 WebSocket 客户端
         await ws_manager.broadcast_output({
             "type": "analysis_report",
-            "report": report.to_dict()
+            "report": report.to_dict(),
+            "dump_file": dump_file
         })
         
+        # 保存到转储文件的分析产物
+        artifact_store = req.app.state.artifact_store
+        if artifact_store and dump_file:
+            try:
+                dump_id = await asyncio.to_thread(dump_identity, dump_file)
+                await asyncio.to_thread(artifact_store.save_report, dump_id, report, dump_file)
+            except OSError as e:
+                LoggerManager.warning(f"保存分析报告失败: {str(e)}")
+        
         LoggerManager.info("智能分析完成")
         return AnalyzeResponse(
             summary=report.summary,
@@ -92,6 +107,8 @@ async def get_analysis_report(
             confidence=report.confidence
         )
     
+    except HTTPException:
+        raise
     except LLMError as e:
         LoggerManager.error(f"LLM 调用错误: {str(e)}")
         raise HTTPException(
@@ -119,27 +136,25 @@ async def analyze_async(
 ):
     """异步分析 WinDBG 输出"""
     async_analysis_service = req.app.state.async_analysis_service
+    # 未指定转储文件时，默认属于当前会话加载的转储
+    dump_file = resolve_dump_file(req, request.dump_file)
     
     try:
-        # 检查 LLM 是否可用
-        if not async_analysis_service.analyzer.client.is_available():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="LLM 不可用"
-            )
-        
-        # 创建异步分析任务
+        # 创建异步分析任务（缓存、崩溃分桶和规则分析不需要 LLM，都未命中且
+        # LLM 不可用时任务失败）
         if request.streaming:
             task_id = await async_analysis_service.analyze_streaming(
                 request.raw_output,
                 request.command,
-                request.use_cache
+                request.use_cache,
+                dump_file
             )
         else:
             task_id = await async_analysis_service.analyze_async(
                 request.raw_output,
                 request.command,
-                request.use_cache
+                request.use_cache,
+                dump_file
             )
         
         return AnalyzeAsyncResponse(
@@ -147,6 +162,14 @@ async def analyze_async(
             message="分析任务已创建"
         )
     
+    except HTTPException:
+        raise
+    except AnalysisQueueFullError as e:
+        LoggerManager.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
     except LLMError as e:
         LoggerManager.error(f"LLM 调用错误: {str(e)}")
         raise HTTPException(
@@ -161,16 +184,27 @@ async def analyze_async(
         )
 
 
+@router.get("/queue")
+async def get_analysis_queue(req: Request):
+    """获取分析队列状态（运行中、排队中的任务数）"""
+    async_analysis_service = req.app.state.async_analysis_service
+    return await async_analysis_service.get_queue_status()
+
+
 @router.get("/task/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(
     task_id: str,
-    req: Request
+    req: Request,
+    since: Optional[int] = None
 ):
-    """获取任务状态"""
+    """获取任务状态
+    
+    传入上次响应中的 seq 作为 since，只返回之后新增的思考内容。
+    """
     async_analysis_service = req.app.state.async_analysis_service
     
     try:
-        task_status = await async_analysis_service.get_task_status(task_id)
+        task_status = await async_analysis_service.get_task_status(task_id, since)
         
         if not task_status:
             raise HTTPException(
@@ -223,6 +257,47 @@ async def cancel_task(
         )
 
 
+@router.get("/cache/stats")
+async def get_analysis_cache_stats(req: Request):
+    """获取分析缓存统计（命中、未命中、淘汰数）"""
+    analyzer = req.app.state.analyzer
+    if analyzer.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **analyzer.cache.get_stats()}
+
+
+@router.get("/stats")
+async def get_analysis_stats(req: Request):
+    """获取分析统计（LLM 调用次数，因缓存、崩溃分桶、规则分析、合并请求而省去的次数）"""
+    return req.app.state.analyzer.get_stats()
+
+
+@router.get("/buckets")
+async def list_crash_buckets(req: Request, limit: int = 100):
+    """列出崩溃分桶及每个桶的转储数、出现次数"""
+    bucket_index = req.app.state.analyzer.bucket_index
+    if bucket_index is None:
+        return {"enabled": False, "buckets": []}
+    
+    buckets = await asyncio.to_thread(bucket_index.list_buckets, limit)
+    stats = await asyncio.to_thread(bucket_index.get_stats)
+    return {"enabled": True, **stats, "buckets": buckets}
+
+
+@router.get("/buckets/{signature}")
+async def get_crash_bucket(signature: str, req: Request):
+    """获取崩溃分桶详情（栈帧、转储列表和分析报告）"""
+    bucket_index = req.app.state.analyzer.bucket_index
+    bucket = await asyncio.to_thread(bucket_index.get_bucket, signature) if bucket_index else None
+    
+    if not bucket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"崩溃分桶不存在: {signature}"
+        )
+    return bucket
+
+
 @router.post("/clear-cache")
 async def clear_analysis_cache(req: Request):
     """清空分析缓存"""
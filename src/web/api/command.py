@@ -2,12 +2,13 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 from src.core.logger import LoggerManager
-from src.core.exceptions import CommandExecutionError
+from src.core.exceptions import CommandExecutionError, SessionError
 from src.nlp.processor import NLPProcessor
 from src.core.session import SessionState
+from src.web.api.session import validate_file_path
 
 
 router = APIRouter()
@@ -17,6 +18,9 @@ class ExecuteCommandRequest(BaseModel):
     """执行命令请求"""
     command: str
     mode: Optional[str] = "smart"
+    dump_file: Optional[str] = None
+    # 排队截止时间（秒），超时仍未开始执行则失败
+    timeout: Optional[float] = None
 
 
 class ExecuteCommandResponse(BaseModel):
@@ -27,6 +31,20 @@ class ExecuteCommandResponse(BaseModel):
     error: Optional[str] = None
 
 
+class BatchCommandRequest(BaseModel):
+    """批量执行命令请求"""
+    commands: List[str]
+    mode: Optional[str] = "smart"
+    dump_file: Optional[str] = None
+    timeout: Optional[float] = None
+
+
+class BatchCommandResponse(BaseModel):
+    """批量执行命令响应"""
+    success: bool
+    results: List[ExecuteCommandResponse]
+
+
 class NaturalLanguageRequest(BaseModel):
     """自然语言请求"""
     input: str
@@ -40,13 +58,15 @@ async def execute_command(
 ):
     """执行 WinDBG 命令"""
     session_manager = req.app.state.session_manager
-    windbg_engine = req.app.state.windbg_engine
-    executor = req.app.state.executor
+    engine_facade = req.app.state.engine_facade
     ws_manager = req.app.state.ws_manager
     
+    if request.dump_file:
+        return await _execute_pooled_command(request, req)
+    
     try:
         # 检查是否已加载转储文件
-        if not windbg_engine.is_dump_loaded():
+        if not engine_facade.is_dump_loaded():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="请先加载转储文件"
@@ -55,8 +75,8 @@ async def execute_command(
         # 设置会话状态
         session_manager.set_state(SessionState.ANALYZING)
         
-        # 执行命令
-        result = executor.execute(request.command)
+        # 执行命令（在线程池中执行，不阻塞事件循环）
+        result = await engine_facade.execute(request.command, request.timeout)
         
         # 添加到历史
         session_manager.add_command(request.command)
@@ -68,7 +88,8 @@ async def execute_command(
             "command": request.command,
             "output": result.output,
             "success": result.success,
-            "mode": request.mode
+            "mode": request.mode,
+            "dump_file": session_manager.dump_file
         })
         
         # 恢复会话状态
@@ -100,6 +121,150 @@ async def execute_command(
         )
 
 
+async def _execute_pooled_command(request: ExecuteCommandRequest, req: Request) -> ExecuteCommandResponse:
+    """在会话池中针对指定转储文件执行命令"""
+    engine_facade = req.app.state.engine_facade
+    ws_manager = req.app.state.ws_manager
+    
+    if engine_facade.debugger_pool is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="会话池不可用"
+        )
+    
+    is_valid, error_msg = validate_file_path(request.dump_file)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    
+    try:
+        result = await engine_facade.execute_pooled(request.dump_file, request.command)
+        
+        await ws_manager.broadcast_output({
+            "type": "command_output",
+            "command": request.command,
+            "output": result.output,
+            "success": result.success,
+            "mode": request.mode,
+            "dump_file": request.dump_file
+        })
+        
+        LoggerManager.info(f"会话池命令执行成功: {request.dump_file} -> {request.command}")
+        return ExecuteCommandResponse(
+            success=result.success,
+            output=result.output,
+            command=request.command,
+            error=result.error if not result.success else None
+        )
+    
+    except (CommandExecutionError, SessionError) as e:
+        LoggerManager.error(f"会话池命令执行错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        LoggerManager.error(f"会话池命令执行异常: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"执行命令时发生错误: {str(e)}"
+        )
+
+
+@router.post("/batch", response_model=BatchCommandResponse)
+async def execute_batch(
+    request: BatchCommandRequest,
+    req: Request
+):
+    """批量执行 WinDBG 命令（一次流水线写入）"""
+    session_manager = req.app.state.session_manager
+    engine_facade = req.app.state.engine_facade
+    ws_manager = req.app.state.ws_manager
+    
+    commands = [command.strip() for command in request.commands if command.strip()]
+    if not commands:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="命令列表为空"
+        )
+    
+    try:
+        if request.dump_file:
+            if engine_facade.debugger_pool is None:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="会话池不可用"
+                )
+            is_valid, error_msg = validate_file_path(request.dump_file)
+            if not is_valid:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=error_msg
+                )
+            results = await engine_facade.execute_pooled_batch(request.dump_file, commands)
+        else:
+            if not engine_facade.is_dump_loaded():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="请先加载转储文件"
+                )
+            
+            session_manager.set_state(SessionState.ANALYZING)
+            results = await engine_facade.execute_batch(commands, request.timeout)
+            
+            for result in results:
+                session_manager.add_command(result.command)
+                session_manager.add_output(result.output, result.command, request.mode)
+            
+            session_manager.set_state(SessionState.READY)
+        
+        # 通知 WebSocket 客户端
+        for result in results:
+            await ws_manager.broadcast_output({
+                "type": "command_output",
+                "command": result.command,
+                "output": result.output,
+                "success": result.success,
+                "mode": request.mode,
+                "dump_file": request.dump_file or session_manager.dump_file
+            })
+        
+        LoggerManager.info(f"批量命令执行完成: {len(results)} 条")
+        return BatchCommandResponse(
+            success=all(result.success for result in results),
+            results=[
+                ExecuteCommandResponse(
+                    success=result.success,
+                    output=result.output,
+                    command=result.command,
+                    error=result.error if not result.success else None
+                )
+                for result in results
+            ]
+        )
+    
+    except HTTPException:
+        raise
+    except (CommandExecutionError, SessionError) as e:
+        if not request.dump_file:
+            session_manager.set_state(SessionState.ERROR)
+        LoggerManager.error(f"批量命令执行错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        if not request.dump_file:
+            session_manager.set_state(SessionState.ERROR)
+        LoggerManager.error(f"批量命令执行异常: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量执行命令时发生错误: {str(e)}"
+        )
+
+
 @router.post("/natural", response_model=ExecuteCommandResponse)
 async def execute_natural_language(
     request: NaturalLanguageRequest,
@@ -107,14 +272,13 @@ async def execute_natural_language(
 ):
     """执行自然语言命令"""
     session_manager = req.app.state.session_manager
-    windbg_engine = req.app.state.windbg_engine
-    executor = req.app.state.executor
+    engine_facade = req.app.state.engine_facade
     nlp_processor = req.app.state.nlp_processor
     ws_manager = req.app.state.ws_manager
     
     try:
         # 检查是否已加载转储文件
-        if not windbg_engine.is_dump_loaded():
+        if not engine_facade.is_dump_loaded():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="请先加载转储文件"
@@ -130,8 +294,8 @@ async def execute_natural_language(
         # 设置会话状态
         session_manager.set_state(SessionState.ANALYZING)
         
-        # 执行命令
-        result = executor.execute(command)
+        # 执行命令（在线程池中执行，不阻塞事件循环）
+        result = await engine_facade.execute(command)
         
         # 添加到历史
         session_manager.add_command(request.input)
@@ -145,7 +309,8 @@ async def execute_natural_language(
             "output": result.output,
             "success": result.success,
             "confidence": confidence,
-            "mode": request.mode
+            "mode": request.mode,
+            "dump_file": session_manager.dump_file
         })
         
         # 恢复会话状态
@@ -165,3 +330,34 @@ async def execute_natural_language(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"处理自然语言时发生错误: {str(e)}"
         )
+
+
+@router.get("/queue")
+async def get_command_queue(req: Request):
+    """获取共享会话的命令队列与调度指标（队列深度、等待时间）"""
+    engine_facade = req.app.state.engine_facade
+    
+    try:
+        return engine_facade.get_scheduler_metrics()
+    except Exception as e:
+        LoggerManager.error(f"获取命令队列错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取命令队列失败: {str(e)}"
+        )
+
+
+@router.post("/queue/{ticket_id}/cancel")
+async def cancel_queued_command(ticket_id: int, req: Request):
+    """取消排队中的命令（已开始执行的命令无法取消）"""
+    engine_facade = req.app.state.engine_facade
+    
+    if not engine_facade.cancel_queued(ticket_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"排队中的命令不存在: {ticket_id}"
+        )
+    return {
+        "success": True,
+        "message": "命令已取消"
+    }
@@ -4,9 +4,11 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 from typing import Optional
 from openai import OpenAI
+import asyncio
 import time
 
 from src.core.logger import LoggerManager
+from src.llm.http_pool import HttpClientPool
 
 
 router = APIRouter()
@@ -80,7 +82,9 @@ async def get_llm_status(req: Request):
         return {
             "available": llm_client.is_available(),
             "provider": llm_client.config.get_llm_provider(),
-            "model": llm_client.config.get_llm_model()
+            "model": llm_client.config.get_llm_model(),
+            "http_pool": HttpClientPool.get_stats(),
+            "resilience": llm_client.get_stats()
         }
     except Exception as e:
         LoggerManager.error(f"获取 LLM 状态错误: {str(e)}")
@@ -94,8 +98,9 @@ async def get_llm_status(req: Request):
 async def get_windbg_status(req: Request):
     """获取 WinDBG 状态"""
     windbg_engine = req.app.state.windbg_engine
+    engine_facade = req.app.state.engine_facade
     try:
-        session_info = windbg_engine.get_session_info()
+        session_info = engine_facade.get_session_info() if engine_facade else windbg_engine.get_session_info()
         return {
             "available": windbg_engine.is_available(),
             "path": windbg_engine.windbg_path,
@@ -162,8 +167,8 @@ async def update_llm_config(req: Request, request: LLMConfigUpdateRequest):
         # 重新加载配置
         config._load_config()
 
-        # 重新初始化 LLM 客户端
-        llm_client._setup_client()
+        # 重新初始化 LLM 客户端（连接池、重试和熔断策略按新配置重建）
+        llm_client.reload()
 
         return {"message": "配置已保存"}
     except Exception as e:
@@ -175,7 +180,7 @@ async def update_llm_config(req: Request, request: LLMConfigUpdateRequest):
 
 
 @router.post("/llm/test")
-async def test_llm_connection(request: LLMConfigUpdateRequest):
+async def test_llm_connection(req: Request, request: LLMConfigUpdateRequest):
     """测试 LLM 连接"""
     try:
         start_time = time.time()
@@ -199,10 +204,12 @@ async def test_llm_connection(request: LLMConfigUpdateRequest):
         elif request.provider == "deepseek":
             client_kwargs["base_url"] = request.base_url or "https://api.deepseek.com"
 
-        client = OpenAI(**client_kwargs)
+        # 临时客户端同样使用共享连接池，测试时建立的连接可被后续请求复用
+        client = OpenAI(**client_kwargs, http_client=HttpClientPool.get_sync(req.app.state.config))
 
-        # 发送测试请求
-        response = client.chat.completions.create(
+        # 发送测试请求（同步调用放到线程中，不阻塞事件循环）
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
             model=request.model,
             messages=[{"role": "user", "content": "Hello"}],
             max_tokens=10
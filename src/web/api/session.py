@@ -1,5 +1,6 @@
 """会话管理 API"""
 
+import asyncio
 import re
 from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, status, Request
@@ -9,6 +10,7 @@ from typing import Optional
 from src.core.logger import LoggerManager
 from src.core.exceptions import DumpLoadError, WinDBGError
 from src.core.session import SessionState
+from src.windbg.result_cache import dump_identity
 
 
 router = APIRouter()
@@ -80,6 +82,28 @@ def validate_file_path(filepath: str) -> tuple[bool, Optional[str]]:
     return True, None
 
 
+def resolve_dump_file(req: Request, dump_file: Optional[str]) -> Optional[str]:
+    """确定请求针对的转储文件
+
+    未指定时使用会话已加载的转储；客户端指定的路径与加载转储一样经过
+    validate_file_path 检查，避免服务端读取并计算任意文件的标识。
+
+    Raises:
+        HTTPException: 指定的路径无效
+    """
+    if not dump_file:
+        return req.app.state.session_manager.dump_file
+
+    is_valid, error_msg = validate_file_path(dump_file)
+    if not is_valid:
+        LoggerManager.warning(f"文件路径验证失败: {error_msg}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    return dump_file
+
+
 @router.post("/load", response_model=dict)
 async def load_dump(
     request: LoadDumpRequest,
@@ -87,7 +111,7 @@ async def load_dump(
 ):
     """加载转储文件"""
     session_manager = req.app.state.session_manager
-    windbg_engine = req.app.state.windbg_engine
+    engine_facade = req.app.state.engine_facade
     ws_manager = req.app.state.ws_manager
     
     try:
@@ -103,7 +127,7 @@ async def load_dump(
         
         LoggerManager.info(f"文件路径验证通过: {request.filepath}")
         
-        if not windbg_engine.is_available():
+        if not engine_facade.is_available():
             LoggerManager.error("WinDBG 不可用")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -113,14 +137,16 @@ async def load_dump(
         session_manager.set_state(SessionState.LOADING)
         LoggerManager.info(f"开始加载转储文件: {request.filepath}")
         
-        success = windbg_engine.load_dump(request.filepath)
+        # 加载转储文件可能耗时较长，在线程池中执行，不阻塞事件循环
+        success = await engine_facade.load_dump(request.filepath)
         
         if success:
             session_manager.load_dump(request.filepath)
             session_manager.dump_loaded()
             
-            if windbg_engine._process:
-                session_manager.set_session_active(True, windbg_engine._process.pid)
+            session_pid = engine_facade.get_session_pid()
+            if session_pid:
+                session_manager.set_session_active(True, session_pid)
             
             await ws_manager.broadcast_session_update({
                 "type": "session_loaded",
@@ -192,18 +218,20 @@ async def get_session_status(req: Request):
 async def close_session(req: Request):
     """关闭会话"""
     session_manager = req.app.state.session_manager
-    windbg_engine = req.app.state.windbg_engine
+    engine_facade = req.app.state.engine_facade
     ws_manager = req.app.state.ws_manager
     
     try:
         LoggerManager.info("收到关闭会话请求")
-        windbg_engine.close()
+        dump_file = session_manager.dump_file
+        await engine_facade.close()
         session_manager.set_session_active(False, None)
         session_manager.reset()
         
         await ws_manager.broadcast_session_update({
             "type": "session_closed",
-            "state": "idle"
+            "state": "idle",
+            "dump_file": dump_file
         })
         
         LoggerManager.info("会话已关闭")
@@ -236,3 +264,64 @@ async def get_command_history(req: Request):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"获取命令历史失败: {str(e)}"
         )
+
+
+@router.get("/pool")
+async def get_pool_status(req: Request):
+    """获取 cdb 会话池状态"""
+    debugger_pool = req.app.state.debugger_pool
+    
+    try:
+        if debugger_pool is None:
+            return {
+                "max_size": 0,
+                "size": 0,
+                "sessions": []
+            }
+        return debugger_pool.get_pool_info()
+    except Exception as e:
+        LoggerManager.error(f"获取会话池状态错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取会话池状态失败: {str(e)}"
+        )
+
+
+@router.get("/artifacts")
+async def get_dump_artifacts(req: Request, dump_file: Optional[str] = None):
+    """获取转储文件已保存的分析产物（命令输出列表与分析报告）"""
+    artifact_store = req.app.state.artifact_store
+    dump_file = resolve_dump_file(req, dump_file)
+    
+    if artifact_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="分析产物存储未启用"
+        )
+    if not dump_file:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="未指定转储文件"
+        )
+    
+    try:
+        dump_id = await asyncio.to_thread(dump_identity, dump_file)
+        commands = await asyncio.to_thread(artifact_store.list_commands, dump_id)
+        report = await asyncio.to_thread(artifact_store.get_report, dump_id)
+        return {
+            "dump_file": dump_file,
+            "dump_id": dump_id,
+            "commands": commands,
+            "report": report.to_dict() if report else None
+        }
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"无法读取转储文件: {str(e)}"
+        )
+    except Exception as e:
+        LoggerManager.error(f"获取分析产物错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取分析产物失败: {str(e)}"
+        )
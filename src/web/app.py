@@ -1,5 +1,6 @@
 """FastAPI 应用主入口"""
 
+import asyncio
 from pathlib import Path
 from typing import Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -13,6 +14,9 @@ from src.core.exceptions import ConfigError
 from src.web.api import session, command, analysis, config as config_api
 from src.web.websocket.manager import WebSocketManager
 from src.web.services.async_analysis_service import AsyncAnalysisService
+from src.windbg.facade import AsyncEngineFacade
+from src.web.websocket.streamer import OutputStreamer
+from src.llm.http_pool import HttpClientPool
 
 
 def create_app(
@@ -22,7 +26,9 @@ def create_app(
     llm_client=None,
     analyzer=None,
     executor=None,
-    nlp_processor=None
+    nlp_processor=None,
+    debugger_pool=None,
+    artifact_store=None
 ) -> FastAPI:
     """创建 FastAPI 应用"""
     
@@ -44,10 +50,40 @@ def create_app(
     )
     
     # WebSocket 管理器
-    ws_manager = WebSocketManager()
+    ws_manager = WebSocketManager(
+        queue_size=app_config.get_websocket_queue_size(),
+        overflow_policy=app_config.get_websocket_overflow_policy(),
+        stream_buffer_size=app_config.get_output_stream_buffer_size(),
+        stream_chunk_size=app_config.get_output_stream_chunk_size()
+    )
+    
+    # cdb 实时输出推送
+    output_streamer = None
+    if app_config.is_output_stream_enabled():
+        output_streamer = OutputStreamer(
+            ws_manager,
+            dump_source=(lambda: windbg_engine.current_dump) if windbg_engine is not None else None,
+            flush_interval=app_config.get_output_stream_flush_interval(),
+            chunk_size=app_config.get_output_stream_chunk_size()
+        )
     
     # 异步分析服务
-    async_analysis_service = AsyncAnalysisService(analyzer, ws_manager)
+    async_analysis_service = AsyncAnalysisService(
+        analyzer,
+        ws_manager,
+        artifact_store,
+        max_task_age=app_config.get_analysis_task_max_age(),
+        memory_budget=app_config.get_analysis_task_memory_budget(),
+        thinking_max_size=app_config.get_analysis_thinking_max_size(),
+        checkpoint_size=app_config.get_analysis_thinking_checkpoint_size(),
+        max_concurrency=app_config.get_analysis_max_concurrency(),
+        max_queue_size=app_config.get_analysis_max_queue_size()
+    )
+    
+    # WinDBG 异步门面（cdb 阻塞调用在线程池中执行）
+    engine_facade = None
+    if windbg_engine is not None and executor is not None:
+        engine_facade = AsyncEngineFacade(windbg_engine, executor, debugger_pool)
     
     # 依赖注入
     app.state.config = app_config
@@ -57,7 +93,11 @@ def create_app(
     app.state.analyzer = analyzer
     app.state.executor = executor
     app.state.nlp_processor = nlp_processor
+    app.state.debugger_pool = debugger_pool
+    app.state.artifact_store = artifact_store
+    app.state.engine_facade = engine_facade
     app.state.ws_manager = ws_manager
+    app.state.output_streamer = output_streamer
     app.state.async_analysis_service = async_analysis_service
     
     # 注册路由
@@ -73,7 +113,8 @@ def create_app(
         await ws_manager.connect_output(websocket)
         try:
             while True:
-                await websocket.receive_text()
+                text = await websocket.receive_text()
+                await ws_manager.handle_client_message(websocket, text)
         except WebSocketDisconnect:
             await ws_manager.disconnect_output(websocket)
     
@@ -83,10 +124,16 @@ def create_app(
         await ws_manager.connect_session(websocket)
         try:
             while True:
-                await websocket.receive_text()
+                text = await websocket.receive_text()
+                await ws_manager.handle_client_message(websocket, text)
         except WebSocketDisconnect:
             await ws_manager.disconnect_session(websocket)
     
+    @app.get("/api/websocket/stats")
+    async def websocket_stats():
+        """WebSocket 连接的发送队列深度、丢弃数与延迟"""
+        return ws_manager.get_connection_stats()
+    
     # 静态文件服务
     static_path = Path(app_config.get_web_static_path())
     if static_path.exists():
@@ -116,6 +163,11 @@ def create_app(
     @app.on_event("startup")
     async def startup_event():
         """启动事件"""
+        if output_streamer:
+            output_streamer.attach(asyncio.get_running_loop())
+            if windbg_engine is not None:
+                windbg_engine.add_output_listener(output_streamer.feed)
+        async_analysis_service.start_janitor(app_config.get_analysis_task_janitor_interval())
         LoggerManager.info("Web 应用已启动")
     
     # 关闭事件
@@ -123,6 +175,14 @@ def create_app(
     async def shutdown_event():
         """关闭事件"""
         LoggerManager.info("Web 应用已关闭")
+        if output_streamer and windbg_engine is not None:
+            windbg_engine.remove_output_listener(output_streamer.feed)
+        await async_analysis_service.stop_janitor()
         await ws_manager.disconnect_all()
+        if debugger_pool:
+            debugger_pool.close_all()
+        if engine_facade:
+            engine_facade.shutdown()
+        await HttpClientPool.aclose()
     
     return app
@@ -15,9 +15,6 @@ class AnalysisService:
     async def analyze(self, raw_output: str, command: str) -> Dict[str, Any]:
         """分析 WinDBG 输出"""
         try:
-            if not self.analyzer.client.is_available():
-                raise Exception("LLM 不可用")
-            
             report = self.analyzer.analyze_output(raw_output, command)
             
             LoggerManager.info("智能分析完成")
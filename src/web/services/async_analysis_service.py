@@ -1,59 +1,349 @@
 """异步分析服务"""
 
 import asyncio
+import bisect
+import io
 import uuid
-from typing import Optional, Dict, Any, Set
+from array import array
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Optional, Dict, Any, Set, List, Tuple, Callable, Awaitable
 from datetime import datetime
 
 from src.llm.analyzer import SmartAnalyzer
+from src.output.models import AnalysisReport
+from src.windbg.artifact_store import DumpArtifactStore
+from src.windbg.result_cache import dump_identity
 from src.core.logger import LoggerManager
-from src.core.exceptions import AnalysisError
+from src.core.exceptions import AnalysisError, AnalysisQueueFullError
+
+
+class ThinkingBuffer:
+    """流式分析的思考内容
+    
+    所有 chunk 追加到同一个文本缓冲区，每累计 checkpoint_size 个字符开始
+    一个新的检查点（一段历史）。每个 chunk 只额外记录序号和结束偏移两个
+    整数，since 查询据此精确定位。内容超过 max_size 时丢弃最旧的部分。
+    """
+    
+    def __init__(self, max_size: int = 512 * 1024, checkpoint_size: int = 4 * 1024):
+        """初始化缓冲区"""
+        self.max_size = max_size
+        self.checkpoint_size = checkpoint_size
+        self.dropped = 0
+        self._buffer = io.StringIO()
+        self._base = 0
+        self._length = 0
+        self._seqs = array("q")
+        self._ends = array("q")
+        self._checkpoints: List[Tuple[int, str]] = []
+    
+    def append(self, seq: int, chunk: str):
+        """追加一个 chunk"""
+        if not chunk:
+            return
+        if not self._checkpoints or self._length - self._checkpoints[-1][0] >= self.checkpoint_size:
+            self._checkpoints.append((self._length, datetime.now().isoformat()))
+        
+        self._buffer.write(chunk)
+        self._length += len(chunk)
+        self._seqs.append(seq)
+        self._ends.append(self._length)
+        
+        if self._length - self._base > self.max_size:
+            self._trim()
+    
+    def _trim(self):
+        """丢弃最旧的内容，保留 max_size 的四分之三，避免每个 chunk 都重建缓冲区"""
+        text = self._buffer.getvalue()
+        cut = len(text) - self.max_size * 3 // 4
+        self._buffer = io.StringIO()
+        self._buffer.write(text[cut:])
+        self._base += cut
+        self.dropped += cut
+        
+        # 丢弃已经完全移出缓冲区的 chunk 和检查点
+        index = bisect.bisect_right(self._ends, self._base)
+        del self._seqs[:index]
+        del self._ends[:index]
+        index = bisect.bisect_right(self._checkpoints, self._base, key=lambda checkpoint: checkpoint[0]) - 1
+        if index > 0:
+            del self._checkpoints[:index]
+    
+    def _offset_after(self, since: int) -> int:
+        """序号大于 since 的内容的起始偏移"""
+        index = bisect.bisect_right(self._seqs, since)
+        offset = self._ends[index - 1] if index else self._base
+        return max(offset, self._base)
+    
+    def to_list(self, since: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按检查点分段返回思考内容
+        
+        Args:
+            since: 只返回序号大于 since 的内容（None 返回全部）
+        
+        Returns:
+            [{"seq": 段内最后一个 chunk 的序号, "timestamp": 段开始时间, "content": 文本}]
+        """
+        start = self._base if since is None else self._offset_after(since)
+        if start >= self._length:
+            return []
+        
+        text = self._buffer.getvalue()
+        bounds = [offset for offset, _ in self._checkpoints[1:]] + [self._length]
+        entries = []
+        for (segment_start, timestamp), segment_end in zip(self._checkpoints, bounds):
+            if segment_end <= start:
+                continue
+            entries.append({
+                "seq": self._seqs[bisect.bisect_left(self._ends, segment_end)],
+                "timestamp": timestamp,
+                "content": text[max(segment_start, start) - self._base:segment_end - self._base]
+            })
+        return entries
+    
+    def memory_usage(self) -> int:
+        """估算占用的内存（字节）"""
+        return (self._length - self._base) + self._seqs.itemsize * 2 * len(self._seqs)
 
 
 class AnalysisTask:
     """分析任务"""
     
-    def __init__(self, task_id: str, raw_output: str, command: str):
+    def __init__(
+        self,
+        task_id: str,
+        raw_output: str,
+        command: str,
+        dump_file: Optional[str] = None,
+        thinking_max_size: int = 512 * 1024,
+        checkpoint_size: int = 4 * 1024
+    ):
         """初始化任务"""
         self.task_id = task_id
         self.raw_output = raw_output
         self.command = command
+        self.dump_file = dump_file
         self.status = "pending"
         self.progress = 0
         self.message = "等待开始..."
         self.result: Optional[Dict[str, Any]] = None
         self.error: Optional[str] = None
-        self.thinking_history: list = []
+        self.thinking = ThinkingBuffer(thinking_max_size, checkpoint_size)
         self.created_at = datetime.now()
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
         self.task: Optional[asyncio.Task] = None
+        self.runner: Optional[Callable[[], Awaitable[None]]] = None
+        # 进度事件序号，每次广播递增；thinking_history 的条目带有产生时的序号
+        self.seq = 0
+        self._published: Dict[str, Any] = {}
 
-    def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
+    def publish_progress(self, chunk: Optional[str] = None) -> Dict[str, Any]:
+        """生成下一条增量进度事件
+        
+        事件总是带有 status、progress、message（前端据此渲染进度），
+        result 和 error 只在变化时携带，任务结束时总是携带。chunk 是本次
+        新增的思考内容，同时追加到思考内容缓冲区。
+        """
+        self.seq += 1
+        event = {
+            "task_id": self.task_id,
+            "seq": self.seq,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message
+        }
+        
+        is_finished = self.is_finished()
+        for field in ("result", "error"):
+            value = getattr(self, field)
+            if is_finished or value != self._published.get(field):
+                event[field] = value
+                self._published[field] = value
+        
+        if chunk is not None:
+            self.thinking.append(self.seq, chunk)
+            event["chunk"] = chunk
+        
+        return event
+
+    def to_dict(self, since: Optional[int] = None) -> Dict[str, Any]:
+        """转换为字典
+        
+        Args:
+            since: 只返回序号大于 since 的思考内容（None 返回全部）
+        """
         return {
             "task_id": self.task_id,
+            "seq": self.seq,
             "status": self.status,
             "progress": self.progress,
             "message": self.message,
             "result": self.result,
             "error": self.error,
-            "thinking_history": self.thinking_history,
+            "thinking_history": self.thinking.to_list(since),
+            "thinking_dropped": self.thinking.dropped,
             "created_at": self.created_at.isoformat(),
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None
         }
+    
+    @property
+    def session_key(self) -> str:
+        """调度时所属的会话（以转储文件区分）"""
+        return self.dump_file or ""
+    
+    def is_finished(self) -> bool:
+        """任务是否已经结束"""
+        return self.status in ("completed", "error", "cancelled")
+    
+    def memory_usage(self) -> int:
+        """估算任务占用的内存（字节）"""
+        usage = len(self.raw_output) + self.thinking.memory_usage()
+        if self.result:
+            usage += len(str(self.result))
+        return usage
 
 
 class AsyncAnalysisService:
-    """异步分析服务"""
+    """异步分析服务
+    
+    分析任务先进入按会话划分的等待队列，最多 max_concurrency 个任务同时
+    运行。空出位置时各会话轮流取出任务，一个会话的大量请求不会让其他会话
+    一直等待。排队任务超过 max_queue_size 时拒绝新任务。
+    """
     
-    def __init__(self, analyzer: SmartAnalyzer, ws_manager=None):
-        """初始化异步分析服务"""
+    def __init__(
+        self,
+        analyzer: SmartAnalyzer,
+        ws_manager=None,
+        artifact_store: Optional[DumpArtifactStore] = None,
+        max_task_age: int = 3600,
+        memory_budget: int = 256 * 1024 * 1024,
+        thinking_max_size: int = 512 * 1024,
+        checkpoint_size: int = 4 * 1024,
+        max_concurrency: int = 4,
+        max_queue_size: int = 32
+    ):
+        """初始化异步分析服务
+        
+        Args:
+            analyzer: 智能分析器
+            ws_manager: WebSocket 管理器
+            artifact_store: 分析产物存储
+            max_task_age: 已结束任务的保留时间（秒）
+            memory_budget: 全部任务占用内存的上限（字节），超出时清理最早结束的任务
+            thinking_max_size: 单个任务保留的思考内容上限（字符）
+            checkpoint_size: 思考内容分段的大小（字符）
+            max_concurrency: 同时运行的任务数
+            max_queue_size: 排队等待的任务上限
+        """
         self.analyzer = analyzer
         self.ws_manager = ws_manager
+        self.artifact_store = artifact_store
+        self.max_task_age = max_task_age
+        self.memory_budget = memory_budget
+        self.thinking_max_size = thinking_max_size
+        self.checkpoint_size = checkpoint_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_size = max_queue_size
         self.tasks: Dict[str, AnalysisTask] = {}
         self._lock = asyncio.Lock()
+        self._janitor: Optional[asyncio.Task] = None
+        # 按会话划分的等待队列，字典顺序即轮转顺序
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._queued = 0
+        self._running = 0
+    
+    async def _submit(self, task: AnalysisTask, runner: Callable[[], Awaitable[None]]):
+        """任务进入等待队列，有空闲位置时立即开始
+        
+        Raises:
+            AnalysisQueueFullError: 没有空闲位置且排队任务已达上限
+        """
+        async with self._lock:
+            if self._running >= self.max_concurrency and self._queued >= self.max_queue_size:
+                raise AnalysisQueueFullError(f"分析队列已满（{self.max_queue_size} 个任务排队中），请稍后重试")
+            
+            task.runner = runner
+            self.tasks[task.task_id] = task
+            self._queues.setdefault(task.session_key, deque()).append(task)
+            self._queued += 1
+            self._dispatch_locked()
+            
+            if task.task is None:
+                task.message = "排队等待分析..."
+    
+    def _dispatch_locked(self):
+        """在空闲位置上启动排队的任务（持有锁时调用）"""
+        while self._running < self.max_concurrency and self._queues:
+            session_key, queue = next(iter(self._queues.items()))
+            task = queue.popleft()
+            if queue:
+                # 取出任务的会话排到最后，各会话轮流
+                self._queues.move_to_end(session_key)
+            else:
+                del self._queues[session_key]
+            
+            self._queued -= 1
+            self._running += 1
+            task.task = asyncio.create_task(task.runner())
+            task.task.add_done_callback(self._release_slot)
+    
+    def _release_slot(self, _: asyncio.Task):
+        """任务结束（包括被取消）后让出位置
+        
+        完成回调在事件循环中同步执行，不会与持有锁的协程交错修改队列。
+        """
+        self._running -= 1
+        self._dispatch_locked()
+    
+    def _queue_order(self) -> List[AnalysisTask]:
+        """按调度顺序排列的等待任务（各会话轮流）"""
+        order = []
+        queues = list(self._queues.values())
+        depth = max((len(queue) for queue in queues), default=0)
+        for index in range(depth):
+            for queue in queues:
+                if index < len(queue):
+                    order.append(queue[index])
+        return order
+    
+    def _queue_position(self, task: AnalysisTask) -> Optional[int]:
+        """任务在等待队列中的位置（从 1 开始），不在队列中返回 None"""
+        if task.task is not None or task.status != "pending":
+            return None
+        for position, queued in enumerate(self._queue_order(), 1):
+            if queued is task:
+                return position
+        return None
+    
+    async def get_queue_status(self) -> Dict[str, Any]:
+        """获取分析队列状态"""
+        async with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue_size": self.max_queue_size,
+                "running": self._running,
+                "queued": self._queued,
+                "queued_by_session": {
+                    session_key or "default": len(queue)
+                    for session_key, queue in self._queues.items()
+                },
+                "coalesced_requests": self.analyzer.coalesced_requests
+            }
+    
+    def _create_task(self, raw_output: str, command: str, dump_file: Optional[str]) -> AnalysisTask:
+        """创建任务对象"""
+        return AnalysisTask(
+            str(uuid.uuid4()),
+            raw_output,
+            command,
+            dump_file,
+            thinking_max_size=self.thinking_max_size,
+            checkpoint_size=self.checkpoint_size
+        )
     
     async def analyze(
         self,
@@ -63,9 +353,6 @@ class AsyncAnalysisService:
     ) -> Dict[str, Any]:
         """分析 WinDBG 输出（同步方式，用于兼容）"""
         try:
-            if not self.analyzer.client.is_available():
-                raise Exception("LLM 不可用")
-            
             report = self.analyzer.analyze_output(raw_output, command)
             
             LoggerManager.info("智能分析完成")
@@ -88,7 +375,8 @@ class AsyncAnalysisService:
         self,
         raw_output: str,
         command: str,
-        use_cache: bool = True
+        use_cache: bool = True,
+        dump_file: Optional[str] = None
     ) -> str:
         """异步分析 WinDBG 输出
         
@@ -96,20 +384,18 @@ class AsyncAnalysisService:
             raw_output: WinDBG 原始输出
             command: 执行的命令
             use_cache: 是否使用缓存
+            dump_file: 输出所属的转储文件，用于保存分析报告
             
         Returns:
             任务 ID
-        """
-        task_id = str(uuid.uuid4())
-        task = AnalysisTask(task_id, raw_output, command)
         
-        async with self._lock:
-            self.tasks[task_id] = task
+        Raises:
+            AnalysisQueueFullError: 分析队列已满
+        """
+        task = self._create_task(raw_output, command, dump_file)
+        task_id = task.task_id
         
-        # 创建后台任务
-        task.task = asyncio.create_task(
-            self._run_analysis_task(task, use_cache)
-        )
+        await self._submit(task, partial(self._run_analysis_task, task, use_cache))
         
         LoggerManager.info(f"创建异步分析任务: {task_id}")
         return task_id
@@ -157,7 +443,8 @@ class AsyncAnalysisService:
                 task.raw_output,
                 task.command,
                 progress_callback,
-                use_cache
+                use_cache,
+                task.dump_file
             )
             
             task.result = report.to_dict()
@@ -167,6 +454,7 @@ class AsyncAnalysisService:
             task.message = "分析完成"
             
             await self._broadcast_progress(task)
+            await self._save_report(task)
             
             LoggerManager.info(f"异步分析任务完成: {task.task_id}")
             
@@ -183,7 +471,8 @@ class AsyncAnalysisService:
         self,
         raw_output: str,
         command: str,
-        use_cache: bool = True
+        use_cache: bool = True,
+        dump_file: Optional[str] = None
     ) -> str:
         """流式分析 WinDBG 输出
         
@@ -191,20 +480,18 @@ class AsyncAnalysisService:
             raw_output: WinDBG 原始输出
             command: 执行的命令
             use_cache: 是否使用缓存
+            dump_file: 输出所属的转储文件，用于保存分析报告
             
         Returns:
             任务 ID
-        """
-        task_id = str(uuid.uuid4())
-        task = AnalysisTask(task_id, raw_output, command)
         
-        async with self._lock:
-            self.tasks[task_id] = task
+        Raises:
+            AnalysisQueueFullError: 分析队列已满
+        """
+        task = self._create_task(raw_output, command, dump_file)
+        task_id = task.task_id
         
-        # 创建后台任务
-        task.task = asyncio.create_task(
-            self._run_streaming_analysis_task(task, use_cache)
-        )
+        await self._submit(task, partial(self._run_streaming_analysis_task, task, use_cache))
         
         LoggerManager.info(f"创建流式分析任务: {task_id}")
         return task_id
@@ -235,10 +522,8 @@ class AsyncAnalysisService:
                     task.progress = min(task.progress +1, 90)
                     # 使用固定消息，避免显示 LLM 实时输出
                     task.message = "正在分析中..."
-                    task.thinking_history.append({
-                        "timestamp": datetime.now().isoformat(),
-                        "content": data.get("chunk", "")
-                    })
+                    await self._broadcast_progress(task, data.get("chunk", ""))
+                    return
                 elif stage == "parsing":
                     task.progress = 90
                 elif stage == "completed":
@@ -262,9 +547,11 @@ class AsyncAnalysisService:
                 task.raw_output,
                 task.command,
                 progress_callback,
-                use_cache
+                use_cache,
+                task.dump_file
             ):
-                if progress["type"] == "completed":
+                # 命中缓存或崩溃分桶时直接得到完整结果
+                if progress["type"] in ("completed", "cache_hit"):
                     task.result = progress["data"]
                     task.status = "completed"
                     task.completed_at = datetime.now()
@@ -277,6 +564,9 @@ class AsyncAnalysisService:
                 
                 await self._broadcast_progress(task)
             
+            if task.status == "completed":
+                await self._save_report(task)
+            
             LoggerManager.info(f"流式分析任务完成: {task.task_id}")
             
         except Exception as e:
@@ -288,29 +578,58 @@ class AsyncAnalysisService:
             
             await self._broadcast_progress(task)
     
-    async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """获取任务状态"""
+    async def _save_report(self, task: AnalysisTask):
+        """把任务结果保存到转储文件的分析产物中"""
+        if not (self.artifact_store and task.dump_file and task.result):
+            return
+        try:
+            report = AnalysisReport.from_dict(task.result)
+            dump_id = await asyncio.to_thread(dump_identity, task.dump_file)
+            await asyncio.to_thread(self.artifact_store.save_report, dump_id, report, task.dump_file)
+        except Exception as e:
+            LoggerManager.warning(f"保存分析报告失败: {task.task_id}, {str(e)}")
+    
+    async def get_task_status(self, task_id: str, since: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """获取任务状态
+        
+        Args:
+            task_id: 任务 ID
+            since: 上次获取到的序号，只返回之后新增的思考内容
+        """
         async with self._lock:
             task = self.tasks.get(task_id)
             if task:
-                return task.to_dict()
+                status = task.to_dict(since)
+                status["queue_position"] = self._queue_position(task)
+                return status
         return None
     
     async def cancel_task(self, task_id: str) -> bool:
-        """取消任务"""
+        """取消任务（排队中的任务直接移出队列）"""
         async with self._lock:
             task = self.tasks.get(task_id)
-            if task and task.task and not task.task.done():
+            if task is None:
+                return False
+            
+            queue = self._queues.get(task.session_key)
+            if task.task is None and queue and task in queue:
+                queue.remove(task)
+                if not queue:
+                    del self._queues[task.session_key]
+                self._queued -= 1
+            elif task.task and not task.task.done():
                 task.task.cancel()
-                task.status = "cancelled"
-                task.message = "任务已取消"
-                task.completed_at = datetime.now()
-                
-                await self._broadcast_progress(task)
-                
-                LoggerManager.info(f"取消分析任务: {task_id}")
-                return True
-        return False
+            else:
+                return False
+            
+            task.status = "cancelled"
+            task.message = "任务已取消"
+            task.completed_at = datetime.now()
+            
+            await self._broadcast_progress(task)
+            
+            LoggerManager.info(f"取消分析任务: {task_id}")
+            return True
     
     async def clear_cache(self) -> Dict[str, Any]:
         """清空分析缓存"""
@@ -325,23 +644,27 @@ class AsyncAnalysisService:
             LoggerManager.error(f"清空缓存错误: {str(e)}")
             raise
     
-    async def _broadcast_progress(self, task: AnalysisTask):
-        """广播任务进度"""
+    async def _broadcast_progress(self, task: AnalysisTask, chunk: Optional[str] = None):
+        """广播任务进度（只携带变化的字段和新增的思考内容）"""
+        event = task.publish_progress(chunk)
         if self.ws_manager:
-            LoggerManager.debug(f"广播任务进度: {task.task_id}, status={task.status}, progress={task.progress}, message={task.message}")
+            LoggerManager.debug(f"广播任务进度: {task.task_id}, seq={event['seq']}, status={task.status}, progress={task.progress}, message={task.message}")
             await self.ws_manager.broadcast_output({
                 "type": "analysis_progress",
-                "task_id": task.task_id,
-                "status": task.status,
-                "progress": task.progress,
-                "message": task.message,
-                "result": task.result,
-                "error": task.error
+                **event,
+                "dump_file": task.dump_file
             })
     
 
-    async def cleanup_old_tasks(self, max_age_seconds: int = 3600):
-        """清理旧任务"""
+    async def cleanup_old_tasks(self, max_age_seconds: Optional[int] = None):
+        """清理旧任务
+        
+        先清理结束时间超过保留时间的任务；全部任务占用的内存仍超过预算时，
+        从最早结束的任务开始继续清理。正在运行的任务不会被清理。
+        """
+        if max_age_seconds is None:
+            max_age_seconds = self.max_task_age
+        
         now = datetime.now()
         async with self._lock:
             to_remove = []
@@ -352,5 +675,45 @@ class AsyncAnalysisService:
             for task_id in to_remove:
                 del self.tasks[task_id]
             
+            usage = sum(task.memory_usage() for task in self.tasks.values())
+            evicted = 0
+            if usage > self.memory_budget:
+                finished = sorted(
+                    (task for task in self.tasks.values() if task.is_finished() and task.completed_at),
+                    key=lambda task: task.completed_at
+                )
+                for task in finished:
+                    if usage <= self.memory_budget:
+                        break
+                    usage -= task.memory_usage()
+                    del self.tasks[task.task_id]
+                    evicted += 1
+            
             if to_remove:
-                LoggerManager.info(f"清理了 {len(to_remove)} 个旧任务")
\ No newline at end of file
+                LoggerManager.info(f"清理了 {len(to_remove)} 个旧任务")
+            if evicted:
+                LoggerManager.info(f"任务内存超过预算，清理了 {evicted} 个已结束的任务")
+    
+    def start_janitor(self, interval: float = 60):
+        """启动后台定期清理（在应用启动时调用）"""
+        if self._janitor is None or self._janitor.done():
+            self._janitor = asyncio.create_task(self._janitor_loop(interval))
+    
+    async def stop_janitor(self):
+        """停止后台清理"""
+        if self._janitor and not self._janitor.done():
+            self._janitor.cancel()
+            try:
+                await self._janitor
+            except asyncio.CancelledError:
+                pass
+        self._janitor = None
+    
+    async def _janitor_loop(self, interval: float):
+        """定期清理旧任务"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.cleanup_old_tasks()
+            except Exception as e:
+                LoggerManager.error(f"清理分析任务失败: {str(e)}")
\ No newline at end of file
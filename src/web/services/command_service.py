@@ -1,6 +1,6 @@
 """命令服务"""
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from src.core.session import SessionManager, SessionState
 from src.windbg.engine import WinDBGEngine
 from src.windbg.executor import CommandExecutor
@@ -52,6 +52,41 @@ class CommandService:
             LoggerManager.error(f"命令执行错误: {str(e)}")
             raise
     
+    async def execute_batch(self, commands: List[str], mode: str = "smart") -> Dict[str, Any]:
+        """批量执行 WinDBG 命令"""
+        try:
+            if not self.windbg_engine.is_dump_loaded():
+                raise Exception("请先加载转储文件")
+            
+            self.session_manager.set_state(SessionState.ANALYZING)
+            
+            results = self.executor.execute_batch(commands)
+            
+            for result in results:
+                self.session_manager.add_command(result.command)
+                self.session_manager.add_output(result.output, result.command, mode)
+            
+            self.session_manager.set_state(SessionState.READY)
+            
+            LoggerManager.info(f"批量命令执行完成: {len(results)} 条")
+            return {
+                "success": all(result.success for result in results),
+                "results": [
+                    {
+                        "success": result.success,
+                        "output": result.output,
+                        "command": result.command,
+                        "error": result.error if not result.success else None
+                    }
+                    for result in results
+                ]
+            }
+        
+        except Exception as e:
+            self.session_manager.set_state(SessionState.ERROR)
+            LoggerManager.error(f"批量命令执行错误: {str(e)}")
+            raise
+    
     async def execute_natural(self, user_input: str, mode: str = "smart") -> Dict[str, Any]:
         """执行自然语言命令"""
         try:
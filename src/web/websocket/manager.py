@@ -1,114 +1,411 @@
 """WebSocket 连接管理器"""
 
-from typing import List, Set, Dict, Any
+from typing import List, Set, Dict, Any, Deque, Optional, Tuple, Iterable
+from collections import deque
 from fastapi import WebSocket
 from fastapi.websockets import WebSocketState
 import json
+import time
 import asyncio
 
 from src.core.logger import LoggerManager
 
 
+# 发送队列溢出策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_DISCONNECT)
+
+# 实时输出块的消息类型（按字节数限制，可合并）
+STREAM_MESSAGE_TYPE = "command_output_chunk"
+
+# 订阅主题对应的消息字段：会话以转储文件路径标识
+TOPIC_FIELDS = {
+    "sessions": "dump_file",
+    "tasks": "task_id",
+    "types": "type"
+}
+
+
+def _serialize(message: Dict[str, Any]) -> str:
+    """序列化消息（与 WebSocket.send_json 的格式一致）"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class _Subscription:
+    """连接订阅的主题
+    
+    每个维度（会话、任务、消息类型）是一个集合，为空表示不按该维度过滤。
+    没有任何订阅的连接接收全部消息，与订阅功能出现之前的行为一致。
+    """
+    
+    def __init__(self):
+        self.topics: Dict[str, Set[str]] = {name: set() for name in TOPIC_FIELDS}
+    
+    def update(self, topics: Dict[str, Iterable[str]], subscribe: bool = True):
+        """增加或移除订阅的主题"""
+        for name, values in topics.items():
+            if subscribe:
+                self.topics[name].update(values)
+            else:
+                self.topics[name].difference_update(values)
+    
+    def clear(self):
+        """清空订阅（恢复接收全部消息）"""
+        for values in self.topics.values():
+            values.clear()
+    
+    def matches(self, message: Dict[str, Any]) -> bool:
+        """消息是否属于订阅的主题"""
+        for name, values in self.topics.items():
+            if values and message.get(TOPIC_FIELDS[name]) not in values:
+                return False
+        return True
+    
+    def to_dict(self) -> Dict[str, List[str]]:
+        """转换为字典"""
+        return {name: sorted(values) for name, values in self.topics.items()}
+
+
+class _ConnectionQueue:
+    """单个连接的有界发送队列
+    
+    广播只把消息放入队列，由连接自己的写任务按顺序发送，慢连接不会
+    拖慢其他连接。
+    """
+    
+    def __init__(self, websocket: WebSocket, channel: str):
+        self.websocket = websocket
+        self.channel = channel
+        self.subscription = _Subscription()
+        # (入队时间, 消息, 序列化后的文本)
+        self.items: Deque[Tuple[float, Dict[str, Any], Optional[str]]] = deque()
+        self.stream_bytes = 0
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        # 延迟统计
+        self.sent = 0
+        self.dropped = 0
+        self.dropped_stream_bytes = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+    
+    def pop_stream_bytes(self, message: Dict[str, Any]):
+        """出队的消息是输出块时更新字节计数"""
+        if message.get("type") == STREAM_MESSAGE_TYPE:
+            self.stream_bytes -= len(message["data"])
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接的发送统计"""
+        oldest_wait = time.time() - self.items[0][0] if self.items else 0.0
+        return {
+            "channel": self.channel,
+            "client": str(self.websocket.client),
+            "subscription": self.subscription.to_dict(),
+            "queue_depth": len(self.items),
+            "stream_bytes": self.stream_bytes,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "dropped_stream_bytes": self.dropped_stream_bytes,
+            "lag_ms": round(oldest_wait * 1000, 1),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1)
+        }
+
+
 class WebSocketManager:
     """WebSocket 连接管理器"""
     
-    def __init__(self):
-        """初始化 WebSocket 管理器"""
+    def __init__(
+        self,
+        queue_size: int = 256,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        stream_buffer_size: int = 1024 * 1024,
+        stream_chunk_size: int = 64 * 1024
+    ):
+        """初始化 WebSocket 管理器
+        
+        Args:
+            queue_size: 每个连接最多排队的消息数
+            overflow_policy: 队列满时的策略（drop_oldest / drop_newest / disconnect）
+            stream_buffer_size: 每个连接排队的实时输出块最多占用的字节数
+            stream_chunk_size: 合并实时输出块后单条消息的最大字节数
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            LoggerManager.warning(f"未知的 WebSocket 溢出策略: {overflow_policy}，使用 {OVERFLOW_DROP_OLDEST}")
+            overflow_policy = OVERFLOW_DROP_OLDEST
+        
         self.output_connections: Set[WebSocket] = set()
         self.session_connections: Set[WebSocket] = set()
-        self._lock = asyncio.Lock()
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.stream_buffer_size = stream_buffer_size
+        self.stream_chunk_size = stream_chunk_size
+        self._queues: Dict[WebSocket, _ConnectionQueue] = {}
+        # 广播统计
+        self.broadcasts = 0
+        self.deliveries = 0
+        self.filtered = 0
+    
+    def _register(self, websocket: WebSocket, channel: str):
+        """登记连接并启动写任务"""
+        queue = _ConnectionQueue(websocket, channel)
+        queue.subscription.update(self._parse_query_topics(websocket))
+        queue.task = asyncio.create_task(self._writer(queue))
+        self._queues[websocket] = queue
+    
+    @staticmethod
+    def _parse_query_topics(websocket: WebSocket) -> Dict[str, Set[str]]:
+        """从连接 URL 读取初始订阅（?session=...&task=...&type=...，可逗号分隔或重复）"""
+        query_params = getattr(websocket, "query_params", None)
+        topics = {}
+        if not query_params:
+            return topics
+        for name, param in (("sessions", "session"), ("tasks", "task"), ("types", "type")):
+            values = set()
+            for value in query_params.getlist(param):
+                values.update(item.strip() for item in value.split(",") if item.strip())
+            if values:
+                topics[name] = values
+        return topics
+    
+    def _unregister(self, websocket: WebSocket):
+        """注销连接并停止写任务"""
+        self.output_connections.discard(websocket)
+        self.session_connections.discard(websocket)
+        queue = self._queues.pop(websocket, None)
+        if queue and queue.task and queue.task is not asyncio.current_task():
+            queue.task.cancel()
     
     async def connect_output(self, websocket: WebSocket):
         """连接输出 WebSocket"""
         await websocket.accept()
-        async with self._lock:
-            self.output_connections.add(websocket)
+        self.output_connections.add(websocket)
+        self._register(websocket, "output")
         LoggerManager.info(f"输出 WebSocket 连接建立: {websocket.client}")
     
     async def disconnect_output(self, websocket: WebSocket):
         """断开输出 WebSocket"""
-        async with self._lock:
-            self.output_connections.discard(websocket)
+        self._unregister(websocket)
         LoggerManager.info(f"输出 WebSocket 连接断开: {websocket.client}")
     
     async def connect_session(self, websocket: WebSocket):
         """连接会话 WebSocket"""
         await websocket.accept()
-        async with self._lock:
-            self.session_connections.add(websocket)
+        self.session_connections.add(websocket)
+        self._register(websocket, "session")
         LoggerManager.info(f"会话 WebSocket 连接建立: {websocket.client}")
     
     async def disconnect_session(self, websocket: WebSocket):
         """断开会话 WebSocket"""
-        async with self._lock:
-            self.session_connections.discard(websocket)
+        self._unregister(websocket)
         LoggerManager.info(f"会话 WebSocket 连接断开: {websocket.client}")
     
-    async def broadcast_output(self, message: Dict[str, Any]):
-        """广播输出消息"""
-        if not self.output_connections:
-            return
+    def _enqueue(self, queue: _ConnectionQueue, message: Dict[str, Any], text: Optional[str] = None):
+        """把消息放入连接的发送队列（不等待发送）"""
+        is_stream = message.get("type") == STREAM_MESSAGE_TYPE
+        
+        if is_stream:
+            # 实时输出按字节限制：丢弃最旧的输出块
+            size = len(message["data"])
+            while queue.stream_bytes + size > self.stream_buffer_size:
+                index = next(
+                    (i for i, (_, item, _) in enumerate(queue.items) if item.get("type") == STREAM_MESSAGE_TYPE),
+                    None
+                )
+                if index is None:
+                    break
+                _, old, _ = queue.items[index]
+                del queue.items[index]
+                queue.pop_stream_bytes(old)
+                queue.dropped_stream_bytes += len(old["data"])
+        
+        if len(queue.items) >= self.queue_size:
+            if self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                queue.dropped += 1
+                if is_stream:
+                    queue.dropped_stream_bytes += len(message["data"])
+                return
+            if self.overflow_policy == OVERFLOW_DISCONNECT:
+                LoggerManager.warning(f"WebSocket 发送队列已满，断开连接: {queue.websocket.client}")
+                self._unregister(queue.websocket)
+                asyncio.create_task(self._close(queue.websocket))
+                return
+            _, old, _ = queue.items.popleft()
+            queue.pop_stream_bytes(old)
+            queue.dropped += 1
         
-        disconnected = set()
-        async with self._lock:
-            for connection in self.output_connections:
-                try:
-                    if connection.client_state == WebSocketState.CONNECTED:
-                        await connection.send_json(message)
-                    else:
-                        disconnected.add(connection)
-                except Exception as e:
-                    LoggerManager.error(f"发送输出消息失败: {str(e)}")
-                    disconnected.add(connection)
-        
-        # 清理断开的连接
-        for connection in disconnected:
-            self.disconnect_output(connection)
+        queue.items.append((time.time(), message, text))
+        if is_stream:
+            queue.stream_bytes += len(message["data"])
+        queue.ready.set()
     
-    async def broadcast_session_update(self, message: Dict[str, Any]):
-        """广播会话更新消息"""
-        if not self.session_connections:
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        """关闭连接（1008: 策略违规）"""
+        try:
+            await websocket.close(code=1008)
+        except Exception:
+            pass
+    
+    def _take_next(self, queue: _ConnectionQueue) -> Tuple[float, str]:
+        """取出下一条消息的文本，积压的同一命令输出块合并为一条"""
+        enqueued_at, message, text = queue.items.popleft()
+        queue.pop_stream_bytes(message)
+        
+        if message.get("type") == STREAM_MESSAGE_TYPE:
+            parts = [message["data"]]
+            total = len(message["data"])
+            while queue.items:
+                _, following, _ = queue.items[0]
+                if (following.get("type") != STREAM_MESSAGE_TYPE
+                        or following["command"] != message["command"]
+                        or following.get("dump_file") != message.get("dump_file")
+                        or total + len(following["data"]) > self.stream_chunk_size):
+                    break
+                queue.items.popleft()
+                queue.pop_stream_bytes(following)
+                parts.append(following["data"])
+                total += len(following["data"])
+            if len(parts) > 1:
+                message = {**message, "data": "".join(parts)}
+                text = None
+            if queue.dropped_stream_bytes:
+                message = {
+                    **message,
+                    "dropped_bytes": message.get("dropped_bytes", 0) + queue.dropped_stream_bytes
+                }
+                queue.dropped_stream_bytes = 0
+                text = None
+        
+        # 合并或补充字段后的消息只属于这个连接，需要单独序列化
+        return enqueued_at, text if text is not None else _serialize(message)
+    
+    async def _writer(self, queue: _ConnectionQueue):
+        """连接的写任务：按顺序发送队列中的消息"""
+        websocket = queue.websocket
+        try:
+            while True:
+                if not queue.items:
+                    queue.ready.clear()
+                    await queue.ready.wait()
+                    continue
+                
+                enqueued_at, text = self._take_next(queue)
+                if websocket.client_state != WebSocketState.CONNECTED:
+                    break
+                await websocket.send_text(text)
+                
+                queue.sent += 1
+                queue.last_lag = time.time() - enqueued_at
+                queue.max_lag = max(queue.max_lag, queue.last_lag)
+        except asyncio.CancelledError:
             return
+        except Exception as e:
+            LoggerManager.error(f"发送 WebSocket 消息失败: {str(e)}")
         
-        disconnected = set()
-        async with self._lock:
-            for connection in self.session_connections:
-                try:
-                    if connection.client_state == WebSocketState.CONNECTED:
-                        await connection.send_json(message)
-                    else:
-                        disconnected.add(connection)
-                except Exception as e:
-                    LoggerManager.error(f"发送会话消息失败: {str(e)}")
-                    disconnected.add(connection)
-        
-        # 清理断开的连接
-        for connection in disconnected:
-            self.disconnect_session(connection)
+        self._unregister(websocket)
+    
+    def _broadcast(self, connections: Set[WebSocket], message: Dict[str, Any]):
+        """把消息放入订阅了该消息的连接的发送队列
+        
+        消息只序列化一次，所有连接共享同一份文本。
+        """
+        self.broadcasts += 1
+        text = None
+        for connection in list(connections):
+            queue = self._queues.get(connection)
+            if queue is None:
+                continue
+            if not queue.subscription.matches(message):
+                self.filtered += 1
+                continue
+            if text is None:
+                text = _serialize(message)
+            self._enqueue(queue, message, text)
+            self.deliveries += 1
+    
+    async def broadcast_output(self, message: Dict[str, Any]):
+        """广播输出消息（只入队，不等待发送）"""
+        self._broadcast(self.output_connections, message)
+    
+    def push_output_chunk(self, message: Dict[str, Any]):
+        """广播实时输出块（需包含 command 和 data 字段）
+        
+        连接积压的输出块超过 stream_buffer_size 时丢弃最旧的块，丢弃的字节数
+        随下一条输出块的 dropped_bytes 字段告知客户端。
+        """
+        self._broadcast(self.output_connections, message)
+    
+    async def broadcast_session_update(self, message: Dict[str, Any]):
+        """广播会话更新消息（只入队，不等待发送）"""
+        self._broadcast(self.session_connections, message)
     
     async def send_to_output(self, websocket: WebSocket, message: Dict[str, Any]):
         """发送消息到特定输出连接"""
-        try:
-            if websocket.client_state == WebSocketState.CONNECTED:
-                await websocket.send_json(message)
-        except Exception as e:
-            LoggerManager.error(f"发送消息失败: {str(e)}")
-            self.disconnect_output(websocket)
+        queue = self._queues.get(websocket)
+        if queue is not None:
+            self._enqueue(queue, message)
     
     async def send_to_session(self, websocket: WebSocket, message: Dict[str, Any]):
         """发送消息到特定会话连接"""
+        queue = self._queues.get(websocket)
+        if queue is not None:
+            self._enqueue(queue, message)
+    
+    async def handle_client_message(self, websocket: WebSocket, text: str):
+        """处理客户端发来的订阅请求
+        
+        {"action": "subscribe", "sessions": [...], "tasks": [...], "types": [...]}
+        {"action": "unsubscribe", ...}：移除主题
+        {"action": "reset"}：清空订阅，恢复接收全部消息
+        
+        处理后回复 {"type": "subscription", ...} 告知当前订阅。非 JSON 文本
+        （例如心跳）直接忽略。
+        """
+        queue = self._queues.get(websocket)
+        if queue is None:
+            return
+        
         try:
-            if websocket.client_state == WebSocketState.CONNECTED:
-                await websocket.send_json(message)
-        except Exception as e:
-            LoggerManager.error(f"发送消息失败: {str(e)}")
-            self.disconnect_session(websocket)
+            request = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(request, dict) or "action" not in request:
+            return
+        
+        action = request["action"]
+        topics = {}
+        for name in TOPIC_FIELDS:
+            values = request.get(name) or []
+            if isinstance(values, str):
+                values = [values]
+            if not isinstance(values, list):
+                self._enqueue(queue, {"type": "subscription_error", "message": f"{name} 必须是字符串列表"})
+                return
+            if values:
+                topics[name] = {str(value) for value in values}
+        
+        if action == "subscribe":
+            queue.subscription.update(topics)
+        elif action == "unsubscribe":
+            queue.subscription.update(topics, subscribe=False)
+        elif action == "reset":
+            queue.subscription.clear()
+        else:
+            self._enqueue(queue, {"type": "subscription_error", "message": f"未知的订阅操作: {action}"})
+            return
+        
+        LoggerManager.debug(f"WebSocket 订阅更新: {websocket.client}, {queue.subscription.to_dict()}")
+        self._enqueue(queue, {"type": "subscription", **queue.subscription.to_dict()})
     
     async def disconnect_all(self):
         """断开所有连接"""
-        async with self._lock:
-            self.output_connections.clear()
-            self.session_connections.clear()
+        for websocket in list(self._queues):
+            self._unregister(websocket)
+        self.output_connections.clear()
+        self.session_connections.clear()
         LoggerManager.info("所有 WebSocket 连接已断开")
     
     def get_connection_count(self) -> Dict[str, int]:
@@ -117,3 +414,14 @@ class WebSocketManager:
             "output": len(self.output_connections),
             "session": len(self.session_connections)
         }
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """获取各连接的订阅、队列深度、丢弃数与发送延迟"""
+        return {
+            "queue_size": self.queue_size,
+            "overflow_policy": self.overflow_policy,
+            "broadcasts": self.broadcasts,
+            "deliveries": self.deliveries,
+            "filtered": self.filtered,
+            "connections": [queue.get_stats() for queue in self._queues.values()]
+        }
@@ -0,0 +1,126 @@
+"""cdb 实时输出推送"""
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Optional, Deque, Tuple, Callable
+
+from src.core.logger import LoggerManager
+
+
+class OutputStreamer:
+    """把 cdb 输出按时间批量推送到 /ws/output
+
+    引擎读取线程通过 feed() 交来输出块，
+    流推送器在 flush_interval 内攒批，按命令切分成不超过 chunk_size 的
+    command_output_chunk 消息交给 WebSocketManager。待推送的输出超过
+    max_pending_size 时丢弃最旧的部分（包括同一条命令持续输出时较早的
+    部分），服务端内存不会随输出大小增长。
+    命令结束后仍会广播完整的 command_output 消息，旧客户端不受影响。
+    消息带有当前转储文件路径（dump_file），供按会话订阅的客户端过滤。
+    """
+
+    def __init__(
+        self,
+        ws_manager,
+        flush_interval: float = 0.05,
+        chunk_size: int = 64 * 1024,
+        max_pending_size: int = 4 * 1024 * 1024,
+        dump_source: Optional[Callable[[], Optional[str]]] = None
+    ):
+        """初始化推送器"""
+        self.ws_manager = ws_manager
+        self.dump_source = dump_source
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.max_pending_size = max_pending_size
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        # 待推送的输出：每条命令一项 (命令, 输出块)，输出块按到达顺序保存，
+        # 推送时再拼接，避免长时间输出的命令反复拼接字符串
+        self._pending: Deque[Tuple[Optional[str], Deque[str]]] = deque()
+        self._pending_size = 0
+        self._dropped = 0
+        self._flush_scheduled = False
+        self._seq = itertools.count(1)
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """绑定事件循环（在应用启动时调用）"""
+        self._loop = loop
+
+    def feed(self, text: str, command: Optional[str] = None):
+        """接收一块输出（可在任意线程调用，不阻塞）"""
+        if self._loop is None or not self.ws_manager.output_connections:
+            return
+
+        with self._lock:
+            if self._pending and self._pending[-1][0] == command:
+                self._pending[-1][1].append(text)
+            else:
+                self._pending.append((command, deque([text])))
+            self._pending_size += len(text)
+            self._trim_locked()
+
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        try:
+            self._loop.call_soon_threadsafe(self._schedule_flush)
+        except RuntimeError:
+            # 事件循环已关闭
+            with self._lock:
+                self._flush_scheduled = False
+
+    def _trim_locked(self):
+        """事件循环跟不上时丢弃最旧的输出，直到不超过 max_pending_size（持有锁时调用）"""
+        excess = self._pending_size - self.max_pending_size
+        while excess > 0:
+            _, chunks = self._pending[0]
+            oldest = chunks[0]
+            if len(oldest) > excess:
+                # 只保留这一块较新的部分
+                chunks[0] = oldest[excess:]
+                dropped = excess
+            else:
+                chunks.popleft()
+                dropped = len(oldest)
+                if not chunks:
+                    self._pending.popleft()
+            self._pending_size -= dropped
+            self._dropped += dropped
+            excess -= dropped
+
+    def _schedule_flush(self):
+        """在事件循环中延迟一个批量间隔后推送"""
+        self._loop.call_later(self.flush_interval, self._flush)
+
+    def _flush(self):
+        """把攒批的输出推送给各连接"""
+        with self._lock:
+            pending, self._pending = self._pending, deque()
+            self._pending_size = 0
+            dropped, self._dropped = self._dropped, 0
+            self._flush_scheduled = False
+
+        if dropped:
+            LoggerManager.warning(f"实时输出推送积压，丢弃 {dropped} 字节")
+        
+        dump_file = self.dump_source() if self.dump_source else None
+
+        for command, chunks in pending:
+            text = ''.join(chunks)
+            for start in range(0, len(text), self.chunk_size):
+                message = {
+                    "type": "command_output_chunk",
+                    "seq": next(self._seq),
+                    "command": command,
+                    "data": text[start:start + self.chunk_size],
+                    "dump_file": dump_file
+                }
+                if dropped:
+                    message["dropped_bytes"] = dropped
+                    dropped = 0
+                self.ws_manager.push_output_chunk(message)
@@ -0,0 +1,198 @@
+"""转储文件分析产物存储"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+from src.output.models import AnalysisReport
+
+
+class DumpArtifactStore:
+    """按转储文件标识持久化分析产物
+
+    使用 SQLite 保存每个转储文件执行过的命令原始输出、OutputParser 解析出的
+    结构化数据以及最终的 AnalysisReport。重新加载同一转储（新的 Web 会话、
+    CLI 重启）时可以直接读取这些产物，不必再启动 cdb。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS command_outputs (
+            dump_id TEXT NOT NULL,
+            symbol_path TEXT NOT NULL,
+            command TEXT NOT NULL,
+            output TEXT NOT NULL,
+            parsed TEXT,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (dump_id, symbol_path, command)
+        );
+        CREATE TABLE IF NOT EXISTS reports (
+            dump_id TEXT PRIMARY KEY,
+            dump_path TEXT,
+            report TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str = "~/.ai_windbg/artifacts.db"):
+        """初始化存储"""
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+        LoggerManager.debug(f"分析产物存储初始化: {self.db_path}")
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> Optional["DumpArtifactStore"]:
+        """根据配置创建存储，未启用时返回 None"""
+        if not config.is_artifact_store_enabled():
+            return None
+        try:
+            return cls(config.get_artifact_store_path())
+        except Exception as e:
+            LoggerManager.warning(f"初始化分析产物存储失败: {str(e)}")
+            return None
+
+    @staticmethod
+    def _serialize_parsed(parsed: Dict[str, Any]) -> str:
+        """序列化解析结果（dataclass 转为字典）"""
+        def convert(value):
+            if isinstance(value, list):
+                return [convert(item) for item in value]
+            if hasattr(value, '__dataclass_fields__'):
+                return asdict(value)
+            return value
+
+        return json.dumps({key: convert(value) for key, value in parsed.items()}, ensure_ascii=False)
+
+    def save_command_output(
+        self,
+        dump_id: str,
+        symbol_path: str,
+        command: str,
+        output: str,
+        parsed: Optional[Dict[str, Any]] = None
+    ):
+        """保存命令输出及解析结果"""
+        try:
+            parsed_json = self._serialize_parsed(parsed) if parsed else None
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO command_outputs VALUES (?, ?, ?, ?, ?, ?)",
+                    (dump_id, symbol_path, command, output, parsed_json, time.time())
+                )
+                self._conn.commit()
+        except Exception as e:
+            LoggerManager.warning(f"保存命令产物失败: {str(e)}")
+
+    def get_command_output(self, dump_id: str, symbol_path: str, command: str) -> Optional[str]:
+        """获取命令原始输出"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM command_outputs WHERE dump_id = ? AND symbol_path = ? AND command = ?",
+                (dump_id, symbol_path, command)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_parsed(self, dump_id: str, symbol_path: str, command: str) -> Optional[Dict[str, Any]]:
+        """获取命令输出的解析结果"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parsed FROM command_outputs WHERE dump_id = ? AND symbol_path = ? AND command = ?",
+                (dump_id, symbol_path, command)
+            ).fetchone()
+        if not row or not row[0]:
+            return None
+        return json.loads(row[0])
+
+    def list_commands(self, dump_id: str) -> List[Dict[str, Any]]:
+        """列出转储文件已保存的命令"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT command, symbol_path, length(output), created_at FROM command_outputs "
+                "WHERE dump_id = ? ORDER BY created_at",
+                (dump_id,)
+            ).fetchall()
+        return [
+            {
+                "command": command,
+                "symbol_path": symbol_path,
+                "output_length": output_length,
+                "created_at": created_at
+            }
+            for command, symbol_path, output_length, created_at in rows
+        ]
+
+    def has_artifacts(self, dump_id: str) -> bool:
+        """转储文件是否有已保存的产物"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM command_outputs WHERE dump_id = ? "
+                "UNION ALL SELECT 1 FROM reports WHERE dump_id = ? LIMIT 1",
+                (dump_id, dump_id)
+            ).fetchone()
+        return row is not None
+
+    def save_report(self, dump_id: str, report: AnalysisReport, dump_path: Optional[str] = None):
+        """保存转储文件的分析报告"""
+        try:
+            report_json = json.dumps(report.to_dict(), ensure_ascii=False)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?)",
+                    (dump_id, dump_path, report_json, time.time())
+                )
+                self._conn.commit()
+            LoggerManager.debug(f"分析报告已保存: {dump_path or dump_id}")
+        except Exception as e:
+            LoggerManager.warning(f"保存分析报告失败: {str(e)}")
+
+    def get_report(self, dump_id: str) -> Optional[AnalysisReport]:
+        """获取转储文件的分析报告"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report FROM reports WHERE dump_id = ?",
+                (dump_id,)
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            return AnalysisReport.from_dict(json.loads(row[0]))
+        except Exception as e:
+            LoggerManager.warning(f"读取分析报告失败: {str(e)}")
+            return None
+
+    def delete_dump(self, dump_id: str):
+        """删除转储文件的全部产物"""
+        with self._lock:
+            self._conn.execute("DELETE FROM command_outputs WHERE dump_id = ?", (dump_id,))
+            self._conn.execute("DELETE FROM reports WHERE dump_id = ?", (dump_id,))
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计"""
+        with self._lock:
+            dumps = self._conn.execute("SELECT COUNT(DISTINCT dump_id) FROM command_outputs").fetchone()[0]
+            outputs = self._conn.execute("SELECT COUNT(*) FROM command_outputs").fetchone()[0]
+            reports = self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return {
+            "path": str(self.db_path),
+            "dumps": dumps,
+            "command_outputs": outputs,
+            "reports": reports
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
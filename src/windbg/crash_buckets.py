@@ -0,0 +1,267 @@
+"""崩溃分桶索引"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+from src.output.models import AnalysisReport
+from src.windbg.parser import OutputParser
+from src.windbg.result_cache import dump_identity
+
+
+class CrashBucketIndex:
+    """按崩溃签名把转储归入同一个桶
+
+    签名由异常代码和调用栈顶部 frame_count 个规范化栈帧（模块名小写、
+    去掉偏移）计算，同一缺陷在不同转储、不同构建中得到相同的签名。每个桶
+    保存第一次分析得到的 AnalysisReport，之后归入该桶的转储可以直接复用，
+    不必再调用 LLM。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            signature TEXT PRIMARY KEY,
+            exception_code TEXT NOT NULL,
+            frames TEXT NOT NULL,
+            report TEXT,
+            hits INTEGER NOT NULL DEFAULT 0,
+            reused INTEGER NOT NULL DEFAULT 0,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bucket_dumps (
+            signature TEXT NOT NULL,
+            dump_id TEXT NOT NULL,
+            dump_path TEXT,
+            seen_at REAL NOT NULL,
+            PRIMARY KEY (signature, dump_id)
+        );
+    """
+
+    # 列表查询的列，最后一列是桶内转储数
+    _BUCKET_COLUMNS = (
+        "b.signature, b.exception_code, b.frames, b.report IS NOT NULL, b.hits, b.reused, "
+        "b.first_seen, b.last_seen, "
+        "(SELECT COUNT(*) FROM bucket_dumps d WHERE d.signature = b.signature)"
+    )
+
+    def __init__(
+        self,
+        db_path: str = "~/.ai_windbg/buckets.db",
+        frame_count: int = 5,
+        reuse_reports: bool = True
+    ):
+        """初始化索引
+
+        Args:
+            db_path: 索引数据库路径
+            frame_count: 参与签名计算的栈顶帧数
+            reuse_reports: 是否为同一桶的新转储复用已有报告
+        """
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.frame_count = frame_count
+        self.reuse_reports = reuse_reports
+        self.parser = OutputParser()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+        LoggerManager.debug(f"崩溃分桶索引初始化: {self.db_path}, frame_count={frame_count}")
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> Optional["CrashBucketIndex"]:
+        """根据配置创建索引，未启用时返回 None"""
+        if not config.is_crash_bucket_enabled():
+            return None
+        try:
+            return cls(
+                config.get_crash_bucket_path(),
+                frame_count=config.get_crash_bucket_frame_count(),
+                reuse_reports=config.is_crash_bucket_reuse_enabled()
+            )
+        except Exception as e:
+            LoggerManager.warning(f"初始化崩溃分桶索引失败: {str(e)}")
+            return None
+
+    def compute_bucket(self, output: str) -> Optional[Dict[str, Any]]:
+        """计算输出所属的桶
+
+        Returns:
+            包含 signature、exception_code、frames 的字典；输出中没有异常代码
+            或调用栈时返回 None（无法可靠分桶）
+        """
+        exception = self.parser.parse_exception(output)
+        if not exception:
+            return None
+
+        frames = []
+        for frame in self.parser.parse_stack_trace(output):
+            name = f"{frame.module.lower()}!{frame.function}"
+            # 同一栈帧可能在 !analyze 输出中出现多次（STACK_TEXT、kv 等）
+            if name not in frames:
+                frames.append(name)
+            if len(frames) >= self.frame_count:
+                break
+        if not frames:
+            return None
+
+        code = exception.code.lower()
+        digest = hashlib.sha256('|'.join([code] + frames).encode('utf-8'))
+        return {
+            "signature": digest.hexdigest()[:32],
+            "exception_code": code,
+            "frames": frames
+        }
+
+    def assign(self, output: str, dump_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """把输出归入桶并记录转储
+
+        Returns:
+            桶信息（signature、exception_code、frames），桶已有报告时包含
+            report 字段；无法分桶时返回 None
+        """
+        bucket = self.compute_bucket(output)
+        if not bucket:
+            return None
+
+        dump_id = None
+        if dump_file:
+            try:
+                dump_id = dump_identity(dump_file)
+            except OSError:
+                # 转储不在本机（例如只提交了输出），按路径区分
+                dump_id = dump_file
+
+        now = time.time()
+        try:
+            with self._lock:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT INTO buckets (signature, exception_code, frames, hits, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, 1, ?, ?) "
+                        "ON CONFLICT(signature) DO UPDATE SET hits = hits + 1, last_seen = excluded.last_seen",
+                        (bucket["signature"], bucket["exception_code"], json.dumps(bucket["frames"]), now, now)
+                    )
+                    if dump_id:
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO bucket_dumps VALUES (?, ?, ?, ?)",
+                            (bucket["signature"], dump_id, dump_file, now)
+                        )
+                    row = self._conn.execute(
+                        "SELECT report FROM buckets WHERE signature = ?",
+                        (bucket["signature"],)
+                    ).fetchone()
+        except Exception as e:
+            LoggerManager.warning(f"记录崩溃分桶失败: {str(e)}")
+            return None
+
+        if row and row[0] and self.reuse_reports:
+            bucket["report"] = json.loads(row[0])
+        return bucket
+
+    def mark_reused(self, signature: str):
+        """记录一次复用桶报告（少一次 LLM 调用）"""
+        try:
+            with self._lock:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE buckets SET reused = reused + 1 WHERE signature = ?",
+                        (signature,)
+                    )
+        except Exception as e:
+            LoggerManager.warning(f"记录崩溃分桶复用失败: {str(e)}")
+
+    def set_report(self, signature: str, report: AnalysisReport):
+        """保存桶的分析报告（新的分析结果替换旧报告）"""
+        try:
+            report_json = json.dumps(report.to_dict(), ensure_ascii=False)
+            with self._lock:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE buckets SET report = ? WHERE signature = ?",
+                        (report_json, signature)
+                    )
+        except Exception as e:
+            LoggerManager.warning(f"保存崩溃分桶报告失败: {str(e)}")
+
+    @staticmethod
+    def _bucket_row_to_dict(row) -> Dict[str, Any]:
+        """把桶记录转为字典"""
+        signature, exception_code, frames, has_report, hits, reused, first_seen, last_seen, dumps = row
+        return {
+            "signature": signature,
+            "exception_code": exception_code,
+            "frames": json.loads(frames),
+            "has_report": bool(has_report),
+            "dumps": dumps,
+            "hits": hits,
+            "reused": reused,
+            "first_seen": first_seen,
+            "last_seen": last_seen
+        }
+
+    def list_buckets(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """列出桶，按转储数、出现次数从多到少排序"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._BUCKET_COLUMNS} FROM buckets b "
+                "ORDER BY 9 DESC, b.hits DESC, b.last_seen DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._bucket_row_to_dict(row) for row in rows]
+
+    def get_bucket(self, signature: str) -> Optional[Dict[str, Any]]:
+        """获取桶详情（包括转储列表和报告）"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._BUCKET_COLUMNS} FROM buckets b WHERE b.signature = ?",
+                (signature,)
+            ).fetchone()
+            if not row:
+                return None
+            report_row = self._conn.execute(
+                "SELECT report FROM buckets WHERE signature = ?", (signature,)
+            ).fetchone()
+            dump_rows = self._conn.execute(
+                "SELECT dump_id, dump_path, seen_at FROM bucket_dumps WHERE signature = ? ORDER BY seen_at",
+                (signature,)
+            ).fetchall()
+
+        bucket = self._bucket_row_to_dict(row)
+        bucket["report"] = json.loads(report_row[0]) if report_row[0] else None
+        bucket["dump_list"] = [
+            {"dump_id": dump_id, "dump_path": dump_path, "seen_at": seen_at}
+            for dump_id, dump_path, seen_at in dump_rows
+        ]
+        return bucket
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计"""
+        with self._lock:
+            buckets, hits, reused = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(reused), 0) FROM buckets"
+            ).fetchone()
+            dumps = self._conn.execute("SELECT COUNT(*) FROM bucket_dumps").fetchone()[0]
+        return {
+            "path": str(self.db_path),
+            "frame_count": self.frame_count,
+            "buckets": buckets,
+            "dumps": dumps,
+            "hits": hits,
+            "reused_reports": reused
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
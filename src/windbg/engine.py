@@ -3,11 +3,14 @@
 import subprocess
 import os
 import threading
-import queue
+import codecs
+import itertools
+import uuid
 import time
 import re
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Deque, Callable
+from collections import deque
 from dataclasses import dataclass
 
 from src.core.config import ConfigManager
@@ -23,11 +26,187 @@ class CommandResult:
     error: str = ""
     exit_code: int = 0
     command: str = ""
+    # 超时未检测到结束标记，output 只是截至超时的部分输出
+    timed_out: bool = False
+
+
+def resolve_windbg_path(path: str) -> str:
+    """解析 cdb.exe 路径"""
+    # 如果配置的路径存在，直接使用
+    if Path(path).exists():
+        return path
+
+    # 尝试在 PATH 中查找
+    for search_path in os.environ["PATH"].split(os.pathsep):
+        full_path = Path(search_path) / "cdb.exe"
+        if full_path.exists():
+            return str(full_path)
+
+    # 尝试常见的安装路径
+    common_paths = [
+        "C:\\Program Files (x86)\\Windows Kits\\10\\Debuggers\\x64\\cdb.exe",
+        "C:\\Program Files\\Windows Kits\\10\\Debuggers\\x64\\cdb.exe",
+        "C:\\Program Files (x86)\\Windows Kits\\8.1\\Debuggers\\x64\\cdb.exe",
+    ]
+
+    for common_path in common_paths:
+        if Path(common_path).exists():
+            return common_path
+
+    return "cdb.exe"
+
+
+def check_windbg_availability(windbg_path: str):
+    """检查 cdb.exe 是否可以运行"""
+    try:
+        result = subprocess.run(
+            [windbg_path, "-version"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            encoding='utf-8',
+            errors='ignore'
+        )
+        if result.returncode == 0:
+            LoggerManager.info(f"WinDBG 引擎已就绪: {windbg_path}")
+        else:
+            LoggerManager.warning(f"WinDBG 版本检查失败: {result.stderr}")
+    except FileNotFoundError:
+        LoggerManager.error(f"未找到 WinDBG: {windbg_path}")
+    except Exception as e:
+        LoggerManager.warning(f"WinDBG 可用性检查失败: {str(e)}")
+
+
+def validate_dump_path(dump_path: str):
+    """检查转储文件路径"""
+    if not Path(dump_path).exists():
+        raise DumpLoadError(f"转储文件不存在: {dump_path}")
+
+    if not dump_path.endswith('.dmp'):
+        raise DumpLoadError("文件扩展名必须是 .dmp")
+
+
+class _OutputWaiter:
+    """等待输出中出现结束标志
+
+    读取线程把收到的输出块追加到列表中，只在新到达的尾部（加上上一块末尾
+    可能被截断的部分）中查找结束标志，找到后通过 Event 通知等待方。
+    """
+
+    # 为跨块匹配保留的尾部长度
+    tail_size = 64
+
+    def __init__(self):
+        """初始化等待器"""
+        self.chunks: List[str] = []
+        self.done = threading.Event()
+        self.eof = False
+        # 调用方已放弃等待（超时），输出仍需消费但不再保存
+        self.abandoned = False
+        # 后台命令（如预热）的输出不交给实时输出回调
+        self.quiet = False
+        self.last_activity = time.time()
+        self._tail = ""
+        self._trim = 0
+
+    def _match(self, window: str) -> Optional[Tuple[int, int]]:
+        """在窗口中查找结束标志，返回 (开始, 结束) 位置"""
+        raise NotImplementedError
+
+    def feed(self, text: str) -> Optional[str]:
+        """追加输出块
+
+        Returns:
+            未检测到结束标志时返回 None；否则返回结束标志之后的剩余输出，
+            剩余部分属于下一个等待器。
+        """
+        self.last_activity = time.time()
+        window = self._tail + text
+        match = self._match(window)
+        if match is None:
+            if not self.abandoned:
+                self.chunks.append(text)
+            self._tail = window[-self.tail_size:]
+            return None
+
+        cut = match[0] - len(self._tail)
+        if cut >= 0:
+            self.chunks.append(text[:cut])
+        else:
+            # 结束标志从上一块末尾开始，需要去掉已收集的部分
+            self._trim = -cut
+        self.done.set()
+        return window[match[1]:]
+
+    def close(self):
+        """会话结束，唤醒等待方"""
+        self.eof = True
+        self.done.set()
+
+    def wait(self, timeout: float) -> bool:
+        """等待结束标志"""
+        return self.done.wait(timeout)
+
+    def get_output(self) -> str:
+        """获取已收集的输出"""
+        output = "".join(self.chunks)
+        if self._trim:
+            output = output[:-self._trim]
+        return output
+
+
+class _CommandWaiter(_OutputWaiter):
+    """等待命令结束标记"""
+
+    # 流水线中上一条命令结束后 cdb 打印的提示符
+    LEADING_PROMPT_PATTERN = re.compile(r'^\s*\d+:(?:\d+|\s*kd)>[ \t]*\n?')
+
+    def __init__(self, command: str, marker: str):
+        """初始化命令等待器"""
+        super().__init__()
+        self.command = command
+        self.marker = marker
+        self.tail_size = max(len(marker) - 1, 1)
+
+    def _match(self, window: str) -> Optional[Tuple[int, int]]:
+        pos = window.find(self.marker)
+        if pos == -1:
+            return None
+        return pos, pos + len(self.marker)
+
+    def get_output(self) -> str:
+        """获取命令输出，去掉前导提示符和其他命令残留的结束标记"""
+        output = self.LEADING_PROMPT_PATTERN.sub('', super().get_output(), count=1)
+        if WinDBGEngine.MARKER_PREFIX in output:
+            output = '\n'.join(
+                line for line in output.split('\n')
+                if WinDBGEngine.MARKER_PREFIX not in line
+            )
+        return output
+
+
+class _PromptWaiter(_OutputWaiter):
+    """等待 cdb 提示符"""
+
+    PROMPT_PATTERN = re.compile(r'\d+:\d+>|\d+:\s*kd>')
+
+    def _match(self, window: str) -> Optional[Tuple[int, int]]:
+        match = self.PROMPT_PATTERN.search(window)
+        if match is None:
+            return None
+        return match.start(), match.end()
 
 
 class WinDBGEngine:
     """WinDBG 调试引擎封装类"""
 
+    # 命令结束标记前缀，每条命令附加唯一的序号与随机数
+    MARKER_PREFIX = "AIWINDBG_DONE_"
+    # 单条命令的最长等待时间（秒）
+    COMMAND_TIMEOUT = 120
+    # 每次从管道读取的最大字节数
+    READ_CHUNK_SIZE = 65536
+
     def __init__(self, config: Optional[ConfigManager] = None):
         """初始化 WinDBG 引擎"""
         self.config = config or ConfigManager()
@@ -38,12 +217,22 @@ class WinDBGEngine:
         
         # 持久会话相关
         self._process: Optional[subprocess.Popen] = None
-        self._output_queue: queue.Queue = queue.Queue()
         self._output_thread: Optional[threading.Thread] = None
         self._is_running = False
         self._lock = threading.Lock()
+        # 按发送顺序等待输出的命令（支持流水线）
+        self._waiters: Deque[_OutputWaiter] = deque()
+        self._waiter_lock = threading.Lock()
+        self._marker_counter = itertools.count(1)
+        self._marker_nonce = uuid.uuid4().hex[:8]
+        # 每次启动 cdb 进程递增，调用方据此判断调试上下文是否已重置
+        self.session_id = 0
+        # 已设置转储文件但推迟到第一条命令时才启动 cdb
+        self._start_deferred = False
         # 输出回调函数
         self._output_callback: Optional[callable] = None
+        # 输出监听器：按读取块接收完整的行，参数为 (文本, 所属命令)
+        self._output_listeners: List[Callable[[str, Optional[str]], None]] = []
         
         self._check_availability()
 
@@ -51,69 +240,103 @@ class WinDBGEngine:
         """设置输出回调函数，用于实时打印输出"""
         self._output_callback = callback
 
+    def add_output_listener(self, listener: Callable[[str, Optional[str]], None]):
+        """添加输出监听器（在读取线程中调用，需自行保证线程安全且不阻塞）"""
+        self._output_listeners.append(listener)
+
+    def remove_output_listener(self, listener: Callable[[str, Optional[str]], None]):
+        """移除输出监听器"""
+        if listener in self._output_listeners:
+            self._output_listeners.remove(listener)
+
     def _get_windbg_path(self) -> str:
         """获取 WinDBG 路径"""
-        path = self.config.get_windbg_path()
+        return resolve_windbg_path(self.config.get_windbg_path())
 
-        # 如果配置的路径存在，直接使用
-        if Path(path).exists():
-            return path
+    def _check_availability(self):
+        """检查 WinDBG 是否可用"""
+        check_windbg_availability(self.windbg_path)
 
-        # 尝试在 PATH 中查找
-        for search_path in os.environ["PATH"].split(os.pathsep):
-            full_path = Path(search_path) / "cdb.exe"
-            if full_path.exists():
-                return str(full_path)
+    def _read_output(self, process: subprocess.Popen):
+        """后台线程读取输出
 
-        # 尝试常见的安装路径
-        common_paths = [
-            "C:\\Program Files (x86)\\Windows Kits\\10\\Debuggers\\x64\\cdb.exe",
-            "C:\\Program Files\\Windows Kits\\10\\Debuggers\\x64\\cdb.exe",
-            "C:\\Program Files (x86)\\Windows Kits\\8.1\\Debuggers\\x64\\cdb.exe",
-        ]
+        按块读取管道（不等待换行，提示符也能及时到达），把输出交给当前等待器，
+        完整的行再交给输出回调用于实时显示。
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        pending_line = ""
 
-        for common_path in common_paths:
-            if Path(common_path).exists():
-                return common_path
+        while self._is_running:
+            try:
+                data = process.stdout.read1(self.READ_CHUNK_SIZE)
+            except Exception as e:
+                LoggerManager.error(f"读取输出错误: {str(e)}")
+                break
 
-        return "cdb.exe"
+            if not data:
+                break
 
-    def _check_availability(self):
-        """检查 WinDBG 是否可用"""
-        try:
-            result = subprocess.run(
-                [self.windbg_path, "-version"],
-                capture_output=True,
-                text=True,
-                timeout=5,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            if result.returncode == 0:
-                LoggerManager.info(f"WinDBG 引擎已就绪: {self.windbg_path}")
-            else:
-                LoggerManager.warning(f"WinDBG 版本检查失败: {result.stderr}")
-        except FileNotFoundError:
-            LoggerManager.error(f"未找到 WinDBG: {self.windbg_path}")
-        except Exception as e:
-            LoggerManager.warning(f"WinDBG 可用性检查失败: {str(e)}")
+            text = decoder.decode(data).replace('\r', '')
+            if not text:
+                continue
 
-    def _read_output(self):
-        """后台线程读取输出"""
-        while self._is_running and self._process and self._process.poll() is None:
-            try:
-                line = self._process.stdout.readline()
-                if line:
-                    self._output_queue.put(line)
-                    # 如果有回调函数，实时调用
-                    if self._output_callback:
+            # 按顺序分发给等待器：结束标记之后的输出属于下一条命令
+            with self._waiter_lock:
+                head = self._waiters[0] if self._waiters else None
+                quiet = head is not None and head.quiet
+                command = getattr(head, 'command', None)
+                remaining = text
+                while remaining and self._waiters:
+                    remaining = self._waiters[0].feed(remaining)
+                    if remaining is None:
+                        break
+                    self._waiters.popleft()
+
+            # 如果有回调函数，按行实时调用；监听器按块接收
+            if (self._output_callback or self._output_listeners) and not quiet:
+                lines = (pending_line + text).split('\n')
+                pending_line = lines.pop()
+                lines = [line for line in lines if self.MARKER_PREFIX not in line]
+                if self._output_callback:
+                    for line in lines:
                         try:
-                            self._output_callback(line)
+                            self._output_callback(line + '\n')
                         except Exception as e:
                             LoggerManager.error(f"输出回调错误: {str(e)}")
-            except Exception as e:
-                LoggerManager.error(f"读取输出错误: {str(e)}")
-                break
+                if lines:
+                    block = '\n'.join(lines) + '\n'
+                    for listener in list(self._output_listeners):
+                        try:
+                            listener(block, command)
+                        except Exception as e:
+                            LoggerManager.error(f"输出监听器错误: {str(e)}")
+
+        # 进程退出，唤醒仍在等待的命令
+        with self._waiter_lock:
+            while self._waiters:
+                self._waiters.popleft().close()
+
+    def _add_waiters(self, waiters: List[_OutputWaiter]):
+        """注册等待器（必须在写入命令之前调用）"""
+        with self._waiter_lock:
+            self._waiters.extend(waiters)
+
+    def _clear_waiter(self, waiter: _OutputWaiter):
+        """注销等待器"""
+        with self._waiter_lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _next_marker(self) -> str:
+        """生成唯一的命令结束标记"""
+        return f"{self.MARKER_PREFIX}{self._marker_nonce}_{next(self._marker_counter)}"
+
+    def _write_stdin(self, text: str):
+        """向 cdb 写入输入"""
+        self._process.stdin.write(text.encode('utf-8'))
+        self._process.stdin.flush()
 
     def _start_session(self):
         """启动持久会话"""
@@ -132,28 +355,30 @@ class WinDBGEngine:
 
             LoggerManager.debug(f"启动 cdb 会话: {' '.join(cmd)}")
 
-            # 启动进程
+            # 启动进程（二进制管道，由读取线程按块解码）
             self._process = subprocess.Popen(
                 cmd,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                bufsize=1,  # 行缓冲
-                universal_newlines=True
+                stderr=subprocess.STDOUT
             )
 
             self._is_running = True
-            self._output_queue = queue.Queue()
 
-            # 启动输出读取线程
-            self._output_thread = threading.Thread(target=self._read_output, daemon=True)
+            # 先注册提示符等待器，再启动输出读取线程
+            waiter = _PromptWaiter()
+            self._add_waiters([waiter])
+            self._output_thread = threading.Thread(
+                target=self._read_output,
+                args=(self._process,),
+                daemon=True
+            )
             self._output_thread.start()
 
             # 等待初始化完成
-            self._wait_for_prompt()
+            self._wait_for_prompt(waiter)
+            self.session_id += 1
+            self._start_deferred = False
 
             LoggerManager.info("cdb 持久会话已启动")
 
@@ -164,98 +389,108 @@ class WinDBGEngine:
                 self._process = None
             raise WinDBGError(f"启动会话失败: {str(e)}")
 
-    def _wait_for_prompt(self, timeout: int = 60):
+    def _wait_for_prompt(self, waiter: _PromptWaiter, timeout: int = 60):
         """等待提示符出现"""
-        output = ""
         start_time = time.time()
-        last_output_time = start_time
 
         LoggerManager.debug(f"开始等待 cdb 提示符，超时时间: {timeout} 秒")
 
         while time.time() - start_time < timeout:
-            try:
-                line = self._output_queue.get(timeout=0.1)
-                output += line
-                last_output_time = time.time()
-                
-                # 检查各种可能的提示符格式
-                if '>' in output:
-                    # 检查常见的 cdb 提示符格式
-                    if re.search(r'\d+:\d+>', output) or re.search(r'\d+:\s*kd>', output):
-                        LoggerManager.debug(f"检测到 cdb 提示符")
-                        return True
-                
-                # 定期输出调试信息
-                if len(output) > 0 and len(output) % 500 == 0:
-                    LoggerManager.debug(f"已接收 {len(output)} 字符输出")
-                    
-            except queue.Empty:
-                # 如果超过 5 秒没有新输出，可能已经准备好了
-                if time.time() - last_output_time > 5 and '>' in output:
-                    LoggerManager.debug(f"输出已稳定，检测到提示符")
-                    return True
-                continue
+            if waiter.wait(0.5):
+                if waiter.eof:
+                    break
+                LoggerManager.debug("检测到 cdb 提示符")
+                return True
+
+            # 如果超过 5 秒没有新输出，可能已经准备好了
+            if time.time() - waiter.last_activity > 5 and '>' in waiter.get_output()[-100:]:
+                self._clear_waiter(waiter)
+                LoggerManager.debug("输出已稳定，检测到提示符")
+                return True
+
+        self._clear_waiter(waiter)
 
         # 输出已接收的内容用于调试
+        output = waiter.get_output()
         LoggerManager.error(f"等待提示符超时。已接收输出长度: {len(output)}")
-        LoggerManager.debug(f"已接收输出内容:\n{output[-1000:] if len(output) > 1000 else output}")
+        LoggerManager.debug(f"已接收输出内容:\n{output[-1000:]}")
         raise WinDBGError("等待提示符超时")
 
-    def _send_command(self, command: str) -> str:
-        """发送命令并获取输出"""
+    def _send_commands(self, commands: List[str], quiet: bool = False) -> List[CommandResult]:
+        """以流水线方式发送多条命令并按顺序收集输出
+
+        每条命令附加唯一的结束标记，所有命令一次性写入 cdb 的标准输入，
+        读取线程依据各自的标记把输出拆分给对应的等待器。超时的命令保留在
+        队列中继续消费输出，避免残留输出混入后续命令。
+        """
         if not self._process or self._process.poll() is not None:
             raise CommandExecutionError("调试会话未运行")
 
+        waiters = [_CommandWaiter(command, self._next_marker()) for command in commands]
+        for waiter in waiters:
+            waiter.quiet = quiet
         try:
-            # 清空输出队列
-            while not self._output_queue.empty():
-                try:
-                    self._output_queue.get_nowait()
-                except queue.Empty:
-                    break
+            # 先注册等待器再发送命令，避免错过输出
+            self._add_waiters(waiters)
+            script = ''.join(
+                f"{waiter.command}; .echo {waiter.marker}\n" for waiter in waiters
+            )
+            self._write_stdin(script)
+        except Exception as e:
+            for waiter in waiters:
+                self._clear_waiter(waiter)
+            raise CommandExecutionError(f"发送命令失败: {str(e)}")
 
-            # 在命令末尾添加标记，用于检测命令完成
-            full_command = command + '; .echo DoneDoneDone'
+        results = []
+        timed_out = False
+        for waiter in waiters:
+            if timed_out:
+                waiter.abandoned = True
+                results.append(CommandResult(
+                    success=False,
+                    output="",
+                    error="前序命令执行超时，未等待该命令结果",
+                    exit_code=-1,
+                    command=waiter.command
+                ))
+                continue
 
-            # 发送命令
-            self._process.stdin.write(full_command + '\n')
-            self._process.stdin.flush()
+            if not waiter.wait(self.COMMAND_TIMEOUT):
+                waiter.abandoned = True
+                timed_out = True
+                LoggerManager.warning(f"命令执行超时（{self.COMMAND_TIMEOUT}秒），未检测到结束标记: {waiter.command}")
+                results.append(CommandResult(
+                    success=True,
+                    output=waiter.get_output(),
+                    command=waiter.command,
+                    timed_out=True
+                ))
+                continue
 
-            # 收集输出
-            output = ""
-            start_time = time.time()
-            total_timeout = 120  # 总超时时间为 2 分钟
+            if waiter.eof:
+                raise CommandExecutionError("调试会话已退出")
 
-            while time.time() - start_time < total_timeout:
-                try:
-                    line = self._output_queue.get(timeout=0.1)
-                    output += line
-
-                    # 检查是否包含 DoneDoneDone 标记，立即结束
-                    if 'DoneDoneDone' in output:
-                        marker_pos = output.find('DoneDoneDone')
-                        # 移除 DoneDoneDone 标记及其之后的内容
-                        if marker_pos > 0:
-                            output = output[:marker_pos].rstrip()
-                        LoggerManager.debug(f"检测到 DoneDoneDone 标记，命令执行完成，输出长度: {len(output)}")
-                        return output
-                except queue.Empty:
-                    continue
-
-            # 超时处理
-            LoggerManager.warning(f"命令执行超时（{total_timeout}秒），未检测到 DoneDoneDone 标记")
-            return output
+            output = waiter.get_output().rstrip()
+            LoggerManager.debug(f"检测到结束标记，命令执行完成: {waiter.command}，输出长度: {len(output)}")
+            results.append(CommandResult(
+                success=True,
+                output=output,
+                command=waiter.command
+            ))
 
-        except Exception as e:
-            raise CommandExecutionError(f"发送命令失败: {str(e)}")
+        return results
 
-    def load_dump(self, dump_path: str) -> bool:
-        """加载崩溃转储文件"""
-        if not Path(dump_path).exists():
-            raise DumpLoadError(f"转储文件不存在: {dump_path}")
+    def _send_command(self, command: str) -> str:
+        """发送命令并获取输出"""
+        return self._send_commands([command])[0].output
 
-        if not dump_path.endswith('.dmp'):
-            raise DumpLoadError("文件扩展名必须是 .dmp")
+    def load_dump(self, dump_path: str, start_session: bool = True) -> bool:
+        """加载崩溃转储文件
+
+        start_session 为 False 时只记录转储文件，cdb 在第一条需要真正执行的命令
+        到来时才启动（转储已有缓存产物时，可能完全不需要启动 cdb）。
+        """
+        validate_dump_path(dump_path)
 
         try:
             # 如果已有会话，先关闭
@@ -265,6 +500,11 @@ class WinDBGEngine:
             # 设置当前 dump 文件
             self.current_dump = dump_path
 
+            if not start_session:
+                self._start_deferred = True
+                LoggerManager.info(f"已设置转储文件，cdb 延迟启动: {dump_path}")
+                return True
+
             # 启动新会话并加载 dump
             self._start_session()
 
@@ -277,9 +517,20 @@ class WinDBGEngine:
 
     def execute_command(self, command: str) -> CommandResult:
         """执行 WinDBG 命令"""
+        return self.execute_commands([command])[0]
+
+    def execute_commands(self, commands: List[str], quiet: bool = False) -> List[CommandResult]:
+        """以流水线方式执行多条 WinDBG 命令
+
+        所有命令一次写入同一 cdb 会话，按顺序返回每条命令的结果。
+        quiet 为 True 时输出不交给实时输出回调（用于后台命令）。
+        """
         if not self.current_dump:
             raise CommandExecutionError("未加载转储文件")
 
+        if not commands:
+            return []
+
         with self._lock:
             try:
                 # 确保会话已启动
@@ -287,32 +538,28 @@ class WinDBGEngine:
                     LoggerManager.debug("会话未运行，重新启动")
                     self._start_session()
 
-                LoggerManager.debug(f"执行 WinDBG 命令: {command}")
+                LoggerManager.debug(f"执行 WinDBG 命令: {'; '.join(commands)}")
 
                 # 发送命令并获取输出
-                output = self._send_command(command)
-
-                command_result = CommandResult(
-                    success=True,
-                    output=output,
-                    error="",
-                    exit_code=0,
-                    command=command
-                )
+                results = self._send_commands(commands, quiet)
 
-                LoggerManager.debug(f"命令执行成功，输出长度: {len(command_result.output)}")
+                for result in results:
+                    LoggerManager.debug(f"命令执行完成: {result.command}，输出长度: {len(result.output)}")
 
-                return command_result
+                return results
 
             except Exception as e:
                 LoggerManager.error(f"执行命令时发生错误: {str(e)}")
-                return CommandResult(
-                    success=False,
-                    output="",
-                    error=str(e),
-                    exit_code=-1,
-                    command=command
-                )
+                return [
+                    CommandResult(
+                        success=False,
+                        output="",
+                        error=str(e),
+                        exit_code=-1,
+                        command=command
+                    )
+                    for command in commands
+                ]
 
     def get_session_info(self) -> Dict[str, Any]:
         """获取当前会话信息"""
@@ -321,7 +568,8 @@ class WinDBGEngine:
             "symbol_path": self.symbol_path,
             "current_dump": self.current_dump,
             "timeout": self.timeout,
-            "is_session_active": self._process is not None and self._process.poll() is None
+            "is_session_active": self._process is not None and self._process.poll() is None,
+            "is_start_deferred": self._start_deferred
         }
 
     def close(self):
@@ -332,8 +580,7 @@ class WinDBGEngine:
             if self._process:
                 try:
                     # 尝试优雅退出
-                    self._process.stdin.write('q\n')
-                    self._process.stdin.flush()
+                    self._write_stdin('q\n')
                     self._process.wait(timeout=2)
                 except:
                     try:
@@ -349,6 +596,7 @@ class WinDBGEngine:
                 self._output_thread = None
 
             self.current_dump = None
+            self._start_deferred = False
             LoggerManager.info("WinDBG 会话已关闭")
 
     def is_available(self) -> bool:
@@ -357,7 +605,9 @@ class WinDBGEngine:
 
     def is_dump_loaded(self) -> bool:
         """检查是否已加载转储文件"""
-        return self.current_dump is not None and self._process is not None and self._process.poll() is None
+        if self.current_dump is None:
+            return False
+        return self._start_deferred or (self._process is not None and self._process.poll() is None)
 
     def is_session_active(self) -> bool:
         """检查会话是否活跃"""
@@ -5,6 +5,11 @@ from typing import Optional, List
 from src.windbg.engine import WinDBGEngine, CommandResult
 from src.windbg.commands_map import COMMAND_MAP
 from src.windbg.parser import OutputParser
+from src.windbg.result_cache import CommandResultCache, is_cacheable_command, normalize_command, dump_identity
+from src.windbg.artifact_store import DumpArtifactStore
+from src.windbg.warmup import WarmupRunner
+from src.windbg.scheduler import CommandScheduler, CommandPriority
+from src.output.models import AnalysisReport
 from src.core.logger import LoggerManager
 from src.core.exceptions import CommandExecutionError
 
@@ -12,10 +17,139 @@ from src.core.exceptions import CommandExecutionError
 class CommandExecutor:
     """WinDBG 命令执行器"""
 
-    def __init__(self, engine: WinDBGEngine):
+    def __init__(
+        self,
+        engine: WinDBGEngine,
+        result_cache: Optional[CommandResultCache] = None,
+        artifact_store: Optional[DumpArtifactStore] = None,
+        warmup_commands: Optional[List[str]] = None
+    ):
         """初始化命令执行器"""
         self.engine = engine
         self.parser = OutputParser()
+        self.result_cache = result_cache
+        self.artifact_store = artifact_store
+        # 预热结果需要写入缓存或产物存储才有意义
+        self.warmup = None
+        if warmup_commands and (result_cache or artifact_store):
+            self.warmup = WarmupRunner(self, warmup_commands)
+        # 所有调用方（CLI、Web、预热）按优先级排队使用会话
+        self.scheduler = CommandScheduler()
+        # 上下文版本：执行可能改变调试上下文的命令（如 ~2s、.frame）后递增，
+        # 使依赖当前线程/栈帧的缓存结果失效
+        self._context_epoch = 0
+        self._context_session: Optional[int] = None
+
+    def _sync_context(self):
+        """新的 cdb 进程意味着上下文已重置"""
+        if self._context_session != self.engine.session_id:
+            self._context_session = self.engine.session_id
+            self._context_epoch = 0
+
+    def _current_dump_id(self) -> Optional[str]:
+        """获取当前转储文件标识"""
+        if not self.engine.current_dump:
+            return None
+        try:
+            return dump_identity(self.engine.current_dump)
+        except OSError as e:
+            LoggerManager.warning(f"计算转储标识失败: {str(e)}")
+            return None
+
+    def load_dump(self, dump_path: str) -> bool:
+        """加载转储文件
+
+        产物存储中已有该转储的记录时推迟启动 cdb，之前执行过的命令直接从
+        缓存和产物存储返回，只有遇到新命令时才真正启动调试会话。
+        """
+        start_session = True
+        if self.artifact_store:
+            try:
+                start_session = not self.artifact_store.has_artifacts(dump_identity(dump_path))
+            except OSError:
+                pass
+
+        if self.warmup:
+            self.warmup.cancel()
+        loaded = self.engine.load_dump(dump_path, start_session=start_session)
+        if loaded and self.warmup:
+            self.warmup.start(dump_path)
+        return loaded
+
+    def _get_cached(self, command: str) -> Optional[CommandResult]:
+        """从缓存或产物存储获取命令结果"""
+        if not (self.result_cache or self.artifact_store) or not is_cacheable_command(command):
+            return None
+        self._sync_context()
+        dump_id = self._current_dump_id()
+        if dump_id is None:
+            return None
+
+        output = None
+        key = None
+        if self.result_cache:
+            key = CommandResultCache.make_key(dump_id, self.engine.symbol_path, command, self._context_epoch)
+            output = self.result_cache.get(key)
+
+        # 产物存储只保存初始上下文的结果
+        if output is None and self.artifact_store and self._context_epoch == 0:
+            output = self.artifact_store.get_command_output(
+                dump_id, self.engine.symbol_path, normalize_command(command)
+            )
+            if output is not None and key is not None:
+                self.result_cache.set(key, output)
+
+        if output is None:
+            return None
+        LoggerManager.debug(f"使用缓存的命令结果: {command}")
+        return CommandResult(success=True, output=output, command=command)
+
+    def _record_result(self, result: CommandResult):
+        """缓存命令结果，或在上下文可能变化时递增上下文版本"""
+        if not (self.result_cache or self.artifact_store):
+            return
+        self._sync_context()
+        if not is_cacheable_command(result.command):
+            self._context_epoch += 1
+            return
+        # 失败或超时（输出不完整）的结果不缓存也不保存
+        if not result.success or result.timed_out:
+            return
+
+        dump_id = self._current_dump_id()
+        if dump_id is None:
+            return
+
+        # 只有初始上下文的结果可以跨会话复用
+        persist = self._context_epoch == 0
+        if self.result_cache:
+            key = CommandResultCache.make_key(dump_id, self.engine.symbol_path, result.command, self._context_epoch)
+            self.result_cache.set(key, result.output, persist=persist)
+        if self.artifact_store and persist:
+            parsed = self.parse_result(result)
+            parsed.pop('raw_output')
+            self.artifact_store.save_command_output(
+                dump_id,
+                self.engine.symbol_path,
+                normalize_command(result.command),
+                result.output,
+                parsed
+            )
+
+    def save_report(self, report: AnalysisReport) -> bool:
+        """把分析报告保存到当前转储文件的产物中"""
+        dump_id = self._current_dump_id() if self.artifact_store else None
+        if dump_id is None:
+            return False
+        self.artifact_store.save_report(dump_id, report, self.engine.current_dump)
+        return True
+
+    def get_saved_report(self) -> Optional[AnalysisReport]:
+        """获取当前转储文件已保存的分析报告"""
+        dump_id = self._current_dump_id() if self.artifact_store else None
+        if dump_id is None:
+            return None
+        return self.artifact_store.get_report(dump_id)
 
     def analyze_crash(self, verbose: bool = True) -> CommandResult:
         """执行崩溃分析 !analyze -v"""
@@ -71,21 +205,112 @@ class CommandExecutor:
         """获取符号路径"""
         return self.execute(".sympath")
 
-    def execute(self, command: str) -> CommandResult:
-        """执行自定义命令"""
+    def execute(
+        self,
+        command: str,
+        priority: CommandPriority = CommandPriority.INTERACTIVE,
+        timeout: Optional[float] = None
+    ) -> CommandResult:
+        """执行自定义命令
+
+        Args:
+            command: 命令
+            priority: 调度优先级
+            timeout: 排队截止时间（秒），超时仍未开始执行则失败
+        """
         try:
+            return self._execute(command, priority, timeout)
+
+        except Exception as e:
+            LoggerManager.error(f"执行命令时发生错误: {str(e)}")
+            raise
+
+    def _execute(
+        self,
+        command: str,
+        priority: CommandPriority,
+        timeout: Optional[float]
+    ) -> CommandResult:
+        """执行单条命令（优先使用缓存）"""
+        cached = self._get_cached(command)
+        if cached is not None:
+            return cached
+
+        with self.scheduler.slot(priority, command, timeout):
+            # 等待期间其他命令（如预热）可能已经缓存了结果
+            cached = self._get_cached(command)
+            if cached is not None:
+                return cached
+
             LoggerManager.info(f"执行命令: {command}")
             result = self.engine.execute_command(command)
 
             if not result.success:
                 LoggerManager.error(f"命令执行失败: {result.error}")
+                self._record_result(result)
                 raise CommandExecutionError(result.error)
 
+            self._record_result(result)
             return result
 
-        except Exception as e:
-            LoggerManager.error(f"执行命令时发生错误: {str(e)}")
-            raise
+    def execute_batch(
+        self,
+        commands: List[str],
+        priority: CommandPriority = CommandPriority.BATCH,
+        timeout: Optional[float] = None
+    ) -> List[CommandResult]:
+        """批量执行命令
+
+        所有命令通过持久 cdb 会话一次性流水线发送，按顺序返回每条命令的结果。
+        单条命令失败不会中断整个批次，由调用方检查各结果的 success 字段。
+        """
+        if not commands:
+            return []
+
+        return self._execute_batch(commands, priority, timeout)
+
+    def _get_cached_prefix(self, commands: List[str]) -> List[CommandResult]:
+        """获取批次开头连续命中缓存的结果
+
+        只有第一条未命中（可能改变上下文）的命令之前的命令可以直接使用缓存。
+        """
+        cached_results = []
+        for command in commands:
+            cached = self._get_cached(command)
+            if cached is None:
+                break
+            cached_results.append(cached)
+        return cached_results
+
+    def _execute_batch(
+        self,
+        commands: List[str],
+        priority: CommandPriority,
+        timeout: Optional[float] = None,
+        quiet: bool = False
+    ) -> List[CommandResult]:
+        """批量执行命令（优先使用缓存）"""
+        cached_results = self._get_cached_prefix(commands)
+        if len(cached_results) == len(commands):
+            return cached_results
+
+        with self.scheduler.slot(priority, '; '.join(commands), timeout):
+            # 等待期间其他命令（如预热）可能已经缓存了结果
+            cached_results = self._get_cached_prefix(commands)
+            pending = commands[len(cached_results):]
+            if not pending:
+                return cached_results
+
+            LoggerManager.info(f"批量执行 {len(pending)} 条命令: {'; '.join(pending)}")
+            results = self.engine.execute_commands(pending, quiet=quiet)
+
+            # 占用会话期间记录，保证上下文版本与命令的执行顺序一致
+            for result in results:
+                if not result.success:
+                    LoggerManager.error(f"命令执行失败: {result.command}, {result.error}")
+                self._record_result(result)
+
+        return cached_results + results
 
     def execute_by_alias(self, alias: str, **kwargs) -> CommandResult:
         """通过别名执行命令"""
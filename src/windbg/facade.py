@@ -0,0 +1,117 @@
+"""WinDBG 引擎的 asyncio 门面"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, TypeVar
+
+from src.windbg.engine import WinDBGEngine, CommandResult
+from src.windbg.executor import CommandExecutor
+from src.windbg.pool import DebuggerPool
+from src.core.logger import LoggerManager
+
+
+T = TypeVar("T")
+
+
+class AsyncEngineFacade:
+    """WinDBG 引擎的 asyncio 门面
+
+    cdb 的读写都是阻塞操作（加载转储、!analyze -v 可能耗时数十秒），
+    门面把它们放到专用线程池中执行，Web 层只需 await，不会阻塞事件循环。
+    所有命令都经过 CommandExecutor（结果缓存、产物存储、调度优先级、预热），
+    与 CLI 和分析接口使用同一个会话。
+    """
+
+    def __init__(
+        self,
+        engine: WinDBGEngine,
+        executor: CommandExecutor,
+        debugger_pool: Optional[DebuggerPool] = None,
+        max_workers: Optional[int] = None
+    ):
+        """初始化门面"""
+        self.engine = engine
+        self.executor = executor
+        self.debugger_pool = debugger_pool
+
+        # 共享会话一个线程，会话池中每个会话一个线程，另留一个给关闭等操作
+        if max_workers is None:
+            max_workers = (debugger_pool.max_size if debugger_pool else 0) + 2
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="windbg-io"
+        )
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._thread_pool,
+            functools.partial(func, *args, **kwargs)
+        )
+
+    async def load_dump(self, dump_path: str) -> bool:
+        """加载转储文件"""
+        return await self._run(self.executor.load_dump, dump_path)
+
+    async def execute(self, command: str, timeout: Optional[float] = None) -> CommandResult:
+        """在共享会话中执行命令（交互优先级）"""
+        return await self._run(self.executor.execute, command, timeout=timeout)
+
+    async def execute_batch(self, commands: List[str], timeout: Optional[float] = None) -> List[CommandResult]:
+        """在共享会话中批量执行命令（批量优先级）"""
+        return await self._run(self.executor.execute_batch, commands, timeout=timeout)
+
+    def _execute_pooled(self, dump_path: str, commands: List[str]) -> List[CommandResult]:
+        """在会话池中执行命令（在线程池中调用）"""
+        with self.debugger_pool.session(dump_path) as pooled:
+            if len(commands) == 1:
+                return [pooled.executor.execute(commands[0])]
+            return pooled.executor.execute_batch(commands)
+
+    async def execute_pooled(self, dump_path: str, command: str) -> CommandResult:
+        """在指定转储文件的池化会话中执行命令"""
+        results = await self._run(self._execute_pooled, dump_path, [command])
+        return results[0]
+
+    async def execute_pooled_batch(self, dump_path: str, commands: List[str]) -> List[CommandResult]:
+        """在指定转储文件的池化会话中批量执行命令"""
+        return await self._run(self._execute_pooled, dump_path, commands)
+
+    async def close(self):
+        """关闭共享会话"""
+        await self._run(self.engine.close)
+
+    def is_available(self) -> bool:
+        """检查 WinDBG 是否可用"""
+        return self.engine.is_available()
+
+    def is_dump_loaded(self) -> bool:
+        """检查是否已加载转储文件"""
+        return self.engine.is_dump_loaded()
+
+    def get_session_pid(self) -> Optional[int]:
+        """获取共享会话的 cdb 进程 PID"""
+        process = self.engine._process
+        return process.pid if process else None
+
+    def get_scheduler_metrics(self) -> Dict[str, Any]:
+        """获取共享会话的调度指标与排队命令"""
+        return {
+            **self.executor.scheduler.get_metrics(),
+            "queue": self.executor.scheduler.get_queue()
+        }
+
+    def cancel_queued(self, ticket_id: int) -> bool:
+        """取消共享会话中排队的命令"""
+        return self.executor.scheduler.cancel(ticket_id)
+
+    def get_session_info(self) -> Dict[str, Any]:
+        """获取当前会话信息"""
+        return self.engine.get_session_info()
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._thread_pool.shutdown(wait=False)
+        LoggerManager.debug("WinDBG 门面线程池已关闭")
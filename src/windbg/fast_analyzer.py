@@ -0,0 +1,272 @@
+"""基于规则的快速崩溃分析"""
+
+import re
+from typing import Optional, Dict, Any, List, Tuple
+
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+from src.output.models import AnalysisReport, ExceptionInfo, StackFrame
+from src.windbg.commands_map import CRASH_TYPES
+from src.windbg.parser import OutputParser
+
+
+# 系统和运行库模块，栈顶位于这些模块时不能确定出错的用户代码
+SYSTEM_MODULES = {
+    "ntdll", "kernelbase", "kernel32", "ucrtbase", "ucrtbased", "msvcrt", "vcruntime140",
+    "vcruntime140_1", "vcruntime140d", "msvcp140", "msvcp140d", "user32", "win32u",
+    "gdi32", "gdi32full", "combase", "rpcrt4", "sechost", "ole32", "oleaut32",
+}
+
+# GS 安全检查失败时位于栈顶的检查函数
+GS_CHECK_FUNCTIONS = re.compile(r'gsfailure|security_check_cookie|GSHandlerCheck|failfast|fast_fail', re.IGNORECASE)
+
+
+class FastAnalyzer:
+    """常见崩溃类型的规则分析
+
+    基于 OutputParser.parse_exception 和 parse_stack_trace 识别空指针访问、
+    GS 栈保护检查失败、递归导致的栈溢出和整数除零。规则命中且置信度不低于
+    min_confidence 时在本地生成完整的 AnalysisReport，不调用 LLM；否则
+    返回 None，由 LLM 分析。
+    """
+
+    # 访问地址低于该值视为空指针（或空指针加成员偏移）
+    NULL_ADDRESS_LIMIT = 0x10000
+
+    # 同一函数在栈中出现的次数达到该值视为无限递归
+    RECURSION_THRESHOLD = 10
+
+    # 报告中保留的最大栈帧数
+    MAX_REPORT_FRAMES = 32
+
+    def __init__(self, min_confidence: float = 0.85):
+        """初始化快速分析器
+
+        Args:
+            min_confidence: 规则结果直接作为报告的最低置信度
+        """
+        self.min_confidence = min_confidence
+        self.parser = OutputParser()
+
+        self.access_pattern = re.compile(
+            r'Attempt to (read from|write to|execute) address\s+([0-9a-fA-F`]+)', re.IGNORECASE
+        )
+        self.parameter_pattern = re.compile(r'Parameter\[(\d+)\]:\s+([0-9a-fA-F`]+)')
+        self.exception_address_pattern = re.compile(r'ExceptionAddress:\s+([0-9a-fA-F`]+)')
+
+        self.attempts = 0
+        self.low_confidence = 0
+        self.rule_hits: Dict[str, int] = {}
+
+        self.rules = [
+            ("c0000005", self._null_dereference),
+            ("c0000409", self._stack_cookie_failure),
+            ("c00000fd", self._recursive_stack_overflow),
+            ("c0000094", self._divide_by_zero),
+        ]
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> Optional["FastAnalyzer"]:
+        """根据配置创建，未启用时返回 None"""
+        if not config.is_fast_analysis_enabled():
+            return None
+        return cls(config.get_fast_analysis_min_confidence())
+
+    def analyze(self, raw_output: str, command: str = "") -> Optional[AnalysisReport]:
+        """尝试用规则分析输出，无法以足够的置信度判断时返回 None"""
+        self.attempts += 1
+
+        exception = self.parser.parse_exception(raw_output)
+        if not exception:
+            return None
+
+        code = exception.code.lower().replace("0x", "").zfill(8)
+        rule = next((rule for rule_code, rule in self.rules if rule_code == code), None)
+        if rule is None:
+            return None
+
+        frames = self.parser.parse_stack_trace(self.parser.faulting_thread_output(raw_output))
+        result = rule(raw_output, frames)
+        if result is None:
+            return None
+
+        if result["confidence"] < self.min_confidence:
+            self.low_confidence += 1
+            LoggerManager.debug(f"规则 {result['crash_type']} 置信度不足: {result['confidence']}")
+            return None
+
+        self.rule_hits[result["crash_type"]] = self.rule_hits.get(result["crash_type"], 0) + 1
+        LoggerManager.info(f"规则分析命中: {result['crash_type']}，跳过 LLM")
+
+        exception_code = f"0x{code.upper()}"
+        address_match = self.exception_address_pattern.search(raw_output)
+        exception_address = address_match.group(1).replace('`', '') if address_match else exception.address
+        description = CRASH_TYPES.get(exception_code, exception.description)
+
+        return AnalysisReport(
+            summary=result["summary"],
+            crash_type=result["crash_type"],
+            exception_code=exception_code,
+            exception_address=exception_address,
+            exception_description=f"{description}: {result['detail']}",
+            call_stack=frames[:self.MAX_REPORT_FRAMES],
+            exception_info=ExceptionInfo(
+                code=exception_code,
+                description=exception.description,
+                address=exception_address
+            ),
+            root_cause=result["root_cause"],
+            suggestions=result["suggestions"],
+            confidence=result["confidence"],
+            raw_output=raw_output,
+            command=command
+        )
+
+    @staticmethod
+    def _frame_name(frame: StackFrame) -> str:
+        """栈帧的 模块!函数+偏移 形式"""
+        return f"{frame.module}!{frame.function}+{frame.offset}"
+
+    @staticmethod
+    def _is_user_frame(frame: StackFrame) -> bool:
+        """栈帧是否位于用户模块"""
+        return frame.module.lower() not in SYSTEM_MODULES
+
+    def _access(self, raw_output: str) -> Optional[Tuple[str, int]]:
+        """获取访问冲突的访问类型和地址"""
+        match = self.access_pattern.search(raw_output)
+        if match:
+            return match.group(1).lower(), int(match.group(2).replace('`', ''), 16)
+
+        # 没有 "Attempt to ..." 行时根据异常参数判断：Parameter[0] 为访问类型，Parameter[1] 为地址
+        parameters = {int(index): value for index, value in self.parameter_pattern.findall(raw_output)}
+        if 0 in parameters and 1 in parameters:
+            kind = {0: "read from", 1: "write to", 8: "execute"}.get(int(parameters[0].replace('`', ''), 16))
+            if kind:
+                return kind, int(parameters[1].replace('`', ''), 16)
+        return None
+
+    def _null_dereference(self, raw_output: str, frames: List[StackFrame]) -> Optional[Dict[str, Any]]:
+        """空指针访问：访问地址位于最低的 64KB"""
+        access = self._access(raw_output)
+        if not access or access[1] >= self.NULL_ADDRESS_LIMIT or not frames:
+            return None
+
+        kind, address = access
+        action = {"read from": "读取", "write to": "写入", "execute": "执行"}[kind]
+        top = frames[0]
+        culprit = top if self._is_user_frame(top) else next(
+            (frame for frame in frames if self._is_user_frame(frame)), None
+        )
+        if culprit is None:
+            return None
+
+        in_user_code = culprit is top
+        location = self._frame_name(culprit)
+        return {
+            "crash_type": "NULL_POINTER_DEREFERENCE",
+            "confidence": 0.95 if in_user_code else 0.75,
+            "summary": f"{location} {action}地址 0x{address:x} 时发生访问冲突（空指针解引用）",
+            "detail": f"{action}地址 0x{address:x}",
+            "root_cause": (
+                f"{location} 通过空指针访问内存，偏移 0x{address:x} 通常对应对象成员或数组元素的偏移。"
+                if in_user_code else
+                f"崩溃发生在系统模块 {top.module} 中，最近的用户代码 {location} 可能向其传入了空指针。"
+            ),
+            "suggestions": [
+                f"检查 {culprit.function} 中使用的指针在解引用前是否可能为空",
+                "确认对象的生命周期，排查已释放或未初始化的对象",
+                "在源代码中定位偏移对应的成员，补充空值检查或断言",
+            ],
+        }
+
+    def _stack_cookie_failure(self, raw_output: str, frames: List[StackFrame]) -> Optional[Dict[str, Any]]:
+        """GS 栈保护检查失败（0xC0000409 且 fast fail 代码为 2 或栈中有检查函数）"""
+        parameters = dict(self.parameter_pattern.findall(raw_output))
+        fast_fail_code = parameters.get("0", "").replace('`', '')
+        has_check_frame = any(GS_CHECK_FUNCTIONS.search(frame.function) for frame in frames)
+        mentions_cookie = "STACK_COOKIE" in raw_output or "GS_FALSE_POSITIVE" in raw_output
+
+        is_cookie_failure = has_check_frame or mentions_cookie or (fast_fail_code and int(fast_fail_code, 16) == 2)
+        if not is_cookie_failure:
+            # 0xC0000409 也用于其他 fast fail 原因，交给 LLM 判断
+            return None
+
+        victim = next(
+            (frame for frame in frames
+             if not GS_CHECK_FUNCTIONS.search(frame.function) and self._is_user_frame(frame)),
+            None
+        )
+        if victim is None:
+            return None
+
+        location = self._frame_name(victim)
+        return {
+            "crash_type": "STACK_BUFFER_OVERRUN",
+            "confidence": 0.9,
+            "summary": f"{location} 返回前的 GS 栈保护检查失败，栈上缓冲区被越界写入",
+            "detail": "栈 cookie 校验失败",
+            "root_cause": f"{victim.function} 的局部数组或结构体被越界写入，覆盖了栈上的安全 cookie。",
+            "suggestions": [
+                f"检查 {victim.function} 中对局部缓冲区的写入（strcpy、memcpy、sprintf、循环下标等）",
+                "改用带长度的安全函数（strcpy_s、memcpy_s、snprintf）",
+                "使用 AddressSanitizer 或 PageHeap 复现以定位越界写入的位置",
+            ],
+        }
+
+    def _recursive_stack_overflow(self, raw_output: str, frames: List[StackFrame]) -> Optional[Dict[str, Any]]:
+        """无限递归导致的栈溢出：同一函数在栈中反复出现"""
+        counts: Dict[Tuple[str, str], int] = {}
+        for frame in frames:
+            key = (frame.module, frame.function)
+            counts[key] = counts.get(key, 0) + 1
+        if not counts:
+            return None
+
+        (module, function), count = max(counts.items(), key=lambda item: item[1])
+        if count < self.RECURSION_THRESHOLD:
+            # 没有明显递归时可能是过大的栈上分配，交给 LLM 判断
+            return None
+
+        return {
+            "crash_type": "STACK_OVERFLOW",
+            "confidence": 0.9,
+            "summary": f"{module}!{function} 递归调用耗尽线程栈（栈中出现 {count} 次）",
+            "detail": f"{module}!{function} 递归 {count} 次以上",
+            "root_cause": f"{function} 存在无法终止的递归（或递归深度超出栈空间）。",
+            "suggestions": [
+                f"检查 {function} 的递归终止条件",
+                "将深度不可控的递归改为迭代或显式栈",
+                "排查数据中的环（循环引用的链表、树或图）",
+            ],
+        }
+
+    def _divide_by_zero(self, raw_output: str, frames: List[StackFrame]) -> Optional[Dict[str, Any]]:
+        """整数除零：栈顶位于用户代码"""
+        if not frames or not self._is_user_frame(frames[0]):
+            return None
+
+        location = self._frame_name(frames[0])
+        return {
+            "crash_type": "INTEGER_DIVIDE_BY_ZERO",
+            "confidence": 0.9,
+            "summary": f"{location} 执行整数除法时除数为 0",
+            "detail": "整数除数为 0",
+            "root_cause": f"{frames[0].function} 中的除法或取模运算没有检查除数是否为 0。",
+            "suggestions": [
+                f"在 {frames[0].function} 的除法和取模运算前检查除数",
+                "排查除数来源（输入数据、配置、计数器）为 0 的情况",
+            ],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取规则命中统计"""
+        hits = sum(self.rule_hits.values())
+        return {
+            "min_confidence": self.min_confidence,
+            "attempts": self.attempts,
+            "hits": hits,
+            "low_confidence": self.low_confidence,
+            "rule_hits": dict(self.rule_hits),
+            "hit_rate": round(hits / self.attempts, 3) if self.attempts else 0.0
+        }
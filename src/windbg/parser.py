@@ -1,5 +1,6 @@
 """WinDBG 输出解析器"""
 
+import hashlib
 import re
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
@@ -17,9 +18,9 @@ class OutputParser:
 
     def _compile_patterns(self):
         """编译正则表达式模式"""
-        # 调用栈模式
+        # 调用栈模式（k 系列命令的栈帧行，以及 !analyze STACK_TEXT 中 ": module!func" 形式的行）
         self.stack_pattern = re.compile(
-            r'([0-9a-fA-F]+)\s+([^\s!]+)!([^\s+]+)\+([0-9a-fx]+)(?:\s+\[([^\]]+)\s+@(\d+)\])?'
+            r'([0-9a-fA-F]+)\s+(?::\s+)?([^\s!(]+)!([^\s+]+)\+([0-9a-fx]+)(?:\s+\[([^\]]+)\s+@(\d+)\])?'
         )
 
         # 模块信息模式
@@ -37,6 +38,41 @@ class OutputParser:
             r'Faulting Address:\s+([0-9a-fA-F]+)'
         )
 
+        # ~* k 输出中的线程标题，# 表示发生异常的线程，. 表示当前线程
+        self.thread_header_pattern = re.compile(
+            r'^\s*([.#])?\s*\d+\s+Id:\s*[0-9a-fA-F]+\.[0-9a-fA-F]+', re.MULTILINE
+        )
+
+        # 规范化：每次运行都会变化的行（调试器横幅、时间、符号加载提示）
+        self.volatile_line_pattern = re.compile(
+            r'^(Microsoft \(R\) Windows Debugger|Copyright \(c\) Microsoft|Loading Dump File|'
+            r'Symbol search path is|Executable search path is|Windows \d+ Version|Product:|'
+            r'Built by:|Machine Name:|Debug session time:|System Uptime:|Process Uptime:|'
+            r'Loading unloaded module list|Loading Kernel Symbols|Loading User Symbols|'
+            r'Loading symbols for|Reloading current modules|ModLoad:|DBGHELP:|SYMSRV:|'
+            r'\*\*\* WARNING: Unable to verify|\*\*\* ERROR: (Symbol file|Module load)|'
+            r'Resetting default scope|[Tt]ime ?[Ss]tamp|Key\s*: Analysis\.(Elapsed|CPU|Memory|Init)|'
+            r'AIWINDBG_DONE_)',
+            re.IGNORECASE
+        )
+        self.noise_line_pattern = re.compile(r'^[\s.*]*$')
+
+        # 规范化：行内的易变字段
+        self.time_pattern = re.compile(
+            r'\b(Mon|Tue|Wed|Thu|Fri|Sat|Sun) (Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d+ '
+            r'\d{1,2}:\d{2}:\d{2}(\.\d+)? \d{4}\b[^\n]*'
+        )
+        self.thread_id_pattern = re.compile(r'\b[0-9a-fA-F]{1,8}\.[0-9a-fA-F]{1,8}\b(?=\)|:|\s)')
+        self.long_address_pattern = re.compile(r'\b[0-9a-fA-F]{8}`[0-9a-fA-F]{8}\b')
+        self.prefixed_address_pattern = re.compile(r'(?<![+\w])0x[0-9a-fA-F]{5,}\b')
+        self.bare_address_pattern = re.compile(r'(?<![+\w`])[0-9a-fA-F]{8,16}(?![\w`])')
+        # 引用了 模块!函数 或 模块+偏移 的行，其中的十六进制数是可解析为符号的地址
+        self.symbol_location_pattern = re.compile(r'\w!\w|\w\+0x[0-9a-fA-F]+')
+        # 崩溃分析命令：输出中的十六进制数都是地址（ASLR 下每次采集不同）
+        self.crash_command_pattern = re.compile(
+            r'^(!analyze|\.exr|\.ecxr|\.lastevent|(~\S*\s*)?k[bcdfnpv]*(\s|$))', re.IGNORECASE
+        )
+
     def parse_exception(self, output: str) -> Optional[ExceptionInfo]:
         """解析异常信息"""
         try:
@@ -80,6 +116,28 @@ class OutputParser:
         LoggerManager.debug(f"解析到 {len(frames)} 个栈帧")
         return frames
 
+    def faulting_thread_output(self, output: str) -> str:
+        """找出出错线程的调用栈输出
+
+        ~* k 等多线程输出按线程标题分块，优先选择标记为 # 的线程，其次是
+        标记为 . 的当前线程；没有线程标题时返回整个输出。
+        """
+        headers = list(self.thread_header_pattern.finditer(output))
+        if not headers:
+            return output
+
+        chosen = None
+        for marker in ('#', '.'):
+            chosen = next((i for i, header in enumerate(headers) if header.group(1) == marker), None)
+            if chosen is not None:
+                break
+        if chosen is None:
+            chosen = 0
+
+        start = headers[chosen].start()
+        end = headers[chosen + 1].start() if chosen + 1 < len(headers) else len(output)
+        return output[start:end]
+
     def parse_modules(self, output: str) -> List[ModuleInfo]:
         """解析模块信息"""
         modules = []
@@ -139,6 +197,57 @@ class OutputParser:
 
         return '\n'.join(cleaned_lines)
 
+    def normalize_command(self, command: str) -> str:
+        """规范化命令（合并空白、统一小写），用于缓存键"""
+        return ' '.join(command.split()).lower()
+
+    def is_crash_command(self, command: Optional[str]) -> bool:
+        """是否为崩溃分析命令（!analyze、k 系列、.exr、.ecxr、.lastevent）"""
+        return bool(command) and bool(self.crash_command_pattern.match(command.strip()))
+
+    def normalize_output(self, output: str, command: Optional[str] = None) -> str:
+        """规范化输出，去掉同一崩溃多次采集时会变化的内容
+
+        删除调试器横幅、时间、符号加载提示等行；把进程/线程 ID、时间替换为
+        占位符。崩溃分析命令的输出中绝对地址都替换为占位符；其他命令（dd、
+        r 等，十六进制数可能是数据或寄存器值）只替换引用了 模块!函数 或
+        模块+偏移 的行中的地址。相对模块或函数的偏移（module!func+0x1d）保持
+        不变，包含 code 的行（异常代码、ExceptionCode 等）不替换十六进制数。
+        """
+        normalized_lines = []
+        skip_value = False
+        crash_command = self.is_crash_command(command)
+
+        for line in output.split('\n'):
+            line = line.strip()
+            # !analyze 的耗时统计分两行输出（Key / Value），Value 行随 Key 行一起丢弃
+            if skip_value and line.startswith('Value:'):
+                skip_value = False
+                continue
+            skip_value = False
+
+            if not line or self.noise_line_pattern.match(line):
+                continue
+            if self.volatile_line_pattern.match(line):
+                skip_value = line.startswith('Key')
+                continue
+
+            line = self.time_pattern.sub('<time>', line)
+            line = self.thread_id_pattern.sub('<pid.tid>', line)
+            if crash_command or self.symbol_location_pattern.search(line):
+                line = self.long_address_pattern.sub('<addr>', line)
+                line = self.prefixed_address_pattern.sub('<addr>', line)
+                if 'code' not in line.lower():
+                    line = self.bare_address_pattern.sub('<addr>', line)
+
+            normalized_lines.append(' '.join(line.split()))
+
+        return '\n'.join(normalized_lines)
+
+    def crash_signature(self, output: str, command: Optional[str] = None) -> str:
+        """根据规范化后的输出计算崩溃签名（用作分析缓存键）"""
+        return hashlib.sha256(self.normalize_output(output, command).encode('utf-8')).hexdigest()
+
     def extract_error_messages(self, output: str) -> List[str]:
         """提取错误消息"""
         errors = []
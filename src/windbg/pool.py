@@ -0,0 +1,240 @@
+"""cdb 调试会话池"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Callable, Iterator
+
+from src.windbg.engine import WinDBGEngine
+from src.windbg.executor import CommandExecutor
+from src.windbg.result_cache import CommandResultCache
+from src.windbg.artifact_store import DumpArtifactStore
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+from src.core.exceptions import SessionError
+
+
+@dataclass
+class PooledSession:
+    """池中的单个 cdb 会话"""
+    dump_path: str
+    engine: WinDBGEngine
+    executor: CommandExecutor
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    last_used: float = field(default_factory=time.time)
+    in_use: int = 0
+
+    def is_idle(self) -> bool:
+        """会话当前是否空闲"""
+        return self.in_use == 0
+
+
+class DebuggerPool:
+    """按转储文件管理多个持久 cdb 会话
+
+    每个转储文件对应一个独立的 WinDBGEngine（独立的 cdb 进程与锁），
+    不同转储之间的命令可以并发执行。会话数达到上限时按 LRU 淘汰空闲会话。
+    """
+
+    def __init__(
+        self,
+        config: Optional[ConfigManager] = None,
+        max_size: Optional[int] = None,
+        engine_factory: Optional[Callable[[ConfigManager], WinDBGEngine]] = None,
+        result_cache: Optional[CommandResultCache] = None,
+        artifact_store: Optional[DumpArtifactStore] = None,
+        warmup_commands: Optional[List[str]] = None
+    ):
+        """初始化会话池"""
+        self.config = config or ConfigManager()
+        self.max_size = max_size or self.config.get_windbg_pool_size()
+        self._engine_factory = engine_factory or WinDBGEngine
+        self.result_cache = result_cache
+        self.artifact_store = artifact_store
+        self.warmup_commands = warmup_commands
+        self.idle_timeout = self.config.get_windbg_pool_idle_timeout()
+        self._sessions: "OrderedDict[str, PooledSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+
+    @staticmethod
+    def _make_key(dump_path: str) -> str:
+        """生成会话键"""
+        return os.path.normcase(os.path.abspath(dump_path))
+
+    def _evict_locked(self, victims: List[PooledSession]):
+        """在持有池锁时选出需要淘汰的空闲会话，追加到 victims
+
+        空闲会话不足时抛出 SessionError，已选出的会话仍在 victims 中，
+        由调用方负责关闭。
+        """
+        while len(self._sessions) >= self.max_size:
+            victim_key = next(
+                (key for key, entry in self._sessions.items() if entry.is_idle()),
+                None
+            )
+            if victim_key is None:
+                raise SessionError(f"会话池已满（{self.max_size}），且所有会话都在使用中")
+            victims.append(self._sessions.pop(victim_key))
+
+    @staticmethod
+    def _close_sessions(sessions: List[PooledSession]):
+        """关闭会话（在池锁之外调用，避免阻塞其他请求）"""
+        for entry in sessions:
+            try:
+                with entry.lock:
+                    entry.engine.close()
+                LoggerManager.info(f"会话池淘汰会话: {entry.dump_path}")
+            except Exception as e:
+                LoggerManager.warning(f"关闭会话失败: {entry.dump_path}, {str(e)}")
+
+    def acquire(self, dump_path: str) -> PooledSession:
+        """获取指定转储文件的会话，必要时启动新的 cdb 进程
+
+        调用方使用完毕后必须调用 release()，推荐使用 session() 上下文管理器。
+        """
+        key = self._make_key(dump_path)
+        victims: List[PooledSession] = []
+
+        try:
+            with self._lock:
+                entry = self._sessions.get(key)
+                if entry is None:
+                    self._evict_locked(victims)
+                    engine = self._engine_factory(self.config)
+                    entry = PooledSession(
+                        dump_path=dump_path,
+                        engine=engine,
+                        executor=CommandExecutor(
+                            engine,
+                            self.result_cache,
+                            self.artifact_store,
+                            self.warmup_commands
+                        )
+                    )
+                    self._sessions[key] = entry
+                self._sessions.move_to_end(key)
+                entry.in_use += 1
+                entry.last_used = time.time()
+        finally:
+            # 无论是否成功获取会话，已移出池的会话都要关闭
+            self._close_sessions(victims)
+
+        try:
+            # 同一转储的加载由会话锁串行化，不同转储互不阻塞
+            with entry.lock:
+                if not entry.engine.is_dump_loaded():
+                    LoggerManager.info(f"会话池启动会话: {dump_path}")
+                    entry.executor.load_dump(dump_path)
+        except Exception:
+            self.release(entry)
+            with self._lock:
+                if self._sessions.get(key) is entry and entry.is_idle():
+                    del self._sessions[key]
+            raise
+
+        return entry
+
+    def release(self, entry: PooledSession):
+        """归还会话"""
+        with self._lock:
+            entry.in_use = max(entry.in_use - 1, 0)
+            entry.last_used = time.time()
+
+    @contextmanager
+    def session(self, dump_path: str) -> Iterator[PooledSession]:
+        """以上下文管理器方式使用会话"""
+        entry = self.acquire(dump_path)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def remove(self, dump_path: str) -> bool:
+        """关闭并移除指定转储文件的会话"""
+        key = self._make_key(dump_path)
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                return False
+            if not entry.is_idle():
+                raise SessionError(f"会话正在使用中: {dump_path}")
+            del self._sessions[key]
+
+        self._close_sessions([entry])
+        return True
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """淘汰空闲时间超过阈值的会话"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, entry in self._sessions.items()
+                if entry.is_idle() and now - entry.last_used > max_idle_seconds
+            ]
+            victims = [self._sessions.pop(key) for key in expired]
+
+        self._close_sessions(victims)
+        if victims:
+            LoggerManager.info(f"会话池清理了 {len(victims)} 个空闲会话")
+        return len(victims)
+
+    def start_reaper(self, interval: float = 60):
+        """启动后台线程，定期淘汰空闲超过 idle_timeout 的会话（idle_timeout 为 0 时不启动）"""
+        if self.idle_timeout <= 0 or (self._reaper and self._reaper.is_alive()):
+            return
+
+        self._reaper_stop.clear()
+
+        def reap():
+            while not self._reaper_stop.wait(interval):
+                try:
+                    self.evict_idle(self.idle_timeout)
+                except Exception as e:
+                    LoggerManager.error(f"清理空闲会话失败: {str(e)}")
+
+        self._reaper = threading.Thread(target=reap, name="debugger-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self):
+        """停止后台清理线程"""
+        self._reaper_stop.set()
+        if self._reaper:
+            self._reaper.join(timeout=1)
+            self._reaper = None
+
+    def close_all(self):
+        """关闭所有会话"""
+        self.stop_reaper()
+        with self._lock:
+            victims = list(self._sessions.values())
+            self._sessions.clear()
+
+        self._close_sessions(victims)
+
+    def get_pool_info(self) -> Dict[str, Any]:
+        """获取会话池信息"""
+        now = time.time()
+        with self._lock:
+            sessions = [
+                {
+                    "dump_file": entry.dump_path,
+                    "in_use": entry.in_use,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                    "is_session_active": entry.engine.is_session_active()
+                }
+                for entry in self._sessions.values()
+            ]
+        return {
+            "max_size": self.max_size,
+            "idle_timeout": self.idle_timeout,
+            "size": len(sessions),
+            "sessions": sessions
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,238 @@
+"""WinDBG 命令结果缓存"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from src.core.config import ConfigManager
+from src.core.logger import LoggerManager
+from src.core.sqlite_cache import SQLiteTTLStore
+
+
+# 无副作用、结果只取决于转储内容与当前上下文的命令
+CACHEABLE_COMMAND_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in [
+        r'^!analyze(\s+-v)?$',
+        r'^\.exr\s+-1$',
+        r'^\.lastevent$',
+        r'^lm[a-z]*(\s+m\s+\S+)?$',
+        r'^~\*?$',
+        r'^~\*\s*k[bvpn]*$',
+        r'^k[bvpn]*(\s+\d+)?$',
+        r'^r$',
+        r'^vertarget$',
+        r'^!(peb|teb|gle|handle|heap\s+-s)$',
+        r'^(db|dw|dd|dq|da|du|dps|dqs)\s+[0-9a-fx`]+(\s+l\s*[0-9a-fx]+)?$',
+        r'^u[bf]?\s+\S+(\s+l\s*[0-9a-fx]+)?$',
+        r'^ln\s+\S+$',
+    ]
+]
+
+# 转储标识计算时读取的头尾字节数
+_FINGERPRINT_SAMPLE_SIZE = 1024 * 1024
+# 进程内缓存的转储标识数（按 LRU 淘汰）
+_IDENTITY_CACHE_SIZE = 256
+_identity_cache: "OrderedDict[Tuple[str, int, float], str]" = OrderedDict()
+_identity_lock = threading.Lock()
+
+
+def normalize_command(command: str) -> str:
+    """规范化命令文本（合并空白）"""
+    return ' '.join(command.split())
+
+
+def is_cacheable_command(command: str) -> bool:
+    """命令是否允许缓存"""
+    normalized = normalize_command(command)
+    return any(pattern.match(normalized) for pattern in CACHEABLE_COMMAND_PATTERNS)
+
+
+def dump_identity(dump_path: str) -> str:
+    """计算转储文件标识
+
+    对文件大小以及头尾各 1MB 内容做 SHA-256，转储复制到其他位置后标识不变，
+    又不必读取数 GB 的完整文件。结果按 (路径, 大小, 修改时间) 在进程内缓存，
+    最多保留 _IDENTITY_CACHE_SIZE 条。
+    """
+    stat = os.stat(dump_path)
+    stat_key = (os.path.abspath(dump_path), stat.st_size, stat.st_mtime)
+
+    with _identity_lock:
+        cached = _identity_cache.get(stat_key)
+        if cached:
+            _identity_cache.move_to_end(stat_key)
+            return cached
+
+    digest = hashlib.sha256(str(stat.st_size).encode())
+    with open(dump_path, 'rb') as f:
+        digest.update(f.read(_FINGERPRINT_SAMPLE_SIZE))
+        if stat.st_size > _FINGERPRINT_SAMPLE_SIZE:
+            f.seek(max(stat.st_size - _FINGERPRINT_SAMPLE_SIZE, _FINGERPRINT_SAMPLE_SIZE))
+            digest.update(f.read(_FINGERPRINT_SAMPLE_SIZE))
+    identity = digest.hexdigest()[:32]
+
+    with _identity_lock:
+        _identity_cache[stat_key] = identity
+        _identity_cache.move_to_end(stat_key)
+        while len(_identity_cache) > _IDENTITY_CACHE_SIZE:
+            _identity_cache.popitem(last=False)
+    return identity
+
+
+class CommandResultCache:
+    """命令结果缓存
+
+    内存中按 LRU 保存。可选的磁盘层是 cache_dir 下的单个 SQLite 数据库
+    （见 SQLiteTTLStore），跨会话和重启复用；条目在 ttl 秒后过期，条目数
+    超过 max_disk_entries 时删除最早过期的条目。
+    键由转储标识、符号路径、上下文版本和命令组成。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        cache_dir: Optional[str] = None,
+        ttl: int = 7 * 24 * 3600,
+        max_disk_entries: int = 5000
+    ):
+        """初始化缓存
+
+        Args:
+            max_entries: 内存层最多保存的条目数
+            cache_dir: 磁盘层目录，为 None 时只使用内存
+            ttl: 磁盘层条目的有效期（秒）
+            max_disk_entries: 磁盘层最多保存的条目数
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self._disk: Optional[SQLiteTTLStore] = None
+        if self.cache_dir:
+            try:
+                self._disk = SQLiteTTLStore(
+                    self.cache_dir / "commands.db", "command_results", "output", max_disk_entries
+                )
+            except Exception as e:
+                LoggerManager.warning(f"初始化命令缓存数据库失败，只使用内存缓存: {str(e)}")
+
+        LoggerManager.debug(f"命令结果缓存初始化: max_entries={max_entries}, cache_dir={self.cache_dir}")
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> Optional["CommandResultCache"]:
+        """根据配置创建缓存，未启用时返回 None"""
+        if not config.is_command_cache_enabled():
+            return None
+        return cls(
+            max_entries=config.get_command_cache_max_entries(),
+            cache_dir=config.get_command_cache_dir(),
+            ttl=config.get_command_cache_ttl(),
+            max_disk_entries=config.get_command_cache_max_disk_entries()
+        )
+
+    @staticmethod
+    def make_key(dump_id: str, symbol_path: str, command: str, context_epoch: int = 0) -> str:
+        """生成缓存键"""
+        raw = f"{dump_id}\0{symbol_path}\0{context_epoch}\0{normalize_command(command)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """获取缓存的命令输出"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            if self._disk is not None:
+                try:
+                    row = self._disk.get(key)
+                except Exception as e:
+                    LoggerManager.warning(f"读取命令缓存失败: {str(e)}")
+                    row = None
+
+                if row:
+                    self._remember_locked(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    LoggerManager.debug("从磁盘缓存获取命令结果")
+                    return row[0]
+
+            self.misses += 1
+        return None
+
+    def _remember_locked(self, key: str, output: str):
+        """保存到内存层并按 LRU 淘汰（持有锁时调用）"""
+        self._entries[key] = output
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key: str, output: str, persist: bool = True):
+        """缓存命令输出"""
+        with self._lock:
+            self._remember_locked(key, output)
+
+            if not persist or self._disk is None:
+                return
+
+            try:
+                self._disk.set(key, output, time.time() + self.ttl)
+            except Exception as e:
+                LoggerManager.warning(f"保存命令缓存失败: {str(e)}")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+            if self._disk is not None:
+                try:
+                    self._disk.clear()
+                except Exception as e:
+                    LoggerManager.warning(f"清空命令缓存数据库失败: {str(e)}")
+
+        LoggerManager.info("命令结果缓存已清空")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            disk_entries = None
+            if self._disk is not None:
+                try:
+                    disk_entries = self._disk.count()
+                except Exception:
+                    pass
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_enabled": self._disk is not None,
+                "disk_entries": disk_entries,
+                "max_disk_entries": self.max_disk_entries,
+                "ttl": self.ttl,
+                "evictions": self._disk.evictions if self._disk else 0,
+                "expirations": self._disk.expirations if self._disk else 0
+            }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
@@ -0,0 +1,209 @@
+"""共享 cdb 会话的命令调度器"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Optional, Dict, Any, List, Iterator
+
+from src.core.logger import LoggerManager
+from src.core.exceptions import CommandExecutionError
+
+
+class CommandPriority(IntEnum):
+    """命令优先级（数值越小越优先）"""
+    INTERACTIVE = 0
+    BATCH = 1
+    WARMUP = 2
+
+
+@dataclass
+class ScheduledCommand:
+    """排队中的命令"""
+    ticket_id: int
+    priority: CommandPriority
+    description: str
+    enqueued_at: float = field(default_factory=time.time)
+    deadline: Optional[float] = None
+    cancelled: bool = False
+    started_at: Optional[float] = None
+
+    def sort_key(self):
+        """同一优先级内按入队顺序（FIFO）"""
+        return (self.priority, self.ticket_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        now = time.time()
+        return {
+            "ticket_id": self.ticket_id,
+            "priority": self.priority.name.lower(),
+            "command": self.description,
+            "waited_seconds": round(now - self.enqueued_at, 3),
+            "deadline_in_seconds": round(self.deadline - now, 3) if self.deadline else None
+        }
+
+
+class _PriorityStats:
+    """单个优先级的统计"""
+
+    def __init__(self):
+        self.completed = 0
+        self.cancelled = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait: float):
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "expired": self.expired,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 1) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1)
+        }
+
+
+class CommandScheduler:
+    """按优先级串行分配 cdb 会话
+
+    cdb 会话同一时间只能执行一条（批）命令。所有调用方（CLI、Web API、
+    预热）通过 slot() 排队：交互命令优先于批量命令，批量命令优先于预热，
+    同一优先级先到先得。排队中的命令可以取消，超过截止时间仍未开始的
+    命令直接失败。已经开始执行的命令不会被打断。
+    """
+
+    def __init__(self):
+        """初始化调度器"""
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []
+        self._tickets: Dict[int, ScheduledCommand] = {}
+        self._running: Optional[ScheduledCommand] = None
+        self._counter = itertools.count(1)
+        self._stats = {priority: _PriorityStats() for priority in CommandPriority}
+
+    def _discard_locked(self, ticket: ScheduledCommand):
+        """从队列移除（持有锁时调用）"""
+        self._tickets.pop(ticket.ticket_id, None)
+        self._queue = [item for item in self._queue if item[-1] is not ticket]
+        heapq.heapify(self._queue)
+
+    def _is_turn_locked(self, ticket: ScheduledCommand) -> bool:
+        """是否轮到该命令执行"""
+        return self._running is None and bool(self._queue) and self._queue[0][-1] is ticket
+
+    @contextmanager
+    def slot(
+        self,
+        priority: CommandPriority = CommandPriority.INTERACTIVE,
+        description: str = "",
+        timeout: Optional[float] = None
+    ) -> Iterator[ScheduledCommand]:
+        """排队等待会话，在上下文中独占执行
+
+        Args:
+            priority: 优先级
+            description: 命令描述（用于队列展示）
+            timeout: 截止时间（秒），超时仍未开始执行则放弃
+
+        Raises:
+            CommandExecutionError: 命令被取消或等待超过截止时间
+        """
+        ticket = ScheduledCommand(
+            ticket_id=next(self._counter),
+            priority=priority,
+            description=description,
+            deadline=time.time() + timeout if timeout else None
+        )
+
+        with self._cond:
+            heapq.heappush(self._queue, (*ticket.sort_key(), ticket))
+            self._tickets[ticket.ticket_id] = ticket
+
+            while not ticket.cancelled and not self._is_turn_locked(ticket):
+                remaining = ticket.deadline - time.time() if ticket.deadline else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if ticket.cancelled or not self._is_turn_locked(ticket):
+                self._discard_locked(ticket)
+                self._cond.notify_all()
+                if ticket.cancelled:
+                    self._stats[priority].cancelled += 1
+                    raise CommandExecutionError(f"命令已取消: {description}")
+                self._stats[priority].expired += 1
+                LoggerManager.warning(f"命令排队超过截止时间（{timeout}秒）: {description}")
+                raise CommandExecutionError(f"命令排队超过截止时间（{timeout}秒）: {description}")
+
+            heapq.heappop(self._queue)
+            self._tickets.pop(ticket.ticket_id, None)
+            ticket.started_at = time.time()
+            self._running = ticket
+            self._stats[priority].record_wait(ticket.started_at - ticket.enqueued_at)
+
+        try:
+            yield ticket
+        finally:
+            with self._cond:
+                self._running = None
+                self._cond.notify_all()
+
+    def cancel(self, ticket_id: int) -> bool:
+        """取消排队中的命令"""
+        with self._cond:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None:
+                return False
+            ticket.cancelled = True
+            self._cond.notify_all()
+        LoggerManager.info(f"已取消排队命令: {ticket.description}")
+        return True
+
+    def cancel_priority(self, priority: CommandPriority) -> int:
+        """取消指定优先级的全部排队命令"""
+        with self._cond:
+            tickets = [ticket for ticket in self._tickets.values() if ticket.priority == priority]
+            for ticket in tickets:
+                ticket.cancelled = True
+            self._cond.notify_all()
+        return len(tickets)
+
+    def get_queue(self) -> List[Dict[str, Any]]:
+        """获取排队中的命令"""
+        with self._cond:
+            return [item[-1].to_dict() for item in sorted(self._queue, key=lambda item: item[:-1])]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取调度指标：各优先级的队列深度与等待时间"""
+        with self._cond:
+            depth = {priority.name.lower(): 0 for priority in CommandPriority}
+            for ticket in self._tickets.values():
+                depth[ticket.priority.name.lower()] += 1
+
+            running = None
+            if self._running:
+                running = {
+                    "ticket_id": self._running.ticket_id,
+                    "priority": self._running.priority.name.lower(),
+                    "command": self._running.description,
+                    "running_seconds": round(time.time() - self._running.started_at, 3)
+                }
+
+            return {
+                "queue_depth": sum(depth.values()),
+                "queue_depth_by_priority": depth,
+                "running": running,
+                "stats": {
+                    priority.name.lower(): stats.to_dict()
+                    for priority, stats in self._stats.items()
+                }
+            }
@@ -0,0 +1,83 @@
+"""转储加载后的命令预热"""
+
+import threading
+from typing import List, Optional, TYPE_CHECKING
+
+from src.windbg.result_cache import is_cacheable_command
+from src.windbg.scheduler import CommandPriority
+from src.core.logger import LoggerManager
+
+if TYPE_CHECKING:
+    from src.windbg.executor import CommandExecutor
+
+
+DEFAULT_WARMUP_COMMANDS = [".exr -1", "kv", "lm", "!analyze -v"]
+
+
+class WarmupRunner:
+    """在后台预先执行常用命令
+
+    转储加载后逐条执行预热命令，结果写入命令结果缓存，用户第一次执行
+    !analyze -v 时不必再等待符号加载。预热命令以最低优先级逐条排队，
+    用户命令因此总是排在剩余预热命令之前。
+    """
+
+    def __init__(self, executor: "CommandExecutor", commands: List[str]):
+        """初始化预热器"""
+        self.executor = executor
+        # 预热只能执行无副作用的命令，否则会改变用户的调试上下文
+        self.commands = []
+        for command in commands:
+            if is_cacheable_command(command):
+                self.commands.append(command)
+            else:
+                LoggerManager.warning(f"预热命令可能改变调试上下文，已忽略: {command}")
+
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+
+    def start(self, dump_path: str):
+        """开始预热"""
+        self.cancel()
+        if not self.commands:
+            return
+
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(dump_path, self._cancel),
+            name="windbg-warmup",
+            daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        """取消正在进行的预热（当前命令仍会执行完）"""
+        self._cancel.set()
+        self.executor.scheduler.cancel_priority(CommandPriority.WARMUP)
+
+    def is_running(self) -> bool:
+        """预热是否正在进行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, dump_path: str, cancel: threading.Event):
+        """依次执行预热命令"""
+        LoggerManager.info(f"开始预热: {dump_path}")
+        completed = 0
+
+        for command in self.commands:
+            if cancel.is_set() or self.executor.engine.current_dump != dump_path:
+                LoggerManager.debug("预热已取消")
+                return
+
+            try:
+                result = self.executor._execute_batch([command], CommandPriority.WARMUP, quiet=True)[0]
+                if result.success:
+                    completed += 1
+                else:
+                    LoggerManager.warning(f"预热命令失败: {command}, {result.error}")
+            except Exception as e:
+                LoggerManager.warning(f"预热命令失败: {command}, {str(e)}")
+                return
+
+        LoggerManager.info(f"预热完成: {dump_path}，{completed}/{len(self.commands)} 条命令")
@@ -13,7 +13,7 @@ async def test_async_analysis():
     
     # 初始化
     config = ConfigManager()
-    client = LLMClient(config)
+    client = LLMClient.shared(config)
     analyzer = SmartAnalyzer(client, cache_enabled=False)
     
     # 测试流式生成
@@ -0,0 +1,69 @@
+"""测试公用的夹具"""
+
+import asyncio
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.core.config import ConfigManager
+from src.llm.http_pool import HttpClientPool
+from tests.fake_openai import FakeOpenAIServer
+
+
+ROOT = Path(__file__).resolve().parent.parent
+FAKE_CDB = Path(__file__).resolve().parent / "fake_cdb.py"
+
+
+@pytest.fixture
+def fake_cdb(tmp_path, monkeypatch):
+    """模拟 cdb 的可执行文件，返回 (路径, 命令日志文件)"""
+    launcher = tmp_path / "cdb"
+    launcher.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CDB}" "$@"\n', encoding="utf-8")
+    launcher.chmod(launcher.stat().st_mode | stat.S_IXUSR)
+
+    log = tmp_path / "cdb.log"
+    monkeypatch.setenv("FAKE_CDB_LOG", str(log))
+    return launcher, log
+
+
+@pytest.fixture
+def config(tmp_path, fake_cdb):
+    """基于仓库配置的测试配置：使用模拟 cdb，所有持久化文件放在临时目录"""
+    config = ConfigManager(str(ROOT / "config.yaml"))
+    config.set("windbg.path", str(fake_cdb[0]))
+    config.set("windbg.result_cache.disk_dir", "")
+    config.set("windbg.artifact_store.path", str(tmp_path / "artifacts.db"))
+    config.set("windbg.crash_buckets.path", str(tmp_path / "buckets.db"))
+    config.set("cache.disk_dir", str(tmp_path / "cache"))
+    config.set("llm.api_key", "test-key")
+    return config
+
+
+@pytest.fixture
+def make_dump(tmp_path):
+    """创建转储文件（内容不同的 .dmp 文件）"""
+    def make(name: str = "crash.dmp", content: bytes = b"") -> str:
+        path = tmp_path / name
+        path.write_bytes(content or f"MDMP {name}".encode())
+        return str(path)
+    return make
+
+
+
+@pytest.fixture
+def fake_openai():
+    """模拟的 OpenAI 兼容服务，结束时关闭服务和共享的 HTTP 连接池"""
+    server = FakeOpenAIServer().start()
+    yield server
+    asyncio.run(HttpClientPool.aclose())
+    server.stop()
+
+
+@pytest.fixture
+def llm_config(config, fake_openai):
+    """LLM 请求发往模拟服务的测试配置"""
+    config.set("llm.provider", "deepseek")
+    config.set("llm.base_url", fake_openai.url)
+    return config
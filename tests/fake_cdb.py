@@ -0,0 +1,105 @@
+"""模拟 cdb 的脚本，用于在 Linux 上测试会话管理
+
+行为与 cdb 的控制台模式一致的部分：启动后打印横幅和提示符，逐行读取
+标准输入，执行 "<命令>; .echo <标记>" 形式的输入时先输出命令结果，再输出
+标记和下一个提示符；读到 q 时退出。
+
+命令结果：
+    .sleep <毫秒>   等待指定时间后返回（模拟耗时命令）
+    其他命令        CANNED_OUTPUT 中的固定输出，或 "executed: <命令>"
+
+环境变量 FAKE_CDB_LOG 指定文件时，每条命令追加一行 "<pid> <命令>"，
+用于统计实际执行的命令和启动的进程。环境变量 FAKE_CDB_SLOW 为
+"<命令>:<毫秒>" 时，该命令先输出第一行，等待指定时间后再输出其余部分
+（模拟输出到一半超时的命令）。
+"""
+
+import os
+import sys
+import time
+
+
+PROMPT = "0:000> "
+
+CANNED_OUTPUT = {
+    "!analyze -v": (
+        "EXCEPTION_CODE: (NTSTATUS) 0xc0000005 - Access violation\n"
+        "STACK_TEXT:\n"
+        "00000000`0014f8a0 00007ff6`12341234 : MyApp!Widget::Render+0x42\n"
+        "00000000`0014f900 00007ff6`12345678 : MyApp!main+0x20\n"
+    ),
+    "kv": (
+        " # Child-SP          RetAddr               Call Site\n"
+        "00 00000000`0014f8a0 00007ff6`12341234     MyApp!Widget::Render+0x42\n"
+        "01 00000000`0014f900 00007ff6`12345678     MyApp!main+0x20\n"
+    ),
+}
+
+
+def log(command):
+    """记录执行的命令"""
+    path = os.environ.get("FAKE_CDB_LOG")
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{os.getpid()} {command}\n")
+
+
+def read_log(path):
+    """读取命令日志，返回 [(pid, 命令)]"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [tuple(line.rstrip("\n").split(" ", 1)) for line in f]
+
+
+def run_command(command):
+    """生成命令输出"""
+    if command.startswith(".sleep"):
+        parts = command.split()
+        time.sleep(int(parts[1]) / 1000 if len(parts) > 1 else 0)
+        return ""
+    return CANNED_OUTPUT.get(command, f"executed: {command}\n")
+
+
+def main():
+    if "-version" in sys.argv:
+        print("cdb version 10.0.99999.1 (fake)")
+        return 0
+
+    dump = sys.argv[sys.argv.index("-z") + 1] if "-z" in sys.argv else ""
+    out = sys.stdout
+    out.write("Microsoft (R) Windows Debugger Version 10.0 (fake)\n")
+    out.write(f"Loading Dump File [{dump}]\n")
+    out.write(PROMPT)
+    out.flush()
+    log("<start>")
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        if line == "q":
+            break
+
+        command, _, marker = line.partition("; .echo ")
+        command = command.strip()
+        log(command)
+        output = run_command(command)
+        slow_command, _, slow_ms = os.environ.get("FAKE_CDB_SLOW", "").rpartition(":")
+        if slow_command and command == slow_command:
+            first, _, rest = output.partition("\n")
+            out.write(first + "\n")
+            out.flush()
+            time.sleep(int(slow_ms) / 1000)
+            output = rest
+        out.write(output)
+        if marker:
+            out.write(f"{marker.strip()}\n")
+        out.write(PROMPT)
+        out.flush()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""模拟 OpenAI 兼容接口的 HTTP 服务，用于测试 LLM 客户端
+
+在本机随机端口上监听，POST /chat/completions 按 enqueue 预设的顺序返回
+响应（状态码、响应头、延迟、补全内容），没有预设时立即返回固定的
+补全结果。统计建立的 TCP 连接数和收到的请求数，用于检查连接复用和重试
+次数。
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def completion_body(content: str = "ok") -> bytes:
+    """生成 chat.completion 响应"""
+    return json.dumps({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+    }).encode("utf-8")
+
+
+class FakeOpenAIServer:
+    """模拟的 OpenAI 兼容服务"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self._script = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def enqueue(self, status: int = 200, headers: dict = None, delay: float = 0.0, content: str = "ok"):
+        """预设下一个请求的响应"""
+        with self._lock:
+            self._script.append((status, headers or {}, delay, content))
+
+    def _next_response(self):
+        """取出预设的响应，没有时返回立即成功"""
+        with self._lock:
+            self.requests += 1
+            return self._script.popleft() if self._script else (200, {}, 0.0, "ok")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, headers, delay, content = server._next_response()
+                if delay:
+                    time.sleep(delay)
+
+                if status == 200:
+                    body = completion_body(content)
+                else:
+                    body = json.dumps({"error": {"message": f"status {status}", "type": "test"}}).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,72 @@
+"""相同输出的并发分析合并测试（使用模拟 OpenAI 服务）"""
+
+import asyncio
+import json
+
+from src.llm.analyzer import SmartAnalyzer
+from src.llm.client import LLMClient
+from src.llm.http_pool import HttpClientPool
+
+# 规则分析和崩溃分桶都不匹配的输出，只能由 LLM 分析
+OUTPUT = "executed: lm\nstart    end        module name\n"
+REPORT = json.dumps({"summary": "模块列表", "crash_type": "none", "confidence": 0.5}, ensure_ascii=False)
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "等待超时"
+        await asyncio.sleep(0.01)
+
+
+def test_concurrent_analyses_share_one_llm_call(llm_config, fake_openai):
+    analyzer = SmartAnalyzer(LLMClient(llm_config))
+    fake_openai.enqueue(delay=0.3, content=REPORT)
+
+    async def run():
+        try:
+            return await asyncio.gather(
+                analyzer.analyze_output_async(OUTPUT, "lm"),
+                analyzer.analyze_output_async(OUTPUT, "lm"),
+            )
+        finally:
+            await HttpClientPool.aclose()
+
+    reports = asyncio.run(run())
+
+    assert [report.summary for report in reports] == ["模块列表", "模块列表"]
+    assert fake_openai.requests == 1
+    assert analyzer.llm_analyses == 1
+    assert analyzer.coalesced_requests == 1
+
+    # 合并的结果写入了缓存，之后的请求不再调用 LLM
+    assert analyzer.analyze_output(OUTPUT, "lm").summary == "模块列表"
+    assert fake_openai.requests == 1
+    assert analyzer.get_stats()["avoided_by"]["cache"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call(llm_config, fake_openai):
+    analyzer = SmartAnalyzer(LLMClient(llm_config))
+    fake_openai.enqueue(delay=0.3, content=REPORT)
+
+    async def run():
+        try:
+            first = asyncio.ensure_future(analyzer.analyze_output_async(OUTPUT, "lm"))
+            second = asyncio.ensure_future(analyzer.analyze_output_async(OUTPUT, "lm"))
+            await wait_until(lambda: analyzer.coalesced_requests == 1)
+            flight = next(iter(analyzer._in_flight.values()))
+
+            first.cancel()
+            report = await second
+            assert first.cancelled()
+            assert not flight.task.cancelled()
+            return report
+        finally:
+            await HttpClientPool.aclose()
+
+    report = asyncio.run(run())
+
+    assert report.summary == "模块列表"
+    assert fake_openai.requests == 1
+    assert analyzer.llm_analyses == 1
@@ -0,0 +1,79 @@
+"""未配置 LLM 时，缓存、崩溃分桶和规则分析仍然可用"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.core.exceptions import AnalysisError
+from src.core.session import SessionManager
+from src.llm.analyzer import SmartAnalyzer
+from src.llm.client import LLMClient
+from src.output.models import AnalysisReport
+from src.web.app import create_app
+
+
+# 空指针读取，规则分析可以直接得出结论
+NULL_READ_OUTPUT = """EXCEPTION_RECORD:  (.exr -1)
+ExceptionAddress: 00007ff612341234 (MyApp!Widget::Render+0x0000000000000042)
+   ExceptionCode: c0000005 (Access violation)
+  ExceptionFlags: 00000000
+NumberParameters: 2
+   Parameter[0]: 0000000000000000
+   Parameter[1]: 0000000000000010
+Attempt to read from address 0000000000000010
+
+STACK_TEXT:
+00000000`0014f8a0 00007ff6`12341234 : 00000000`00000000 00000000`00000000 : MyApp!Widget::Render+0x42
+00000000`0014f900 00007ff6`12345678 : 00000000`00000000 00000000`00000000 : MyApp!main+0x20
+"""
+
+# 规则无法判断的输出
+UNKNOWN_OUTPUT = "executed: lm\n"
+
+
+@pytest.fixture
+def analyzer(config):
+    config.set("llm.api_key", "")
+    client = LLMClient(config)
+    assert not client.is_available()
+    return SmartAnalyzer(client)
+
+
+def test_rules_fast_path_runs_without_llm(analyzer):
+    report = analyzer.analyze_output(NULL_READ_OUTPUT, "!analyze -v")
+    assert report.exception_code.lower().endswith("c0000005")
+
+    report = asyncio.run(analyzer.analyze_output_async(NULL_READ_OUTPUT, "!analyze -v"))
+    assert report.exception_code.lower().endswith("c0000005")
+    assert analyzer.get_stats()["avoided_by"]["rules"] == 2
+    assert analyzer.get_stats()["llm_analyses"] == 0
+
+
+def test_cached_report_is_reused_without_llm(analyzer):
+    cached = AnalysisReport(summary="cached")
+    analyzer.cache.set(analyzer._analysis_cache_key(UNKNOWN_OUTPUT, "lm"), cached.to_dict())
+
+    assert analyzer.analyze_output(UNKNOWN_OUTPUT, "lm").summary == "cached"
+
+
+def test_miss_requires_llm(analyzer):
+    with pytest.raises(AnalysisError, match="LLM 客户端不可用"):
+        analyzer.analyze_output(UNKNOWN_OUTPUT, "lm")
+    assert analyzer.get_stats()["llm_analyses"] == 0
+
+
+def test_report_endpoint_without_llm(analyzer, config):
+    app = create_app(config, SessionManager(), llm_client=analyzer.client, analyzer=analyzer)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            hit = await client.post("/api/analysis/report", json={"raw_output": NULL_READ_OUTPUT, "command": "!analyze -v"})
+            miss = await client.post("/api/analysis/report", json={"raw_output": UNKNOWN_OUTPUT, "command": "lm"})
+            return hit, miss
+
+    hit, miss = asyncio.run(run())
+    assert hit.status_code == 200
+    assert hit.json()["exception_code"].lower().endswith("c0000005")
+    assert miss.status_code == 503
@@ -0,0 +1,147 @@
+"""崩溃签名与分析缓存键测试"""
+
+from src.llm.analyzer import SmartAnalyzer
+from src.llm.client import LLMClient
+from src.windbg.parser import OutputParser
+
+
+ANALYZE_TEMPLATE = """Microsoft (R) Windows Debugger Version 10.0.22621.2428 AMD64
+Copyright (c) Microsoft Corporation. All rights reserved.
+
+Loading Dump File [{dump}]
+User Mini Dump File: Only registers, stack and portions of memory are available
+
+Debug session time: {time}
+System Uptime: not available
+Process Uptime: {uptime}
+Loading unloaded module list
+...........
+({pid}.{tid}): Access violation - code c0000005 (first/second chance not available)
+
+KEY_VALUES_STRING: 1
+
+    Key  : Analysis.CPU.mSec
+    Value: {cpu}
+
+    Key  : Analysis.Elapsed.mSec
+    Value: {elapsed}
+
+    Key  : Failure.Bucket
+    Value: NULL_CLASS_PTR_READ_c0000005_MyApp.exe!Widget::Render
+
+EXCEPTION_RECORD:  (.exr -1)
+ExceptionAddress: {base}1234 (MyApp!Widget::Render+0x0000000000000042)
+   ExceptionCode: c0000005 (Access violation)
+  ExceptionFlags: 00000000
+NumberParameters: 2
+   Parameter[0]: 0000000000000000
+   Parameter[1]: 0000000000000010
+Attempt to read from address 0000000000000010
+
+FAULTING_THREAD:  {tid:0>8}
+
+STACK_TEXT:
+{stack}`0014f8a0 {base_tick}1234 : {arg1} 00000000`00000000 : MyApp!Widget::Render+0x42
+{stack}`0014f900 {base_tick}5678 : {arg2} 00000000`00000000 : MyApp!main+0x20
+"""
+
+
+def analyze_capture(**overrides):
+    """生成一次 !analyze -v 采集的输出"""
+    values = {
+        "dump": r"C:\dumps\crash.dmp",
+        "time": "Mon Jan 15 10:30:00.000 2024 (UTC + 8:00)",
+        "uptime": "0 days 0:00:12.000",
+        "pid": "1a2c",
+        "tid": "3f0",
+        "cpu": "1234",
+        "elapsed": "5678",
+        "base": "00007ff61234",
+        "base_tick": "00007ff6`1234",
+        "stack": "00000000",
+        "arg1": "000001d2`3a4b5c60",
+        "arg2": "000001d2`3a4b5d10",
+    }
+    values.update(overrides)
+    return ANALYZE_TEMPLATE.format(**values)
+
+
+# 同一崩溃的再次采集：转储路径、会话时间、进程/线程 ID、耗时统计、
+# 模块加载基址（ASLR）和栈/堆地址都不同
+RECAPTURE = analyze_capture(
+    dump=r"D:\collected\crash-2.dmp",
+    time="Tue Feb 20 08:01:02.345 2024 (UTC + 8:00)",
+    uptime="0 days 0:03:45.000",
+    pid="2b40",
+    tid="11c",
+    cpu="987",
+    elapsed="4321",
+    base="00007ff6abcd",
+    base_tick="00007ff6`abcd",
+    stack="0000009a",
+    arg1="0000023f`10203040",
+    arg2="0000023f`10203100",
+)
+
+DD_FIRST = """0000009a`0014f8a0  00000001 00000002 00000003 00000004
+0000009a`0014f8b0  deadbeef 00000000 12345678 00000000
+"""
+
+DD_SECOND = """0000009a`0014f8a0  00000001 00000002 00000003 00000004
+0000009a`0014f8b0  cafebabe 00000000 87654321 00000000
+"""
+
+R_FIRST = """rax=0000000000000000 rbx=000001d23a4b5c60 rcx=0000000000000010
+rip=00007ff612341234 rsp=000000000014f8a0 rbp=0000000000000000
+MyApp!Widget::Render+0x42:
+00007ff6`12341234 8b01            mov     eax,dword ptr [rcx] ds:00000000`00000010=????????
+"""
+
+R_SECOND = R_FIRST.replace("rcx=0000000000000010", "rcx=0000000000000020")
+
+
+def test_recapture_of_same_crash_has_same_signature():
+    parser = OutputParser()
+    first = analyze_capture()
+
+    assert first != RECAPTURE
+    assert parser.crash_signature(first, "!analyze -v") == parser.crash_signature(RECAPTURE, "!analyze -v")
+
+
+def test_different_crash_has_different_signature():
+    parser = OutputParser()
+    other = analyze_capture().replace("MyApp!main+0x20", "MyApp!Worker::Run+0x18")
+
+    assert parser.crash_signature(analyze_capture(), "!analyze -v") != parser.crash_signature(other, "!analyze -v")
+
+
+def test_data_dumps_with_different_values_have_different_signatures():
+    parser = OutputParser()
+
+    assert parser.crash_signature(DD_FIRST, "dd rsp") != parser.crash_signature(DD_SECOND, "dd rsp")
+    assert parser.crash_signature(R_FIRST, "r") != parser.crash_signature(R_SECOND, "r")
+    # 数据值保持原样，只有引用了符号的行中的地址被替换
+    normalized = parser.normalize_output(R_FIRST, "r")
+    assert "rcx=0000000000000010" in normalized
+    assert "MyApp!Widget::Render+0x42:" in normalized
+
+
+def test_stack_command_addresses_are_normalized():
+    parser = OutputParser()
+    first = "00 0000009a`0014f8a0 00007ff6`12341234 MyApp!Widget::Render+0x42\n"
+    second = "00 0000023f`0014f000 00007ff6`abcd1234 MyApp!Widget::Render+0x42\n"
+
+    assert parser.crash_signature(first, "kv") == parser.crash_signature(second, "kv")
+
+
+def test_analysis_cache_key_includes_command(config):
+    analyzer = SmartAnalyzer(LLMClient(config), cache_enabled=False)
+    output = "executed: same output\n"
+
+    assert analyzer._analysis_cache_key(output, "lm") != analyzer._analysis_cache_key(output, "!peb")
+    assert analyzer._analysis_cache_key(output, "lm") == analyzer._analysis_cache_key(output, "  LM ")
+    assert analyzer._analysis_cache_key(DD_FIRST, "dd rsp") != analyzer._analysis_cache_key(DD_SECOND, "dd rsp")
+    assert (
+        analyzer._analysis_cache_key(analyze_capture(), "!analyze -v")
+        == analyzer._analysis_cache_key(RECAPTURE, "!analyze -v")
+    )
@@ -0,0 +1,47 @@
+"""接口中客户端指定的转储文件路径必须经过校验"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.core.session import SessionManager
+from src.web.api import analysis, session
+from src.web.app import create_app
+from src.windbg.artifact_store import DumpArtifactStore
+
+
+@pytest.fixture
+def app(config, tmp_path, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(session, "dump_identity", lambda path: hashed.append(path) or "id")
+    monkeypatch.setattr(analysis, "dump_identity", lambda path: hashed.append(path) or "id")
+    app = create_app(config, SessionManager(), artifact_store=DumpArtifactStore(str(tmp_path / "artifacts.db")))
+    app.state.hashed = hashed
+    return app
+
+
+def request(app, method, url, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("method, url, kwargs", [
+    ("GET", "/api/session/artifacts", {"params": {"dump_file": "/etc/passwd"}}),
+    ("POST", "/api/analysis/report", {"json": {"raw_output": "x", "command": "kv", "dump_file": "/etc/passwd"}}),
+    ("POST", "/api/analysis/analyze-async", {"json": {"raw_output": "x", "command": "kv", "dump_file": "/etc/passwd"}}),
+])
+def test_arbitrary_paths_are_rejected(app, method, url, kwargs):
+    response = request(app, method, url, **kwargs)
+    assert response.status_code == 400
+    assert app.state.hashed == []
+
+
+def test_artifacts_default_to_session_dump(app):
+    app.state.session_manager.dump_file = "C:\\dumps\\crash.dmp"
+    response = request(app, "GET", "/api/session/artifacts")
+    assert response.status_code == 200
+    assert app.state.hashed == ["C:\\dumps\\crash.dmp"]
@@ -0,0 +1,32 @@
+"""AsyncEngineFacade 测试（使用模拟 cdb）"""
+
+import asyncio
+
+from src.windbg.engine import WinDBGEngine
+from src.windbg.executor import CommandExecutor
+from src.windbg.facade import AsyncEngineFacade
+from src.windbg.result_cache import CommandResultCache
+from tests.fake_cdb import read_log
+
+
+def test_commands_go_through_executor_cache(config, fake_cdb, make_dump):
+    engine = WinDBGEngine(config)
+    executor = CommandExecutor(engine, CommandResultCache(max_entries=16))
+    facade = AsyncEngineFacade(engine, executor)
+
+    async def run():
+        await facade.load_dump(make_dump())
+        first = await facade.execute("kv")
+        second = await facade.execute("kv")
+        return first, second
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        engine.close()
+        facade.shutdown()
+
+    assert first.output == second.output
+    # 第二次从命令结果缓存返回，cdb 只执行一次
+    assert [command for _, command in read_log(fake_cdb[1])].count("kv") == 1
+    assert facade.get_scheduler_metrics()["stats"]["interactive"]["completed"] >= 1
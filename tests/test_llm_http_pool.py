@@ -0,0 +1,66 @@
+"""LLM 客户端共享 HTTP 连接池测试（使用模拟 OpenAI 服务）"""
+
+import asyncio
+import gc
+
+from src.core.config import ConfigManager
+from src.llm.client import LLMClient
+from src.llm.http_pool import HttpClientPool
+from tests.conftest import ROOT
+
+
+def test_clients_reuse_pooled_connections(llm_config, fake_openai):
+    shared = LLMClient.shared(llm_config)
+    # 连接测试等场景会创建临时客户端，同样使用共享连接池
+    temporary = LLMClient(llm_config)
+
+    for client in (shared, temporary, shared, temporary):
+        assert client.generate_completion("hello") == "ok"
+    # 同步请求依次复用同一个连接
+    assert fake_openai.connections == 1
+
+    async def run():
+        try:
+            return await asyncio.gather(*(shared.generate_completion_async("hello") for _ in range(3)))
+        finally:
+            # 异步连接池绑定在当前事件循环上，在循环结束前关闭
+            await HttpClientPool.aclose()
+
+    assert asyncio.run(run()) == ["ok"] * 3
+    assert fake_openai.requests == 7
+    # 并发的异步请求最多各用一个连接
+    assert fake_openai.connections <= 4
+
+
+def test_shared_client_per_config(llm_config):
+    first = LLMClient.shared(llm_config)
+    assert LLMClient.shared(llm_config) is first
+    assert LLMClient.shared(ConfigManager(str(ROOT / "config.yaml"))) is not first
+
+    del first
+    gc.collect()
+    # 实例不再被引用后条目删除，新配置即使复用了内存地址也得到新的实例
+    other = ConfigManager(str(ROOT / "config.yaml"))
+    assert LLMClient.shared(other).config is other
+
+
+def test_reload_rebuilds_pool_and_resilience(llm_config, fake_openai):
+    client = LLMClient.shared(llm_config)
+    assert client.generate_completion("hello") == "ok"
+    pool = HttpClientPool.get_sync()
+    resilience = client.resilience
+
+    # 配置未变化时保持原连接池
+    client.reload()
+    assert HttpClientPool.get_sync() is pool
+
+    llm_config.set("llm.http.max_connections", 3)
+    llm_config.set("llm.retry.max_retries", 1)
+    client.reload()
+
+    assert HttpClientPool.get_sync() is not pool
+    assert HttpClientPool.get_stats()["max_connections"] == 3
+    assert client.resilience is not resilience
+    assert client.resilience.retry.max_retries == 1
+    assert client.generate_completion("hello") == "ok"
+    assert fake_openai.connections == 2
@@ -0,0 +1,124 @@
+"""LLM 请求重试、对冲和熔断测试（使用模拟 OpenAI 服务）"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.exceptions import APIError, CircuitOpenError
+from src.llm.client import LLMClient
+from src.llm.http_pool import HttpClientPool
+
+
+@pytest.fixture
+def client(llm_config):
+    llm_config.set("llm.retry.max_retries", 3)
+    llm_config.set("llm.retry.base_delay", 0.01)
+    llm_config.set("llm.retry.max_delay", 5)
+    return LLMClient(llm_config)
+
+
+def test_retries_server_errors(client, fake_openai):
+    fake_openai.enqueue(500)
+    fake_openai.enqueue(503)
+
+    assert client.generate_completion("hello") == "ok"
+    assert fake_openai.requests == 3
+    assert client.get_stats()["retries"] == 2
+    # 重试成功后熔断器不断开
+    assert client.get_stats()["circuit_breaker"]["state"] == "closed"
+
+
+def test_honors_retry_after(client, fake_openai):
+    fake_openai.enqueue(429, {"Retry-After": "0.5"})
+
+    start = time.monotonic()
+    assert client.generate_completion("hello") == "ok"
+    assert time.monotonic() - start >= 0.5
+    assert fake_openai.requests == 2
+
+
+def test_client_errors_are_not_retried(client, fake_openai):
+    fake_openai.enqueue(400)
+
+    with pytest.raises(APIError):
+        client.generate_completion("hello")
+    assert fake_openai.requests == 1
+    assert client.get_stats()["circuit_breaker"]["consecutive_failures"] == 0
+
+
+def test_hedged_request_wins_over_slow_primary(llm_config, fake_openai):
+    llm_config.set("llm.hedging.enabled", True)
+    llm_config.set("llm.hedging.min_samples", 3)
+    client = LLMClient(llm_config)
+    for _ in range(3):
+        client.resilience.latency.record(0.05)
+    fake_openai.enqueue(delay=2)
+
+    start = time.monotonic()
+    assert client.generate_completion("hello") == "ok"
+    assert time.monotonic() - start < 1.5
+    assert client.get_stats()["hedges"] == 1
+    assert client.get_stats()["hedge_wins"] == 1
+
+
+def test_breaker_opens_and_recovers(llm_config, fake_openai):
+    llm_config.set("llm.retry.max_retries", 0)
+    llm_config.set("llm.circuit_breaker.failure_threshold", 2)
+    llm_config.set("llm.circuit_breaker.reset_timeout", 0.3)
+    client = LLMClient(llm_config)
+    fake_openai.enqueue(500)
+    fake_openai.enqueue(500)
+
+    for _ in range(2):
+        with pytest.raises(APIError):
+            client.generate_completion("hello")
+    # 熔断期间不再访问服务端
+    with pytest.raises(CircuitOpenError):
+        client.generate_completion("hello")
+    assert fake_openai.requests == 2
+
+    time.sleep(0.35)
+    assert client.generate_completion("hello") == "ok"
+    assert client.get_stats()["circuit_breaker"]["state"] == "closed"
+
+
+def test_cancelled_probe_reopens_breaker(llm_config, fake_openai):
+    llm_config.set("llm.retry.max_retries", 0)
+    llm_config.set("llm.circuit_breaker.failure_threshold", 1)
+    llm_config.set("llm.circuit_breaker.reset_timeout", 0.3)
+    client = LLMClient(llm_config)
+    breaker = client.resilience.breaker
+
+    async def wait_for_request(count):
+        while fake_openai.requests < count:
+            await asyncio.sleep(0.01)
+
+    async def run():
+        try:
+            fake_openai.enqueue(500)
+            with pytest.raises(APIError):
+                await client.generate_completion_async("hello")
+            assert breaker.state == "open"
+
+            # 半开状态放行的探测请求在服务端返回前被取消
+            await asyncio.sleep(0.35)
+            fake_openai.enqueue(delay=2)
+            probe = asyncio.ensure_future(client.generate_completion_async("hello"))
+            await wait_for_request(2)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+            # 探测被释放：重新断开并重新计时，而不是停在半开状态
+            assert breaker.state == "open"
+            with pytest.raises(CircuitOpenError):
+                await client.generate_completion_async("hello")
+
+            await asyncio.sleep(0.35)
+            assert await client.generate_completion_async("hello") == "ok"
+            assert breaker.state == "closed"
+        finally:
+            await HttpClientPool.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,74 @@
+"""OutputStreamer 测试"""
+
+import asyncio
+
+from src.web.websocket.streamer import OutputStreamer
+
+
+class FakeManager:
+    """记录推送消息的 WebSocketManager"""
+
+    def __init__(self):
+        self.output_connections = {object()}
+        self.messages = []
+
+    def push_output_chunk(self, message):
+        self.messages.append(message)
+
+
+def run_streamer(feeds, max_pending_size, chunk_size=256):
+    """在事件循环中依次交给推送器输出，返回 (推送器, 推送的消息)"""
+    manager = FakeManager()
+    streamer = OutputStreamer(manager, flush_interval=0.01, chunk_size=chunk_size, max_pending_size=max_pending_size)
+    sizes = []
+
+    async def run():
+        streamer.attach(asyncio.get_running_loop())
+        # 事件循环不让出时推送不会发生，模拟推送跟不上输出
+        for command, text in feeds:
+            streamer.feed(text, command)
+            sizes.append(streamer._pending_size)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    return streamer, manager.messages, sizes
+
+
+def test_single_long_command_is_bounded():
+    pieces = [f"{index:07d}\n" for index in range(125000)]
+    streamer, messages, sizes = run_streamer([("kv", piece) for piece in pieces], max_pending_size=1024)
+
+    assert max(sizes) <= 1024
+    data = ''.join(message["data"] for message in messages)
+    # 保留最新的 1024 字节，丢弃的字节数随第一条消息告知客户端
+    assert data == ''.join(pieces)[-1024:]
+    assert messages[0]["dropped_bytes"] == 1000000 - 1024
+    assert all(len(message["data"]) <= 256 for message in messages)
+    assert streamer._pending_size == 0
+
+
+def test_commands_keep_order_under_limit():
+    streamer, messages, _ = run_streamer(
+        [("k", "a" * 10), ("k", "b" * 10), ("lm", "c" * 10)], max_pending_size=1024
+    )
+
+    assert [(message["command"], message["data"]) for message in messages] == [
+        ("k", "a" * 10 + "b" * 10),
+        ("lm", "c" * 10),
+    ]
+    assert "dropped_bytes" not in messages[0]
+
+
+def test_oldest_command_is_dropped_first():
+    _, messages, _ = run_streamer(
+        [("k", "a" * 600), ("lm", "b" * 600)], max_pending_size=1000
+    )
+
+    assert [(message["command"], len(message["data"])) for message in messages] == [
+        ("k", 256),
+        ("k", 144),
+        ("lm", 256),
+        ("lm", 256),
+        ("lm", 88),
+    ]
+    assert messages[0]["dropped_bytes"] == 200
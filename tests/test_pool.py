@@ -0,0 +1,108 @@
+"""DebuggerPool 测试（使用模拟 cdb）"""
+
+import threading
+import time
+
+import pytest
+
+from src.core.exceptions import SessionError
+from src.windbg.pool import DebuggerPool
+from tests.fake_cdb import read_log
+
+
+def test_sessions_for_different_dumps_run_concurrently(config, fake_cdb, make_dump):
+    pool = DebuggerPool(config, max_size=4)
+    dumps = [make_dump("a.dmp"), make_dump("b.dmp")]
+    results = {}
+
+    def run(dump):
+        with pool.session(dump) as entry:
+            results[dump] = entry.executor.execute(".sleep 500")
+
+    start = time.time()
+    threads = [threading.Thread(target=run, args=(dump,)) for dump in dumps]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    try:
+        assert all(result.success for result in results.values())
+        # 两个会话各自执行 0.5 秒的命令，并发时总耗时明显小于串行的 1 秒
+        assert elapsed < 0.9
+        pids = {pid for pid, command in read_log(fake_cdb[1]) if command == "<start>"}
+        assert len(pids) == 2
+    finally:
+        pool.close_all()
+
+
+def test_same_dump_reuses_session(config, make_dump):
+    pool = DebuggerPool(config, max_size=2)
+    dump = make_dump()
+    try:
+        with pool.session(dump) as first:
+            assert first.executor.execute("kv").output.startswith(" # Child-SP")
+        with pool.session(dump) as second:
+            assert second is first
+        assert len(pool) == 1
+    finally:
+        pool.close_all()
+
+
+def test_lru_evicts_idle_session(config, make_dump):
+    pool = DebuggerPool(config, max_size=2)
+    a, b, c = make_dump("a.dmp"), make_dump("b.dmp"), make_dump("c.dmp")
+    try:
+        with pool.session(a) as entry_a:
+            pass
+        with pool.session(b):
+            pass
+        with pool.session(c):
+            pass
+
+        dumps = {session["dump_file"] for session in pool.get_pool_info()["sessions"]}
+        assert dumps == {b, c}
+        assert not entry_a.engine.is_session_active()
+    finally:
+        pool.close_all()
+
+
+def test_full_pool_of_busy_sessions_closes_popped_victims(config, make_dump):
+    pool = DebuggerPool(config, max_size=3)
+    a, b, c = make_dump("a.dmp"), make_dump("b.dmp"), make_dump("c.dmp")
+    try:
+        with pool.session(a) as idle:
+            pass
+        busy = [pool.acquire(b), pool.acquire(c)]
+
+        # 缩小上限后只有一个空闲会话可淘汰，仍然不足
+        pool.max_size = 1
+        with pytest.raises(SessionError):
+            pool.acquire(make_dump("d.dmp"))
+
+        assert not idle.engine.is_session_active()
+        assert len(pool) == 2
+        for entry in busy:
+            pool.release(entry)
+    finally:
+        pool.close_all()
+
+
+def test_reaper_closes_idle_sessions(config, make_dump):
+    config.set("windbg.pool_idle_timeout", 0.1)
+    pool = DebuggerPool(config, max_size=2)
+    try:
+        with pool.session(make_dump()) as entry:
+            pass
+        pool.start_reaper(interval=0.05)
+
+        deadline = time.time() + 5
+        # 会话先移出池再在池锁之外关闭，等待进程退出
+        while entry.engine.is_session_active() and time.time() < deadline:
+            time.sleep(0.05)
+
+        assert len(pool) == 0
+        assert not entry.engine.is_session_active()
+    finally:
+        pool.close_all()
@@ -0,0 +1,99 @@
+"""CommandResultCache 测试"""
+
+import time
+
+from src.core.sqlite_cache import SQLiteTTLStore
+from src.windbg import result_cache
+from src.windbg.artifact_store import DumpArtifactStore
+from src.windbg.engine import WinDBGEngine
+from src.windbg.executor import CommandExecutor
+from src.windbg.result_cache import CommandResultCache, dump_identity
+from tests.fake_cdb import read_log
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = CommandResultCache(max_entries=4, cache_dir=str(tmp_path))
+    cache.set("k1", "output 1")
+    cache.close()
+
+    reopened = CommandResultCache(max_entries=4, cache_dir=str(tmp_path))
+    assert reopened.get("k1") == "output 1"
+    assert reopened.get_stats()["disk_hits"] == 1
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_disk_tier_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(SQLiteTTLStore, "TRIM_INTERVAL", 1)
+    cache = CommandResultCache(max_entries=2, cache_dir=str(tmp_path), max_disk_entries=10)
+    for index in range(50):
+        cache.set(f"k{index}", f"output {index}")
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["disk_entries"] == 10
+    # 保留最新写入的条目
+    assert cache.get("k49") == "output 49"
+    assert cache.get("k0") is None
+
+
+def test_clear_keeps_unrelated_files(tmp_path):
+    other = tmp_path / "settings.json"
+    other.write_text("{}")
+    cache = CommandResultCache(max_entries=4, cache_dir=str(tmp_path))
+    cache.set("k1", "output 1")
+
+    cache.clear()
+    assert cache.get("k1") is None
+    assert cache.get_stats()["disk_entries"] == 0
+    # 缓存目录可能与其他数据共用，清空时只删除数据库中的条目
+    assert other.exists()
+
+
+def test_disk_entries_expire(tmp_path):
+    cache = CommandResultCache(max_entries=1, cache_dir=str(tmp_path), ttl=0.05)
+    cache.set("k1", "output 1")
+    cache.set("k2", "output 2")  # 把 k1 挤出内存层
+    time.sleep(0.1)
+    assert cache.get("k1") is None
+
+
+def test_identity_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "_IDENTITY_CACHE_SIZE", 3)
+    monkeypatch.setattr(result_cache, "_identity_cache", result_cache.OrderedDict())
+    identities = set()
+    for index in range(10):
+        path = tmp_path / f"{index}.dmp"
+        path.write_bytes(f"dump {index}".encode())
+        identities.add(dump_identity(str(path)))
+
+    assert len(identities) == 10
+    assert len(result_cache._identity_cache) == 3
+
+
+def test_timed_out_output_is_not_cached(config, fake_cdb, make_dump, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_CDB_SLOW", "kv:1500")
+    monkeypatch.setattr(WinDBGEngine, "COMMAND_TIMEOUT", 0.5)
+    cache = CommandResultCache(cache_dir=str(tmp_path / "commands"))
+    store = DumpArtifactStore(str(tmp_path / "artifacts.db"))
+    engine = WinDBGEngine(config)
+    executor = CommandExecutor(engine, cache, store)
+    dump = make_dump()
+    try:
+        assert executor.load_dump(dump)
+        first = executor.execute("kv")
+        # 超时前只收到第一行
+        assert first.timed_out
+        assert first.output.startswith(" # Child-SP")
+        assert "MyApp!main" not in first.output
+
+        second = executor.execute("kv")
+        assert second.timed_out
+    finally:
+        engine.close()
+
+    # 两次都实际执行，部分输出没有进入内存层、磁盘层和产物存储
+    assert [command for _, command in read_log(fake_cdb[1])].count("kv") == 2
+    stats = cache.get_stats()
+    assert stats["entries"] == 0
+    assert stats["disk_entries"] == 0
+    assert store.get_command_output(dump_identity(dump), engine.symbol_path, "kv") is None
@@ -0,0 +1,108 @@
+"""CommandScheduler 测试"""
+
+import threading
+import time
+
+import pytest
+
+from src.core.exceptions import CommandExecutionError
+from src.windbg.scheduler import CommandPriority, CommandScheduler
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+class Holder:
+    """在后台线程中占住会话，直到 release()"""
+
+    def __init__(self, scheduler):
+        self._release = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(scheduler,))
+        self._thread.start()
+        wait_until(lambda: scheduler.get_metrics()["running"] is not None)
+
+    def _run(self, scheduler):
+        with scheduler.slot(CommandPriority.INTERACTIVE, "hold"):
+            self._release.wait(5)
+
+    def release(self):
+        self._release.set()
+        self._thread.join(5)
+
+
+def queue_command(scheduler, priority, description, results, timeout=None):
+    """在后台线程中排队执行，记录执行顺序或异常"""
+    def run():
+        try:
+            with scheduler.slot(priority, description, timeout):
+                results.append(description)
+        except CommandExecutionError as e:
+            results.append(e)
+
+    thread = threading.Thread(target=run)
+    depth = scheduler.get_metrics()["queue_depth"]
+    thread.start()
+    wait_until(lambda: scheduler.get_metrics()["queue_depth"] > depth)
+    return thread
+
+
+def test_runs_by_priority_then_fifo():
+    scheduler = CommandScheduler()
+    holder = Holder(scheduler)
+    order = []
+    threads = [
+        queue_command(scheduler, CommandPriority.WARMUP, "warmup", order),
+        queue_command(scheduler, CommandPriority.BATCH, "batch 1", order),
+        queue_command(scheduler, CommandPriority.INTERACTIVE, "interactive", order),
+        queue_command(scheduler, CommandPriority.BATCH, "batch 2", order),
+    ]
+    assert [item["command"] for item in scheduler.get_queue()] == ["interactive", "batch 1", "batch 2", "warmup"]
+
+    holder.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["interactive", "batch 1", "batch 2", "warmup"]
+    stats = scheduler.get_metrics()["stats"]
+    assert stats["batch"]["completed"] == 2
+    assert stats["interactive"]["completed"] == 2
+
+
+def test_cancel_queued_command():
+    scheduler = CommandScheduler()
+    holder = Holder(scheduler)
+    results = []
+    cancelled = queue_command(scheduler, CommandPriority.BATCH, "kv", results)
+    other = queue_command(scheduler, CommandPriority.BATCH, "lm", results)
+
+    ticket_id = scheduler.get_queue()[0]["ticket_id"]
+    assert scheduler.cancel(ticket_id)
+    cancelled.join(5)
+    assert isinstance(results[0], CommandExecutionError)
+    assert [item["command"] for item in scheduler.get_queue()] == ["lm"]
+    # 已离开队列的命令不能再取消
+    assert not scheduler.cancel(ticket_id)
+
+    holder.release()
+    other.join(5)
+    assert results[1:] == ["lm"]
+    metrics = scheduler.get_metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["stats"]["batch"]["cancelled"] == 1
+
+
+def test_queued_command_expires():
+    scheduler = CommandScheduler()
+    holder = Holder(scheduler)
+
+    with pytest.raises(CommandExecutionError):
+        with scheduler.slot(CommandPriority.BATCH, "kv", timeout=0.1):
+            pass
+
+    holder.release()
+    assert scheduler.get_metrics()["stats"]["batch"]["expired"] == 1
+    assert scheduler.get_queue() == []
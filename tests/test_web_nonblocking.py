@@ -0,0 +1,59 @@
+"""Web 接口执行 cdb 命令时不阻塞事件循环"""
+
+import asyncio
+import time
+
+import httpx
+
+from src.core.session import SessionManager
+from src.web.app import create_app
+from src.windbg.engine import WinDBGEngine
+from src.windbg.executor import CommandExecutor
+
+
+def make_app(config, dump):
+    """创建已加载转储的应用"""
+    engine = WinDBGEngine(config)
+    executor = CommandExecutor(engine)
+    executor.load_dump(dump)
+    session_manager = SessionManager()
+    session_manager.dump_file = dump
+    app = create_app(config, session_manager, engine, executor=executor)
+    return app, engine
+
+
+async def hammer_health_during(client: httpx.AsyncClient, request):
+    """在请求执行期间不断访问 /health，返回 (请求响应, 各次 /health 耗时)"""
+    task = asyncio.ensure_future(request)
+    latencies = []
+    while not task.done():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        await asyncio.sleep(0.01)
+    return await task, latencies
+
+
+def test_health_responds_while_slow_command_runs(config, make_dump):
+    app, engine = make_app(config, make_dump())
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await hammer_health_during(
+                client,
+                client.post("/api/command/execute", json={"command": ".sleep 1500"}, timeout=10)
+            )
+
+    try:
+        response, latencies = asyncio.run(run())
+    finally:
+        engine.close()
+        app.state.engine_facade.shutdown()
+
+    assert response.status_code == 200
+    assert response.json()["success"]
+    # 命令执行 1.5 秒期间 /health 持续响应，没有一次被阻塞到命令结束
+    assert len(latencies) >= 10
+    assert max(latencies) < 0.5
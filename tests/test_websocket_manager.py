@@ -0,0 +1,141 @@
+"""WebSocketManager 测试（进程内模拟的 WebSocket 客户端）"""
+
+import asyncio
+import json
+import time
+
+from fastapi.websockets import WebSocketState
+
+from src.web.websocket.manager import (
+    WebSocketManager,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DISCONNECT,
+)
+
+
+class FakeWebSocket:
+    """模拟的 WebSocket 连接
+
+    delay 为每条消息的发送耗时；stalled 为 True 时发送永远不返回（卡住的浏览器）。
+    """
+
+    def __init__(self, name: str, delay: float = 0.0, stalled: bool = False):
+        self.client = name
+        self.query_params = None
+        self.client_state = WebSocketState.CONNECTING
+        self.delay = delay
+        self.stalled = stalled
+        self.received = []
+        self.close_code = None
+
+    async def accept(self):
+        self.client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, text: str):
+        if self.stalled:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    """等待条件成立"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        await asyncio.sleep(0.01)
+    assert condition()
+
+
+def test_stalled_client_does_not_block_others():
+    async def run():
+        manager = WebSocketManager(queue_size=8)
+        fast = [FakeWebSocket(f"fast-{index}") for index in range(200)]
+        stalled = FakeWebSocket("stalled", stalled=True)
+        for websocket in fast + [stalled]:
+            await manager.connect_output(websocket)
+
+        broadcast_time = 0.0
+        for seq in range(50):
+            start = time.perf_counter()
+            await manager.broadcast_output({"type": "command_output", "seq": seq})
+            broadcast_time += time.perf_counter() - start
+            # 让出事件循环，模拟命令输出逐条到达
+            await asyncio.sleep(0)
+
+        await wait_until(lambda: all(len(websocket.received) == 50 for websocket in fast))
+
+        stats = {item["client"]: item for item in manager.get_connection_stats()["connections"]}
+        await manager.disconnect_all()
+        return fast, broadcast_time, stats
+
+    fast, broadcast_time, stats = asyncio.run(run())
+
+    # 广播只入队，200 个连接 × 50 条消息不等待任何发送
+    assert broadcast_time < 1.0
+    for websocket in fast:
+        assert [message["seq"] for message in websocket.received] == list(range(50))
+    # 卡住的连接队列有界，超出部分按默认策略丢弃最旧的消息
+    assert stats["stalled"]["queue_depth"] <= 8
+    assert stats["stalled"]["dropped"] >= 50 - 8 - 1
+
+
+def test_drop_newest_keeps_oldest_messages():
+    async def run():
+        manager = WebSocketManager(queue_size=4, overflow_policy=OVERFLOW_DROP_NEWEST)
+        slow = FakeWebSocket("slow", delay=0.05)
+        await manager.connect_output(slow)
+        for seq in range(10):
+            await manager.broadcast_output({"type": "command_output", "seq": seq})
+        await wait_until(lambda: not manager.get_connection_stats()["connections"][0]["queue_depth"])
+        await asyncio.sleep(0.1)
+        await manager.disconnect_all()
+        return slow
+
+    slow = asyncio.run(run())
+    seqs = [message["seq"] for message in slow.received]
+    assert seqs == sorted(seqs)
+    assert seqs[0] == 0
+    assert 9 not in seqs
+
+
+def test_disconnect_policy_closes_overflowing_client():
+    async def run():
+        manager = WebSocketManager(queue_size=4, overflow_policy=OVERFLOW_DISCONNECT)
+        stalled = FakeWebSocket("stalled", stalled=True)
+        healthy = FakeWebSocket("healthy")
+        await manager.connect_output(stalled)
+        await manager.connect_output(healthy)
+        for seq in range(10):
+            await manager.broadcast_output({"type": "command_output", "seq": seq})
+            await asyncio.sleep(0)
+        await wait_until(lambda: stalled.close_code is not None and len(healthy.received) == 10)
+        count = manager.get_connection_count()
+        await manager.disconnect_all()
+        return stalled, count
+
+    stalled, count = asyncio.run(run())
+    assert stalled.close_code == 1008
+    assert count["output"] == 1
+
+
+def test_lag_metrics_reflect_slow_client():
+    async def run():
+        manager = WebSocketManager(queue_size=64)
+        slow = FakeWebSocket("slow", delay=0.02)
+        await manager.connect_output(slow)
+        for seq in range(10):
+            await manager.broadcast_output({"type": "command_output", "seq": seq})
+        await wait_until(lambda: len(slow.received) == 10)
+        stats = manager.get_connection_stats()["connections"][0]
+        await manager.disconnect_all()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["sent"] == 10
+    # 最后一条消息排在 9 条之后，等待时间至少是 9 次发送
+    assert stats["max_lag_ms"] >= 150
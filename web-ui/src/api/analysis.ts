@@ -17,8 +17,10 @@ export const analysisAPI = {
     return response.data;
   },
 
-  getTaskStatus: async (taskId: string): Promise<AnalysisTask> => {
-    const response = await api.get(`/analysis/task/${taskId}`);
+  getTaskStatus: async (taskId: string, since?: number): Promise<AnalysisTask> => {
+    const response = await api.get(`/analysis/task/${taskId}`, {
+      params: since !== undefined ? { since } : undefined
+    });
     return response.data;
   },
 
@@ -1,11 +1,18 @@
 import { WebSocketMessage, AnalysisProgress } from '../types';
 
+export interface SubscriptionTopics {
+  sessions?: string[];
+  tasks?: string[];
+  types?: string[];
+}
+
 class WebSocketManager {
   private connections: Map<string, WebSocket> = new Map();
   private reconnectAttempts: Map<string, number> = new Map();
   private maxReconnectAttempts = 5;
   private reconnectDelay = 3000;
   private listeners: Map<string, Set<(data: any) => void>> = new Map();
+  private subscriptions: Map<string, SubscriptionTopics> = new Map();
 
   connect(url: string, name: string = 'default') {
     if (this.connections.has(name) && this.connections.get(name)?.readyState === WebSocket.OPEN) {
@@ -17,6 +24,11 @@ class WebSocketManager {
     ws.onopen = () => {
       console.log(`WebSocket connected: ${name}`);
       this.reconnectAttempts.set(name, 0);
+      // 重连后恢复订阅
+      const topics = this.subscriptions.get(name);
+      if (topics) {
+        ws.send(JSON.stringify({ action: 'subscribe', ...topics }));
+      }
     };
 
     ws.onmessage = (event) => {
@@ -58,6 +70,34 @@ class WebSocketManager {
     }
   }
 
+  /**
+   * 只接收指定会话（转储文件路径）、任务或消息类型的消息；不订阅时接收全部消息
+   */
+  subscribe(topics: SubscriptionTopics, name: string = 'default') {
+    const current = this.subscriptions.get(name) || {};
+    const merged: SubscriptionTopics = {};
+    (['sessions', 'tasks', 'types'] as const).forEach((key) => {
+      const values = new Set([...(current[key] || []), ...(topics[key] || [])]);
+      if (values.size > 0) {
+        merged[key] = Array.from(values);
+      }
+    });
+    this.subscriptions.set(name, merged);
+    this.send(name, { action: 'subscribe', ...topics });
+  }
+
+  resetSubscription(name: string = 'default') {
+    this.subscriptions.delete(name);
+    this.send(name, { action: 'reset' });
+  }
+
+  private send(name: string, message: object) {
+    const ws = this.connections.get(name);
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify(message));
+    }
+  }
+
   on(event: string, callback: (data: any) => void) {
     if (!this.listeners.has(event)) {
       this.listeners.set(event, new Set());
@@ -103,6 +143,14 @@ class WebSocketManager {
     this.off('command_output', callback);
   }
 
+  onCommandOutputChunk(callback: (data: { seq: number; command: string | null; data: string; dropped_bytes?: number }) => void) {
+    this.on('command_output_chunk', callback);
+  }
+
+  offCommandOutputChunk(callback: (data: { seq: number; command: string | null; data: string; dropped_bytes?: number }) => void) {
+    this.off('command_output_chunk', callback);
+  }
+
   onNaturalLanguageOutput(callback: (data: { output: string; command: string; mode: string }) => void) {
     this.on('natural_language_output', callback);
   }
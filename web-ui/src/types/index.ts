@@ -66,8 +66,16 @@ export interface AnalysisProgress {
   status: AnalysisStatus;
   progress: number;
   message: string;
+  seq?: number;
   result?: AnalysisReport;
   error?: string;
+  chunk?: string;
+}
+
+export interface ThinkingEntry {
+  seq: number;
+  timestamp: string;
+  content: string;
 }
 
 export interface AnalysisTask {
@@ -75,8 +83,12 @@ export interface AnalysisTask {
   status: AnalysisStatus;
   progress: number;
   message: string;
+  seq: number;
   result?: AnalysisReport;
   error?: string;
+  thinking_history: ThinkingEntry[];
+  thinking_dropped: number;
+  queue_position?: number | null;
   created_at: string;
   started_at?: string;
   completed_at?: string;